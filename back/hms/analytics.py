@@ -1,155 +1,221 @@
+"""
+Queries and computations behind the analytics endpoints in ``async_views``.
+"""
+
+from collections import Counter
 from datetime import datetime, timedelta
 
-from django.db.models import Count
-from django.db.models.functions import Extract
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
-from rest_framework.response import Response
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
 
 from .models import Employee, Facility, Person
 
+# Tables the dashboard overview is computed from
+DASHBOARD_MODELS = (Person, Employee, Facility)
 
-@api_view(["GET"])
-@permission_classes([AllowAny])
-def dashboard_stats(request):
-    """Get overall dashboard statistics"""
+# Upper ages of the default demographics groups: 0-18, 19-30, 31-50, 51-70, 70+
+DEFAULT_AGE_BOUNDS = [18, 30, 50, 70]
+MAX_AGE_GROUPS = 20
 
-    # Basic counts
-    total_persons = Person.objects.count()
-    total_employees = Employee.objects.count()
-    total_facilities = Facility.objects.count()
 
-    # Calculate capacity
-    total_capacity = sum(facility.capacity or 0 for facility in Facility.objects.all())
+def _ranked(counts, key):
+    """Turn ``{value: count}`` into ``[{key: value, "count": count}]``, largest first"""
+    ranked = sorted(counts.items(), key=lambda item: item[1], reverse=True)
+    return [{key: value, "count": count} for value, count in ranked]
 
-    # Employee role distribution
-    employee_roles = (
-        Employee.objects.values("role").annotate(count=Count("role")).order_by("-count")
+
+def dashboard_cache_key(versions):
+    """
+    Keyed on the ``table_versions`` of ``DASHBOARD_MODELS``, so any write to
+    these tables invalidates it
+    """
+    return "hms:analytics:dashboard:" + "-".join(str(version) for version in versions)
+
+
+def person_citizenship_groups():
+    """
+    Persons grouped by citizenship; gives the total, the DOB split and the
+    citizenship distribution in a single pass
+    """
+    return list(
+        Person.objects.order_by()
+        .values("citizenship")
+        .annotate(rows=Count("pk"), count=Count("citizenship"), has_dob=Count("dob"))
     )
 
-    # Facility type distribution
-    facility_types = (
-        Facility.objects.values("type").annotate(count=Count("type")).order_by("-count")
+
+def employee_role_counts():
+    """Employee role distribution"""
+    return list(
+        Employee.objects.values("role").annotate(count=Count("role")).order_by("-count")
     )
 
-    # Age distribution (simplified for now since we don't have gender field)
-    # We'll use citizenship as another distribution metric instead
-    age_distribution = {
-        "has_dob": Person.objects.filter(dob__isnull=False).count(),
-        "no_dob": Person.objects.filter(dob__isnull=True).count(),
+
+def facility_type_province_groups():
+    """Facilities grouped by (type, province), folded into both distributions"""
+    groups = Facility.objects.order_by().values("type", "province")
+    return list(groups.annotate(count=Count("pk"), capacity=Sum("capacity")))
+
+
+# The dashboard overview takes one grouped query per table; the queries are
+# independent of each other and run concurrently
+DASHBOARD_QUERIES = (
+    person_citizenship_groups,
+    employee_role_counts,
+    facility_type_province_groups,
+)
+
+
+def dashboard_stats_from(person_groups, employee_roles, facility_groups):
+    """Dashboard overview from the results of ``DASHBOARD_QUERIES``"""
+    total_persons = sum(group["rows"] for group in person_groups)
+    has_dob = sum(group["has_dob"] for group in person_groups)
+
+    facility_types = Counter()
+    province_distribution = Counter()
+    total_facilities = 0
+    total_capacity = 0
+    for group in facility_groups:
+        facility_types[group["type"]] += group["count"]
+        province_distribution[group["province"]] += group["count"]
+        total_facilities += group["count"]
+        total_capacity += group["capacity"] or 0
+
+    # Top 10 citizenships
+    citizenship_distribution = sorted(
+        person_groups, key=lambda group: group["count"], reverse=True
+    )[:10]
+
+    return {
+        "overview": {
+            "total_persons": total_persons,
+            "total_employees": sum(role["count"] for role in employee_roles),
+            "total_facilities": total_facilities,
+            "total_capacity": total_capacity,
+        },
+        "employee_roles": employee_roles,
+        "facility_types": _ranked(facility_types, "type"),
+        # Age distribution (simplified for now since we don't have gender field)
+        "age_distribution": {
+            "has_dob": has_dob,
+            "no_dob": total_persons - has_dob,
+        },
+        "citizenship_distribution": [
+            {"citizenship": group["citizenship"], "count": group["count"]}
+            for group in citizenship_distribution
+        ],
+        "province_distribution": _ranked(province_distribution, "province"),
     }
 
-    # Citizenship distribution
-    citizenship_distribution = (
-        Person.objects.values("citizenship")
-        .annotate(count=Count("citizenship"))
-        .order_by("-count")[:10]
-    )  # Top 10 citizenships
 
-    # Province distribution for facilities
-    province_distribution = (
-        Facility.objects.values("province")
-        .annotate(count=Count("province"))
-        .order_by("-count")
+def facility_staff_rows():
+    """
+    Facilities with the employees currently working at each, from their
+    employment records, counted in a single GROUP BY join
+    """
+    today = timezone.localdate()
+    active_employment = Q(employments__start_date__lte=today) & (
+        Q(employments__end_date__isnull=True) | Q(employments__end_date__gte=today)
     )
-
-    return Response(
-        {
-            "overview": {
-                "total_persons": total_persons,
-                "total_employees": total_employees,
-                "total_facilities": total_facilities,
-                "total_capacity": total_capacity,
-            },
-            "employee_roles": list(employee_roles),
-            "facility_types": list(facility_types),
-            "age_distribution": age_distribution,
-            "citizenship_distribution": list(citizenship_distribution),
-            "province_distribution": list(province_distribution),
-        }
+    return list(
+        Facility.objects.annotate(
+            employee_count=Count(
+                "employments__essn", filter=active_employment, distinct=True
+            )
+        )
+        .values("name", "type", "capacity", "city", "province", "employee_count")
+        .order_by(F("capacity").desc(nulls_last=True), "name")
     )
 
 
-@api_view(["GET"])
-@permission_classes([AllowAny])
-def facility_analytics(request):
-    """Get detailed facility analytics"""
-
+def facility_analytics_from(facilities):
+    """Occupancy figures from the rows of ``facility_staff_rows``"""
     facilities_with_stats = []
-
-    for facility in Facility.objects.all():
-        # Simplified employee count (just use a basic calculation for now)
-        # Since we don't have direct facility-employee relationship, we'll estimate
-        total_employees = Employee.objects.count()
-        total_facilities = Facility.objects.count()
-        estimated_employee_count = max(1, total_employees // total_facilities)
-
+    for facility in facilities:
+        capacity = facility["capacity"] or 0
+        employee_count = facility["employee_count"]
         facilities_with_stats.append(
             {
-                "name": facility.name,
-                "type": facility.type,
-                "capacity": facility.capacity or 0,
-                "employee_count": estimated_employee_count,
+                "name": facility["name"],
+                "type": facility["type"],
+                "capacity": capacity,
+                "employee_count": employee_count,
                 "occupancy_rate": min(
-                    (
-                        (estimated_employee_count / facility.capacity * 100)
-                        if facility.capacity
-                        else 0
-                    ),
-                    100,
+                    (employee_count / capacity * 100) if capacity else 0, 100
                 ),
-                "city": facility.city,
-                "province": facility.province,
+                "city": facility["city"],
+                "province": facility["province"],
             }
         )
 
-    # Sort by capacity
-    facilities_with_stats.sort(key=lambda x: x["capacity"], reverse=True)
-
-    return Response(
-        {
-            "facilities": facilities_with_stats,
-            "total_capacity": sum(f["capacity"] for f in facilities_with_stats),
-            "average_occupancy": (
-                sum(f["occupancy_rate"] for f in facilities_with_stats)
-                / len(facilities_with_stats)
-                if facilities_with_stats
-                else 0
-            ),
-        }
-    )
+    return {
+        "facilities": facilities_with_stats,
+        "total_capacity": sum(f["capacity"] for f in facilities_with_stats),
+        "average_occupancy": (
+            sum(f["occupancy_rate"] for f in facilities_with_stats)
+            / len(facilities_with_stats)
+            if facilities_with_stats
+            else 0
+        ),
+    }
 
 
-@api_view(["GET"])
-@permission_classes([AllowAny])
-def person_demographics(request):
-    """Get person demographics analytics"""
-
-    # Age distribution (approximate based on today's date)
-    current_year = datetime.now().year
-
-    # Get birth years and calculate age groups (using 'dob' field name)
-    persons_with_birth_year = Person.objects.annotate(
-        birth_year=Extract("dob", "year")
-    ).filter(birth_year__isnull=False)
-
-    age_groups = {"0-18": 0, "19-30": 0, "31-50": 0, "51-70": 0, "70+": 0}
-
-    for person in persons_with_birth_year:
-        age = current_year - person.birth_year
-        if age <= 18:
-            age_groups["0-18"] += 1
-        elif age <= 30:
-            age_groups["19-30"] += 1
-        elif age <= 50:
-            age_groups["31-50"] += 1
-        elif age <= 70:
-            age_groups["51-70"] += 1
-        else:
-            age_groups["70+"] += 1
-
-    # Occupation distribution (top 10)
-    occupation_distribution = (
+def parse_age_bounds(value):
+    """
+    Parse ``age_groups`` such as ``"18,30,50,70"`` into the upper age of each
+    group; the last group is open-ended
+    """
+    if not value:
+        return DEFAULT_AGE_BOUNDS
+    try:
+        bounds = [int(part) for part in value.split(",")]
+    except ValueError:
+        raise ValueError("age_groups must be a comma-separated list of ages")
+    if bounds[0] < 0 or any(a >= b for a, b in zip(bounds, bounds[1:])):
+        raise ValueError("age_groups must be increasing non-negative ages")
+    if len(bounds) > MAX_AGE_GROUPS:
+        raise ValueError(f"age_groups accepts at most {MAX_AGE_GROUPS} ages")
+    return bounds
+
+
+def _years_before(day, years):
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:  # February 29th
+        return day.replace(year=day.year - years, day=28)
+
+
+def age_buckets(bounds, today):
+    """
+    ``(label, Q)`` per age group, e.g. ``("19-30", Q(...))``, comparing DOB
+    against precomputed cut-off dates so the DOB column is never transformed
+    """
+    buckets = []
+    lower = 0
+    for upper in bounds:
+        condition = Q(dob__gt=_years_before(today, upper + 1))
+        if lower:
+            condition &= Q(dob__lte=_years_before(today, lower))
+        buckets.append((f"{lower}-{upper}", condition))
+        lower = upper + 1
+    buckets.append((f"{bounds[-1]}+", Q(dob__lte=_years_before(today, lower))))
+    return buckets
+
+
+def age_group_counts(buckets):
+    """
+    Total persons and the count of each ``age_buckets`` group, from
+    conditional aggregates (CASE WHEN ...) in a single query
+    """
+    aggregates = {"total": Count("pk")}
+    for index, (label, condition) in enumerate(buckets):
+        aggregates[f"bucket_{index}"] = Count("pk", filter=condition)
+    return Person.objects.aggregate(**aggregates)
+
+
+def occupation_counts():
+    """Occupation distribution (top 10)"""
+    return list(
         Person.objects.exclude(occupation__isnull=True)
         .exclude(occupation__exact="")
         .values("occupation")
@@ -157,22 +223,28 @@ def person_demographics(request):
         .order_by("-count")[:10]
     )
 
+
+def person_demographics_from(buckets, counts, occupation_distribution):
+    """Demographics from the results of ``age_group_counts`` and ``occupation_counts``"""
+    total_persons = counts["total"]
+    age_groups = {
+        label: counts[f"bucket_{index}"] for index, (label, _) in enumerate(buckets)
+    }
+
     # Monthly registration trend (last 12 months)
     # Note: This is simulated since we don't have actual registration dates
     monthly_trend = []
     for i in range(12):
         month_date = datetime.now() - timedelta(days=30 * i)
         # Simulate data based on person count
-        count = max(1, Person.objects.count() // 12 + (i % 3))
+        count = max(1, total_persons // 12 + (i % 3))
         monthly_trend.append({"month": month_date.strftime("%b %Y"), "count": count})
 
     monthly_trend.reverse()
 
-    return Response(
-        {
-            "age_distribution": age_groups,
-            "occupation_distribution": list(occupation_distribution),
-            "monthly_trend": monthly_trend,
-            "total_persons": Person.objects.count(),
-        }
-    )
+    return {
+        "age_distribution": age_groups,
+        "occupation_distribution": occupation_distribution,
+        "monthly_trend": monthly_trend,
+        "total_persons": total_persons,
+    }
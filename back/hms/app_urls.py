@@ -1,6 +1,6 @@
 from django.urls import path
 
-from .analytics import dashboard_stats, facility_analytics, person_demographics
+from .async_views import dashboard_stats, facility_analytics, person_demographics
 from .auth_views import (
     check_auth_view,
     login_view,
@@ -10,27 +10,43 @@ from .auth_views import (
 )
 from .views import (
     EmployeeDetailView,
+    EmployeeExportView,
     EmployeeListCreateView,
     EmploymentDetailView,
+    EmploymentExportView,
     EmploymentListCreateView,
     FacilityDetailView,
+    FacilityExportView,
     FacilityListCreateView,
+    InfectionBulkView,
     InfectionDetailView,
+    InfectionExportView,
     InfectionListCreateView,
     InfectionTypeDetailView,
+    InfectionTypeExportView,
     InfectionTypeListCreateView,
     PersonDetailView,
+    PersonExportView,
     PersonListCreateView,
     ResidenceDetailView,
+    ResidenceExportView,
     ResidenceListCreateView,
+    ScheduleBulkView,
     ScheduleDetailView,
+    ScheduleExportView,
     ScheduleListCreateView,
+    VaccinationBulkView,
     VaccinationDetailView,
+    VaccinationExportView,
     VaccinationListCreateView,
     VaccineTypeDetailView,
+    VaccineTypeExportView,
     VaccineTypeListCreateView,
+    db_pool_stats,
     employee_filter_options,
     person_filter_options,
+    reference_cache_stats,
+    schedule_conflicts,
 )
 
 urlpatterns = [
@@ -51,16 +67,19 @@ urlpatterns = [
     ),
     # Person endpoints
     path("persons/", PersonListCreateView.as_view(), name="person-list-create"),
+    path("persons/export/", PersonExportView.as_view(), name="person-export"),
     path(
         "persons/<str:pk>/", PersonDetailView.as_view(), name="person-detail"
     ),  # Medicare is string
     # Employee endpoints
     path("employees/", EmployeeListCreateView.as_view(), name="employee-list-create"),
+    path("employees/export/", EmployeeExportView.as_view(), name="employee-export"),
     path(
         "employees/<int:pk>/", EmployeeDetailView.as_view(), name="employee-detail"
     ),  # SSN is int
     # Facility endpoints
     path("facilities/", FacilityListCreateView.as_view(), name="facility-list-create"),
+    path("facilities/export/", FacilityExportView.as_view(), name="facility-export"),
     path(
         "facilities/<int:pk>/", FacilityDetailView.as_view(), name="facility-detail"
     ),  # FID is int
@@ -68,10 +87,18 @@ urlpatterns = [
     path("analytics/dashboard/", dashboard_stats, name="dashboard-stats"),
     path("analytics/facilities/", facility_analytics, name="facility-analytics"),
     path("analytics/demographics/", person_demographics, name="person-demographics"),
+    # Cache statistics (admin only)
+    path(
+        "system/reference-cache/",
+        reference_cache_stats,
+        name="reference-cache-stats",
+    ),
+    path("system/db-pool/", db_pool_stats, name="db-pool-stats"),
     # Residence endpoints
     path(
         "residences/", ResidenceListCreateView.as_view(), name="residence-list-create"
     ),
+    path("residences/export/", ResidenceExportView.as_view(), name="residence-export"),
     path(
         "residences/<int:pk>/", ResidenceDetailView.as_view(), name="residence-detail"
     ),
@@ -81,6 +108,11 @@ urlpatterns = [
         InfectionTypeListCreateView.as_view(),
         name="infection-type-list-create",
     ),
+    path(
+        "infection-types/export/",
+        InfectionTypeExportView.as_view(),
+        name="infection-type-export",
+    ),
     path(
         "infection-types/<int:pk>/",
         InfectionTypeDetailView.as_view(),
@@ -90,6 +122,8 @@ urlpatterns = [
     path(
         "infections/", InfectionListCreateView.as_view(), name="infection-list-create"
     ),
+    path("infections/bulk/", InfectionBulkView.as_view(), name="infection-bulk"),
+    path("infections/export/", InfectionExportView.as_view(), name="infection-export"),
     path(
         "infections/<int:pk>/", InfectionDetailView.as_view(), name="infection-detail"
     ),
@@ -99,6 +133,11 @@ urlpatterns = [
         VaccineTypeListCreateView.as_view(),
         name="vaccine-type-list-create",
     ),
+    path(
+        "vaccine-types/export/",
+        VaccineTypeExportView.as_view(),
+        name="vaccine-type-export",
+    ),
     path(
         "vaccine-types/<int:pk>/",
         VaccineTypeDetailView.as_view(),
@@ -110,6 +149,12 @@ urlpatterns = [
         VaccinationListCreateView.as_view(),
         name="vaccination-list-create",
     ),
+    path("vaccinations/bulk/", VaccinationBulkView.as_view(), name="vaccination-bulk"),
+    path(
+        "vaccinations/export/",
+        VaccinationExportView.as_view(),
+        name="vaccination-export",
+    ),
     path(
         "vaccinations/<int:pk>/",
         VaccinationDetailView.as_view(),
@@ -121,6 +166,9 @@ urlpatterns = [
         EmploymentListCreateView.as_view(),
         name="employment-list-create",
     ),
+    path(
+        "employments/export/", EmploymentExportView.as_view(), name="employment-export"
+    ),
     path(
         "employments/<int:pk>/",
         EmploymentDetailView.as_view(),
@@ -128,5 +176,8 @@ urlpatterns = [
     ),
     # Schedule endpoints
     path("schedules/", ScheduleListCreateView.as_view(), name="schedule-list-create"),
+    path("schedules/bulk/", ScheduleBulkView.as_view(), name="schedule-bulk"),
+    path("schedules/conflicts/", schedule_conflicts, name="schedule-conflicts"),
+    path("schedules/export/", ScheduleExportView.as_view(), name="schedule-export"),
     path("schedules/<int:pk>/", ScheduleDetailView.as_view(), name="schedule-detail"),
 ]
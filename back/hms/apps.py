@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class HmsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "hms"
+
+    def ready(self):
+        from .signals import connect_signals
+
+        connect_signals()
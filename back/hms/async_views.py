@@ -0,0 +1,130 @@
+"""
+Async versions of the read-only analytics endpoints.
+
+Each endpoint's aggregate queries are independent of each other, so they run
+concurrently on a shared thread pool and the response takes about as long as
+its slowest query. The pool's size bounds how many of these queries (and
+database connections) a process has open at once. Under an ASGI server the
+event loop stays free to accept other requests while the queries run.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.http import HttpResponse, HttpResponseNotAllowed
+from django.utils import timezone
+
+from . import jsoncodec
+from .analytics import (
+    DASHBOARD_MODELS,
+    DASHBOARD_QUERIES,
+    age_buckets,
+    age_group_counts,
+    dashboard_cache_key,
+    dashboard_stats_from,
+    facility_analytics_from,
+    facility_staff_rows,
+    occupation_counts,
+    parse_age_bounds,
+    person_demographics_from,
+)
+from .caching import table_versions
+from .routers import replica_reads, use_primary_if_changed
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_QUERY_WORKERS, thread_name_prefix="hms-query"
+)
+
+
+def _in_worker(function, *args):
+    # Pool threads are outside the request cycle, so expire their connections
+    # here as Django does around each request
+    close_old_connections()
+    try:
+        return function(*args)
+    finally:
+        close_old_connections()
+
+
+async def run_query(function, *args):
+    """Run a blocking query function on the query pool"""
+    return await sync_to_async(_in_worker, thread_sensitive=False, executor=_executor)(
+        function, *args
+    )
+
+
+async def gather_queries(*calls):
+    """
+    Run ``(function, *args)`` calls concurrently on the query pool and return
+    their results in order
+    """
+    return await asyncio.gather(*(run_query(*call) for call in calls))
+
+
+def json_response(data, status=200):
+    return HttpResponse(
+        jsoncodec.dumps(data), status=status, content_type="application/json"
+    )
+
+
+def async_read_view(view):
+    """
+    Allow only GET and HEAD, read from a replica when one is configured and
+    render the returned data as JSON
+    """
+
+    @replica_reads
+    @wraps(view)
+    async def inner(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return HttpResponseNotAllowed(["GET", "HEAD"])
+        result = await view(request, *args, **kwargs)
+        if isinstance(result, HttpResponse):
+            return result
+        return json_response(result)
+
+    return inner
+
+
+@async_read_view
+async def dashboard_stats(request):
+    """Get overall dashboard statistics"""
+
+    versions = await sync_to_async(table_versions)(*DASHBOARD_MODELS)
+    key = dashboard_cache_key(versions)
+    stats = await cache.aget(key)
+    if stats is None:
+        # Cached under these versions, so must not come from a replica that
+        # is still behind them
+        use_primary_if_changed(versions)
+        results = await gather_queries(*((query,) for query in DASHBOARD_QUERIES))
+        stats = dashboard_stats_from(*results)
+        await cache.aset(key, stats, settings.DASHBOARD_CACHE_TTL)
+    return stats
+
+
+@async_read_view
+async def facility_analytics(request):
+    """Get detailed facility analytics"""
+    return facility_analytics_from(await run_query(facility_staff_rows))
+
+
+@async_read_view
+async def person_demographics(request):
+    """Get person demographics analytics"""
+
+    try:
+        bounds = parse_age_bounds(request.GET.get("age_groups"))
+    except ValueError as e:
+        return json_response({"error": str(e)}, status=400)
+
+    buckets = age_buckets(bounds, timezone.localdate())
+    counts, occupations = await gather_queries(
+        (age_group_counts, buckets), (occupation_counts,)
+    )
+    return person_demographics_from(buckets, counts, occupations)
@@ -1,5 +1,3 @@
-import json
-
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
 from rest_framework import status
@@ -9,6 +7,7 @@ from rest_framework.decorators import (
     authentication_classes,
     permission_classes,
 )
+from rest_framework.exceptions import ParseError
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
@@ -21,7 +20,7 @@ def login_view(request):
     Login endpoint that creates a session and returns user info with token
     """
     try:
-        data = json.loads(request.body) if request.body else request.data
+        data = request.data
         username = data.get("username")
         password = data.get("password")
 
@@ -67,7 +66,7 @@ def login_view(request):
                 {"error": "Invalid username or password"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-    except json.JSONDecodeError:
+    except ParseError:
         return Response(
             {"error": "Invalid JSON data"}, status=status.HTTP_400_BAD_REQUEST
         )
@@ -144,7 +143,7 @@ def register_view(request):
         )
 
     try:
-        data = json.loads(request.body) if request.body else request.data
+        data = request.data
         username = data.get("username")
         password = data.get("password")
         email = data.get("email", "")
@@ -191,7 +190,7 @@ def register_view(request):
             status=status.HTTP_201_CREATED,
         )
 
-    except json.JSONDecodeError:
+    except ParseError:
         return Response(
             {"error": "Invalid JSON data"}, status=status.HTTP_400_BAD_REQUEST
         )
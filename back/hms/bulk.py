@@ -0,0 +1,290 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils.text import capfirst
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import GenericAPIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.serializers import as_serializer_error
+from rest_framework.validators import UniqueValidator
+
+from .caching import bump_column_version, bump_table_version
+from .parsers import FastJSONParser, NDJSONParser
+
+CREATE = "create"
+UPSERT = "upsert"
+
+
+def natural_key_fields(model):
+    """
+    Field names of the model's natural key: its composite ``unique_together``
+    key, or the primary key for tables without one
+    """
+    if model._meta.unique_together:
+        return list(model._meta.unique_together[0])
+    return [model._meta.pk.name]
+
+
+def unique_fields(model):
+    """Names of the model's single-column unique fields outside its natural key"""
+    key_fields = natural_key_fields(model)
+    return [
+        field.name
+        for field in model._meta.concrete_fields
+        if field.unique and field.name not in key_fields
+    ]
+
+
+class BulkSerializerMixin:
+    """Drops the per-row uniqueness checks of a model serializer's fields"""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for field in fields.values():
+            field.validators = [
+                validator
+                for validator in field.validators
+                if not isinstance(validator, UniqueValidator)
+            ]
+        return fields
+
+
+def bulk_serializer_class(serializer_class):
+    """
+    Subclass of a model serializer without its per-row database checks.
+
+    Its uniqueness validators and ``Meta.validators`` run one query per row;
+    bulk writes check a whole batch at once instead, with ``existing_keys``
+    for the natural key and ``unique_errors`` for the other unique columns.
+    """
+    meta = type("Meta", (serializer_class.Meta,), {"validators": []})
+    return type(
+        f"Bulk{serializer_class.__name__}",
+        (BulkSerializerMixin, serializer_class),
+        {"Meta": meta},
+    )
+
+
+def row_key(model, values):
+    return tuple(values[name] for name in natural_key_fields(model))
+
+
+def existing_keys(model, keys, using="default"):
+    """Return the subset of natural ``keys`` already stored, in one query per batch"""
+    key_fields = natural_key_fields(model)
+    keys = list(keys)
+    found = set()
+    for start in range(0, len(keys), settings.BULK_BATCH_SIZE):
+        batch = keys[start : start + settings.BULK_BATCH_SIZE]
+        # IN lists per column select a superset served by the composite key
+        lookups = {
+            f"{name}__in": {key[position] for key in batch}
+            for position, name in enumerate(key_fields)
+        }
+        wanted = set(batch)
+        rows = model.objects.using(using).filter(**lookups).values_list(*key_fields)
+        found.update(row for row in rows if row in wanted)
+    return found
+
+
+def unique_errors(model, rows, using="default", labels=None):
+    """
+    Serializer-style errors of ``rows`` (field values; None for rows to
+    skip) whose value of a unique column other than the natural key belongs
+    to another stored row or an earlier row, by position; ``labels`` name
+    the rows in messages (default: "item <n>").
+
+    Upserts resolve conflicts on every unique key on MySQL, so such a row
+    would overwrite the other record instead of failing. One query per
+    column per ``BULK_BATCH_SIZE`` values.
+    """
+    key_fields = natural_key_fields(model)
+    errors = {}
+    for name in unique_fields(model):
+        field = model._meta.get_field(name)
+        claimed = {}
+        for item, values in enumerate(rows):
+            if values is None or item in errors or values.get(name) is None:
+                continue
+            # Rows of tables with an auto-increment key may not have one yet
+            value = values[name]
+            key = tuple(values.get(key_field) for key_field in key_fields)
+            if value not in claimed:
+                claimed[value] = (key, item)
+            elif claimed[value][0] != key:
+                first = claimed[value][1]
+                label = labels[first] if labels else f"item {first}"
+                errors[item] = {name: [f"Same {field.verbose_name} as {label}"]}
+
+        values = list(claimed)
+        owners = {}
+        for start in range(0, len(values), settings.BULK_BATCH_SIZE):
+            stored = model.objects.using(using).filter(
+                **{f"{name}__in": values[start : start + settings.BULK_BATCH_SIZE]}
+            )
+            for value, *key in stored.values_list(name, *key_fields):
+                owners[value] = tuple(key)
+        for value, (key, item) in claimed.items():
+            if value in owners and owners[value] != key:
+                errors[item] = {
+                    name: [
+                        f"{capfirst(model._meta.verbose_name)} with this "
+                        f"{field.verbose_name} already exists."
+                    ]
+                }
+    return errors
+
+
+def write_rows(model, objs, mode=CREATE, using="default", batch_size=None):
+    """
+    Insert ``objs`` with multi-row INSERTs of ``batch_size`` rows
+    (``BULK_BATCH_SIZE`` by default).
+
+    In ``upsert`` mode rows whose natural key exists overwrite the other
+    columns (``ON DUPLICATE KEY UPDATE`` on MySQL); tables with nothing but
+    key columns just skip them. MySQL matches every unique key there, so
+    reject rows with ``unique_errors`` first. Signals are not sent, so the
+    caller must call ``record_bulk_write`` once the transaction commits.
+    """
+    options = {}
+    if mode == UPSERT:
+        key_fields = natural_key_fields(model)
+        update_fields = [
+            field.name
+            for field in model._meta.concrete_fields
+            if field.name not in key_fields
+        ]
+        if update_fields:
+            options = {"update_conflicts": True, "update_fields": update_fields}
+            # MySQL always resolves conflicts against every unique key
+            if connections[using].features.supports_update_conflicts_with_target:
+                options["unique_fields"] = key_fields
+        else:
+            options = {"ignore_conflicts": True}
+    model.objects.using(using).bulk_create(
+        objs, batch_size=batch_size or settings.BULK_BATCH_SIZE, **options
+    )
+
+
+def record_bulk_write(model):
+    """Bump the versions ``post_save`` would have for rows written in bulk"""
+    bump_table_version(model)
+    tracked_columns = getattr(model, "tracked_columns", ())
+    if tracked_columns:
+        bump_column_version(model, *tracked_columns)
+
+
+class BulkWriteView(GenericAPIView):
+    """
+    Create (or, with ``?mode=upsert``, create or update) many rows in one request.
+
+    The body is a JSON array or an NDJSON stream of objects in the same
+    shape the list endpoint accepts. The whole batch is validated first;
+    if any item is invalid, or in ``create`` mode already exists, nothing
+    is written and the response is a 400 listing each item's errors, or
+    ``not_written`` for the valid ones. Otherwise all rows are written in
+    one transaction.
+    """
+
+    parser_classes = [FastJSONParser, NDJSONParser]
+    permission_classes = [IsAuthenticated]
+    # Optional staticmethod ``(rows, using)`` returning the errors of valid
+    # rows that conflict with each other or stored rows, by position; rows
+    # already rejected are None
+    check_rows = None
+
+    def get_bulk_serializer_class(self):
+        view_class = type(self)
+        if "_bulk_serializer_class" not in view_class.__dict__:
+            view_class._bulk_serializer_class = bulk_serializer_class(
+                self.get_serializer_class()
+            )
+        return view_class._bulk_serializer_class
+
+    def post(self, request, *args, **kwargs):
+        mode = request.query_params.get("mode", CREATE)
+        if mode not in (CREATE, UPSERT):
+            return Response(
+                {"error": "mode must be 'create' or 'upsert'"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response(
+                {"error": "Expected a non-empty JSON array or NDJSON body"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(items) > settings.BULK_MAX_ITEMS:
+            return Response(
+                {"error": f"At most {settings.BULK_MAX_ITEMS} items per request"},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+
+        queryset = self.get_queryset()
+        model, using = queryset.model, queryset.db
+        serializer = self.get_bulk_serializer_class()(
+            context=self.get_serializer_context()
+        )
+        rows, errors = [], []
+        for item in items:
+            try:
+                rows.append(serializer.run_validation(item))
+                errors.append({})
+            except ValidationError as exc:
+                rows.append(None)
+                errors.append(as_serializer_error(exc))
+
+        seen = {}
+        for index, values in enumerate(rows):
+            if values is None:
+                continue
+            key = row_key(model, values)
+            if key in seen:
+                errors[index] = {"non_field_errors": [f"Duplicate of item {seen[key]}"]}
+            else:
+                seen[key] = index
+
+        existing = existing_keys(model, seen, using=using)
+        if mode == CREATE:
+            for key in existing:
+                errors[seen[key]] = {"non_field_errors": ["Record already exists"]}
+        checks = [partial(unique_errors, model)]
+        if self.check_rows is not None:
+            checks.append(self.check_rows)
+        for check in checks:
+            valid = [None if error else values for values, error in zip(rows, errors)]
+            for index, error in check(valid, using).items():
+                errors[index] = error
+
+        # One invalid item keeps the whole batch from being written
+        rejected = any(errors)
+        results = []
+        for index, error in enumerate(errors):
+            if error:
+                results.append({"index": index, "status": "error", "errors": error})
+            elif rejected:
+                results.append({"index": index, "status": "not_written"})
+            elif row_key(model, rows[index]) in existing:
+                results.append({"index": index, "status": "updated"})
+            else:
+                results.append({"index": index, "status": "created"})
+        summary = {
+            outcome: sum(1 for result in results if result["status"] == outcome)
+            for outcome in ("created", "updated", "not_written", "error")
+        }
+        body = {**summary, "results": results}
+        if rejected:
+            return Response(body, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic(using=using):
+            write_rows(model, [model(**values) for values in rows], mode, using)
+        record_bulk_write(model)
+        return Response(
+            body,
+            status=(
+                status.HTTP_201_CREATED if summary["created"] else status.HTTP_200_OK
+            ),
+        )
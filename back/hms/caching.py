@@ -0,0 +1,107 @@
+import time
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def _version_key(model):
+    return f"hms:table-version:{model._meta.db_table}"
+
+
+def _column_version_key(model, column):
+    return f"hms:column-version:{model._meta.db_table}:{column}"
+
+
+def _now():
+    return time.time_ns() // 1000
+
+
+def _get_versions(keys):
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        now = _now()
+        for key in missing:
+            cache.add(key, now, timeout=settings.TABLE_VERSION_TTL)
+        versions.update(cache.get_many(missing))
+    return [versions.get(key, 0) for key in keys]
+
+
+def table_versions(*models):
+    """
+    Current change version of each model's table, in argument order.
+
+    A version is the time (in microseconds) of the last recorded write, kept
+    in the shared cache so every worker sees the same value. Derived caches
+    put these versions in their keys, so a write invalidates them
+    everywhere without tracking individual entries. A table with no
+    recorded version starts at the current time, which only ever makes
+    derived entries look stale, never fresh. Versions expire after
+    ``TABLE_VERSION_TTL`` seconds, so writes that record none (raw SQL,
+    ``QuerySet.update()``) are picked up within that time.
+    """
+    return _get_versions([_version_key(model) for model in models])
+
+
+def column_versions(model, *columns):
+    """Like ``table_versions``, for individual columns of one table"""
+    return _get_versions([_column_version_key(model, column) for column in columns])
+
+
+def bump_table_version(*models):
+    """Record a write to each model's table"""
+    now = _now()
+    cache.set_many(
+        {_version_key(model): now for model in models},
+        timeout=settings.TABLE_VERSION_TTL,
+    )
+
+
+def bump_column_version(model, *columns):
+    """Record a change to the given columns of the model's table"""
+    now = _now()
+    cache.set_many(
+        {_column_version_key(model, column): now for column in columns},
+        timeout=settings.TABLE_VERSION_TTL,
+    )
+
+
+def versioned_key(prefix, *models):
+    """Cache key for data derived from the given tables"""
+    versions = table_versions(*models)
+    return f"{prefix}:" + "-".join(str(version) for version in versions)
+
+
+def column_versioned_key(prefix, model, *columns):
+    """Cache key for data derived from the given columns of one table"""
+    versions = column_versions(model, *columns)
+    return f"{prefix}:" + "-".join(str(version) for version in versions)
+
+
+def versions_shared():
+    """
+    Whether the versions are the same in every process.
+
+    A process-local cache (``LocMemCache``, the default without REDIS_URL)
+    only sees the writes of its own process, so other workers would keep
+    answering 304 for changed data. It is trusted only with DEBUG on, under
+    the single-process development server.
+    """
+    return settings.DEBUG or not isinstance(caches["default"], LocMemCache)
+
+
+@checks.register(checks.Tags.caches)
+def check_versions_shared(app_configs, **kwargs):
+    if versions_shared():
+        return []
+    return [
+        checks.Warning(
+            "The default cache is local to each process, so workers do not "
+            "see each other's writes: ETags are not sent and cached data "
+            "can be TABLE_VERSION_TTL seconds old.",
+            hint="Set REDIS_URL to a Redis server shared by every worker.",
+            id="hms.W001",
+        )
+    ]
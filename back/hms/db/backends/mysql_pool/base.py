@@ -0,0 +1,11 @@
+from django.db.backends.mysql import base
+
+from hms.db.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    """MySQL backend with pooled connections"""
+
+    @staticmethod
+    def check_pooled_connection(connection):
+        connection.ping()
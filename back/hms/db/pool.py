@@ -0,0 +1,291 @@
+import os
+import threading
+import time
+from collections import deque
+
+_pools = {}
+_pools_lock = threading.Lock()
+_pools_pid = os.getpid()
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """
+    Process-wide pool of open DB-API connections for one database alias.
+
+    At most ``max_size`` connections are open at once; a checkout when all
+    of them are in use waits up to ``timeout`` seconds for one to be
+    returned. Idle connections are reused most recently returned first, so
+    surplus ones stay idle and are closed after ``max_idle`` seconds. Every
+    connection is replaced after ``max_lifetime`` seconds, staying below the
+    server's ``wait_timeout``. A connection idle for at least
+    ``check_after`` seconds is checked with ``check(connection)`` before it
+    is handed out (0 checks every checkout).
+
+    Eviction happens during checkouts and checkins, so the pool needs no
+    background thread.
+    """
+
+    def __init__(
+        self,
+        alias,
+        connect,
+        check,
+        max_size=10,
+        timeout=10.0,
+        max_idle=300.0,
+        max_lifetime=3600.0,
+        check_after=0.0,
+    ):
+        self.alias = alias
+        self._connect = connect
+        self._check = check
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.check_after = check_after
+        self._condition = threading.Condition()
+        # (connection, created_at, returned_at), oldest returned first
+        self._idle = deque()
+        # id(connection) -> created_at
+        self._in_use = {}
+        self._size = 0
+        self._waiting = 0
+        self.checkouts = 0
+        self.created = 0
+        self.timeouts = 0
+        self.check_failures = 0
+        self.evicted_idle = 0
+        self.evicted_lifetime = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def checkout(self):
+        """
+        Return ``(connection, reused)``; raises ``PoolTimeout`` when no
+        connection frees up within ``timeout`` seconds
+        """
+        started = time.monotonic()
+        deadline = started + self.timeout
+        with self._condition:
+            expired = self._evict_idle(time.monotonic())
+            while True:
+                if self._idle:
+                    connection, created_at, returned_at = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    connection = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(
+                        f"No connection to '{self.alias}' became available within "
+                        f"{self.timeout}s ({self.max_size} in use)"
+                    )
+                self._waiting += 1
+                try:
+                    self._condition.wait(remaining)
+                finally:
+                    self._waiting -= 1
+            waited = time.monotonic() - started
+            self.checkouts += 1
+            self.wait_time += waited
+            self.max_wait_time = max(self.max_wait_time, waited)
+        self._close_all(expired)
+
+        now = time.monotonic()
+        too_old = failed_check = False
+        if connection is not None:
+            too_old = now - created_at >= self.max_lifetime
+            failed_check = (
+                not too_old
+                and now - returned_at >= self.check_after
+                and not self._is_healthy(connection)
+            )
+            if too_old or failed_check:
+                self._close_all([connection])
+                connection = None
+        reused = connection is not None
+        if connection is None:
+            try:
+                connection = self._connect()
+            except BaseException:
+                with self._condition:
+                    self._size -= 1
+                    self._condition.notify()
+                raise
+            created_at = now
+        with self._condition:
+            self.evicted_lifetime += too_old
+            self.check_failures += failed_check
+            self.created += not reused
+            self._in_use[id(connection)] = created_at
+        return connection, reused
+
+    def checkin(self, connection, reusable=True):
+        """Return a checked out connection; it is closed unless ``reusable``"""
+        now = time.monotonic()
+        with self._condition:
+            created_at = self._in_use.pop(id(connection), None)
+            if created_at is None:
+                # Not ours, e.g. checked out before a fork; the parent owns it
+                return
+            if reusable and now - created_at >= self.max_lifetime:
+                self.evicted_lifetime += 1
+                reusable = False
+            if reusable:
+                self._idle.append((connection, created_at, now))
+            else:
+                self._size -= 1
+            self._condition.notify()
+        if not reusable:
+            self._close_all([connection])
+
+    def stats(self):
+        with self._condition:
+            return {
+                "alias": self.alias,
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": len(self._in_use),
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "checkouts": self.checkouts,
+                "connections_created": self.created,
+                "timeouts": self.timeouts,
+                "check_failures": self.check_failures,
+                "evicted_idle": self.evicted_idle,
+                "evicted_lifetime": self.evicted_lifetime,
+                "wait_time_total_ms": round(self.wait_time * 1000, 3),
+                "wait_time_avg_ms": round(
+                    self.wait_time / self.checkouts * 1000 if self.checkouts else 0, 3
+                ),
+                "wait_time_max_ms": round(self.max_wait_time * 1000, 3),
+            }
+
+    def close(self):
+        """Close every idle connection"""
+        with self._condition:
+            idle = [connection for connection, _, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._condition.notify_all()
+        self._close_all(idle)
+
+    def _evict_idle(self, now):
+        """Remove connections idle longer than ``max_idle``; caller holds the lock"""
+        expired = []
+        while self._idle and now - self._idle[0][2] >= self.max_idle:
+            expired.append(self._idle.popleft()[0])
+        self._size -= len(expired)
+        self.evicted_idle += len(expired)
+        return expired
+
+    def _is_healthy(self, connection):
+        try:
+            self._check(connection)
+        except Exception:
+            return False
+        return True
+
+    @staticmethod
+    def _close_all(connections):
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+
+def get_pool(alias, create):
+    """The pool of ``alias`` in this process, made by ``create()`` on first use"""
+    global _pools_pid
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            # Connections inherited from the parent process are never shared
+            _pools.clear()
+            _pools_pid = os.getpid()
+        pool = _pools.get(alias)
+        if pool is None:
+            pool = _pools[alias] = create()
+        return pool
+
+
+def pool_stats():
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [pool.stats() for pool in pools]
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Take a database backend's connections from a ``ConnectionPool``.
+
+    Django opens a connection for each request (or thread) and closes it at
+    the end as usual; opening checks one out of the pool and closing returns
+    it, so the connection and its session setup (``init_command``,
+    ``init_connection_state``) are reused across requests. Keep
+    ``CONN_MAX_AGE`` at 0 so connections go back to the pool after every
+    request. The pool is configured by ``OPTIONS["pool"]``, whose keys are the
+    ``ConnectionPool`` arguments.
+    """
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop("pool", None)
+        return params
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self._create_pool)
+
+    def _create_pool(self):
+        options = self.settings_dict["OPTIONS"].get("pool") or {}
+        conn_params = self.get_connection_params()
+        return ConnectionPool(
+            self.alias,
+            connect=lambda: super(PooledDatabaseWrapperMixin, self).get_new_connection(
+                conn_params
+            ),
+            check=self.check_pooled_connection,
+            **options,
+        )
+
+    @staticmethod
+    def check_pooled_connection(connection):
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        finally:
+            cursor.close()
+
+    def get_new_connection(self, conn_params):
+        try:
+            connection, self.pooled_connection_reused = self.pool.checkout()
+        except PoolTimeout as e:
+            raise self.Database.OperationalError(str(e)) from e
+        return connection
+
+    def init_connection_state(self):
+        # A reused connection keeps the session state set when it was opened
+        if not self.pooled_connection_reused:
+            super().init_connection_state()
+
+    def _close(self):
+        if self.connection is None:
+            return
+        # A connection closed inside a transaction, after an unchecked error
+        # or with autocommit changed is not handed out again
+        reusable = not (
+            self.in_atomic_block
+            or self.errors_occurred
+            or self.autocommit != self.settings_dict["AUTOCOMMIT"]
+        )
+        with self.wrap_database_errors:
+            self.pool.checkin(self.connection, reusable)
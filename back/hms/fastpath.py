@@ -0,0 +1,121 @@
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+_compiled = {}
+
+
+def _field_converter(field):
+    """
+    Plain function equal to ``field.to_representation`` for non-null values,
+    or the bound method itself for field types without a shortcut
+    """
+    if isinstance(field, serializers.ChoiceField):
+        if all(isinstance(key, str) for key in field.choice_strings_to_values.values()):
+            return str
+    elif isinstance(field, serializers.CharField):
+        return str
+    elif isinstance(field, serializers.IntegerField):
+        return int
+    elif isinstance(field, (serializers.DateField, serializers.TimeField)):
+        default = (
+            api_settings.DATE_FORMAT
+            if isinstance(field, serializers.DateField)
+            else api_settings.TIME_FORMAT
+        )
+        output_format = getattr(field, "format", default)
+        if output_format is not None and output_format.lower() == ISO_8601:
+            return _isoformat
+    return field.to_representation
+
+
+def _isoformat(value):
+    return value if isinstance(value, str) else value.isoformat()
+
+
+class ValuesRowSerializer:
+    """
+    Read-only rendering of a model serializer's output from ``.values()`` rows.
+
+    The serializer's fields are compiled once into ``(name, column,
+    converter)`` steps, so each row costs one dict lookup and one plain
+    function call per field instead of model instantiation and DRF's
+    per-field attribute resolution. Method fields need a ``values_<name>``
+    static method on the serializer computing the value from the row's
+    ``method_field_columns``; the output is identical to the serializer's.
+    """
+
+    def __init__(self, serializer):
+        serializer_class = type(serializer)
+        method_columns = getattr(serializer_class, "method_field_columns", {})
+        self.columns = []
+        self.steps = []
+        self.supported = True
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.SerializerMethodField):
+                function = getattr(serializer_class, f"values_{name}", None)
+                if function is None or name not in method_columns:
+                    self.supported = False
+                    return
+                self.columns.extend(method_columns[name])
+                self.steps.append((name, None, function))
+            else:
+                self.columns.append(field.source)
+                self.steps.append((name, field.source, _field_converter(field)))
+
+    @classmethod
+    def for_serializer(cls, serializer):
+        """Compiled instance for the serializer's class and current fields"""
+        key = (type(serializer), tuple(serializer.fields))
+        compiled = _compiled.get(key)
+        if compiled is None:
+            compiled = _compiled[key] = cls(serializer)
+        return compiled
+
+    def values(self, queryset, *extra_columns):
+        """The queryset as ``.values()`` dicts with every column the steps read"""
+        columns = dict.fromkeys([*self.columns, *extra_columns])
+        return queryset.values(*columns)
+
+    def render(self, rows):
+        steps = self.steps
+        data = []
+        for row in rows:
+            item = {}
+            for name, column, convert in steps:
+                if column is None:
+                    item[name] = convert(row)
+                else:
+                    value = row[column]
+                    item[name] = None if value is None else convert(value)
+            data.append(item)
+        return data
+
+
+class ValuesListMixin:
+    """
+    Serve a list view's GET from ``.values()`` rows via ``ValuesRowSerializer``.
+
+    Filtering, ordering, pagination and sparse fieldsets work as before; the
+    view falls back to the regular serializer when a remaining field has no
+    values-based equivalent.
+    """
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_serializer()
+        fast = ValuesRowSerializer.for_serializer(serializer)
+        if not fast.supported:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        # Keyset pagination reads the cursor columns of each row
+        cursor_columns = [
+            name.lstrip("-") for name in getattr(self, "cursor_ordering", ())
+        ]
+        queryset = fast.values(queryset, *cursor_columns)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(fast.render(page))
+        return Response(fast.render(queryset))
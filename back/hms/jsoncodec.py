@@ -0,0 +1,55 @@
+"""
+JSON encoding and decoding for the API, using orjson when it is installed.
+
+orjson serializes containers, strings, numbers and UUIDs in C. Dates,
+datetimes, times, decimals and any other type go through DRF's
+``JSONEncoder.default`` (DRF trims datetimes to milliseconds and writes
+UTC as "Z"), so both backends produce the same bytes as DRF's
+``JSONRenderer`` with its default compact, unicode settings.
+"""
+
+import json
+
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+HAS_ORJSON = orjson is not None
+
+_encoder = JSONEncoder()
+
+if HAS_ORJSON:
+    _ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(data):
+    """Compact UTF-8 JSON bytes, escaping U+2028/U+2029 like DRF"""
+    if HAS_ORJSON:
+        content = orjson.dumps(data, default=_encoder.default, option=_ORJSON_OPTIONS)
+        if b"\xe2\x80\xa8" in content or b"\xe2\x80\xa9" in content:
+            content = content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+        return content
+    content = json.dumps(
+        data,
+        cls=JSONEncoder,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    )
+    return content.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029").encode()
+
+
+def loads(content):
+    """Parse UTF-8 JSON bytes; raises ``ValueError`` on invalid input"""
+    if HAS_ORJSON:
+        return orjson.loads(content)
+    return json.loads(content, parse_constant=_reject_constant)
+
+
+def _reject_constant(name):
+    raise ValueError(f"Invalid JSON constant: {name}")
@@ -0,0 +1,54 @@
+from django.db import models
+from django.db.models import prefetch_related_objects
+from rest_framework import serializers
+
+
+class BatchedListSerializer(serializers.ListSerializer):
+    """
+    List serializer that loads the child's ``batched_relations`` for the
+    whole page before the rows are rendered.
+
+    Each relation costs one ``IN (...)`` query for the page. Rows whose
+    relations were already joined with ``select_related`` are skipped, so
+    list views that join in SQL pay nothing extra here.
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        rows = list(iterable)
+        prefetch_related_objects(rows, *self.child.get_batched_relations())
+        return super().to_representation(rows)
+
+
+def column_relations(columns):
+    """Relation paths joined to reach ``relation__column`` style columns"""
+    return sorted({column.rsplit("__", 1)[0] for column in columns if "__" in column})
+
+
+class BatchedRelationsMixin:
+    """
+    Serializer mixin declaring the relations its method fields read.
+
+    ``batched_relations`` lists relation lookups such as
+    ``("employee__person",)``; views pass the same tuple to
+    ``select_related`` so list pages render from a single query.
+    ``reference_models`` lists the tables read through ``hms.reference``
+    caches instead.
+
+    ``method_field_columns`` maps each method field to the columns it reads
+    (``relation__column`` for joined ones), so responses limited to some
+    fields load only the relations and columns those fields need.
+    """
+
+    batched_relations = ()
+    reference_models = ()
+    method_field_columns = {}
+
+    def get_batched_relations(self):
+        """The batched relations read by the fields this serializer renders"""
+        if not self.method_field_columns:
+            return self.batched_relations
+        columns = []
+        for name in self.fields:
+            columns.extend(self.method_field_columns.get(name, ()))
+        return column_relations(columns)
@@ -0,0 +1,377 @@
+import asyncio
+import gc
+import io
+import json
+import math
+import statistics
+import time
+import tracemalloc
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import AsyncClient, Client, override_settings
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+from rest_framework.filters import SearchFilter
+
+from hms import app_urls
+from hms.models import Person
+
+# Search terms are sampled from this column where the view's filter has no
+# search_fields of its own
+SEARCH_SAMPLE_FIELDS = {"person-list-create": "last_name"}
+
+# Traced requests per case; the peak memory of the smallest is reported
+ALLOCATION_RUNS = 3
+
+
+def percentile(samples, p):
+    """Nearest-rank percentile of sorted ``samples``"""
+    return samples[max(math.ceil(p / 100 * len(samples)) - 1, 0)]
+
+
+def _sample(queryset, field):
+    """A non-null value of ``field`` in ``queryset``, as a query string value"""
+    value = (
+        queryset.exclude(**{f"{field}__isnull": True})
+        .order_by()
+        .values_list(field, flat=True)
+        .first()
+    )
+    return None if value is None else str(value)
+
+
+def _view_class(callback):
+    return getattr(callback, "view_class", None) or getattr(callback, "cls", None)
+
+
+def build_cases(page_sizes):
+    """
+    ``(case name, path)`` for every GET route in ``hms.app_urls`` and the
+    names of the routes skipped because they only accept writes
+    """
+    cases, skipped = [], []
+    for pattern in app_urls.urlpatterns:
+        if not isinstance(pattern, URLPattern):
+            continue
+        name, view = pattern.name, _view_class(pattern.callback)
+        if view is not None and not hasattr(view, "get"):
+            skipped.append(name)
+            continue
+
+        if name.endswith("-detail"):
+            # Some tables' "pk" is only part of their composite key; pick one
+            # that names a single row
+            pk = (
+                view.queryset.values("pk")
+                .annotate(rows=Count("*"))
+                .filter(rows=1)
+                .order_by("pk")
+                .values_list("pk", flat=True)
+                .first()
+            )
+            if pk is None:
+                skipped.append(name)
+            else:
+                cases.append((name, reverse(name, kwargs={"pk": pk})))
+            continue
+        path = reverse(name)
+        if not name.endswith("-list-create"):
+            cases.append((name, path))
+            if name == "person-demographics":
+                query_string = "age_groups=5,10,15,20,30,40,50,60,70,80,90"
+                cases.append((f"{name}?{query_string}", f"{path}?{query_string}"))
+            continue
+
+        params = [{"page_size": size} for size in page_sizes]
+        if getattr(view, "cursor_ordering", None):
+            params.append({"cursor": "", "page_size": page_sizes[0]})
+        for field in getattr(view, "filterset_fields", ()):
+            value = _sample(view.queryset, field)
+            if value is not None:
+                params.append({field: value})
+        search_field = SEARCH_SAMPLE_FIELDS.get(name)
+        if search_field is None and getattr(view, "search_fields", None):
+            search_field = view.search_fields[0]
+        if search_field is not None and any(
+            issubclass(backend, SearchFilter) for backend in view.filter_backends
+        ):
+            value = _sample(view.queryset, search_field)
+            if value:
+                params.append({"search": value.split()[0].lower()})
+        for query in params:
+            query_string = urlencode(query)
+            cases.append((f"{name}?{query_string}", f"{path}?{query_string}"))
+    return cases, skipped
+
+
+class Command(BaseCommand):
+    help = (
+        "Request every GET route of the API in-process, repeatedly, and report "
+        "p50/p95/p99 latency, queries and allocated memory per request for "
+        "several page sizes, filters and search terms. Results can be saved as "
+        "a JSON baseline and compared against one, failing on regressions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=30,
+            help="Timed requests per case (default: 30)",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=3,
+            help="Untimed requests per case before timing (default: 3)",
+        )
+        parser.add_argument(
+            "--page-sizes",
+            default="20,100,1000",
+            help="Comma-separated page sizes of the list cases (default: 20,100,1000)",
+        )
+        parser.add_argument(
+            "--match",
+            default="",
+            help="Only run cases whose name contains this text",
+        )
+        parser.add_argument(
+            "--dataset-sizes",
+            default="",
+            help="Comma-separated person counts; before each, the data is "
+            "REPLACED with generate_data --flush at that size (default: "
+            "benchmark the current data)",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="generate_data seed for --dataset-sizes (default: 0)",
+        )
+        parser.add_argument(
+            "--user",
+            help="Username the requests are made as (default: the first superuser)",
+        )
+        parser.add_argument(
+            "--asgi",
+            action="store_true",
+            help="Go through the ASGI handler instead of WSGI",
+        )
+        parser.add_argument(
+            "--output", help="Write the results to this JSON baseline file"
+        )
+        parser.add_argument(
+            "--compare",
+            help="Compare with this JSON baseline and fail on regressions",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.25,
+            help="Fractional p95 latency or allocation increase counted as a "
+            "regression (default: 0.25)",
+        )
+        parser.add_argument(
+            "--min-delta-ms",
+            type=float,
+            default=2.0,
+            help="Ignore p95 increases smaller than this (default: 2.0)",
+        )
+
+    def handle(self, *args, **options):
+        if options["requests"] < 1:
+            raise CommandError("--requests must be positive")
+        try:
+            page_sizes = [int(size) for size in options["page_sizes"].split(",")]
+            dataset_sizes = [
+                int(size) for size in options["dataset_sizes"].split(",") if size
+            ]
+        except ValueError:
+            raise CommandError("--page-sizes and --dataset-sizes take integers")
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"]) as f:
+                baseline = json.load(f)["results"]
+
+        user = self.get_user(options["user"])
+        client_class = AsyncClient if options["asgi"] else Client
+        # Errors are reported as the case's status rather than raised
+        client = client_class(raise_request_exception=False)
+        client.force_login(user)
+
+        results = {}
+        for size in dataset_sizes or [None]:
+            if size is not None:
+                self.stdout.write(f"generating {size} persons...")
+                call_command(
+                    "generate_data",
+                    persons=size,
+                    seed=options["seed"],
+                    flush=True,
+                    stdout=io.StringIO(),
+                )
+            dataset = f"persons={Person.objects.count()}"
+            cases, skipped = build_cases(page_sizes)
+            cases = [case for case in cases if options["match"] in case[0]]
+            self.stdout.write(f"\n{dataset}: {len(cases)} cases")
+            if skipped:
+                self.stdout.write(
+                    f"skipped (write-only or no rows): {', '.join(skipped)}"
+                )
+            self.stdout.write(
+                f"{'case':<58}{'status':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+                f"{'queries':>9}{'alloc KiB':>11}"
+            )
+            # Instrumented so each request's query count can be read; budget
+            # overruns are logged rather than raised
+            with override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+                QUERY_INSTRUMENTATION=True,
+                QUERY_BUDGET_ACTION="log",
+            ):
+                results[dataset] = {}
+                for name, path in cases:
+                    result = self.measure(client, path, options)
+                    results[dataset][name] = result
+                    self.stdout.write(self.format_row(name, result, baseline, dataset))
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(
+                    {
+                        "created": timezone.now().isoformat(),
+                        "database": connection.vendor,
+                        "handler": "asgi" if options["asgi"] else "wsgi",
+                        "requests": options["requests"],
+                        "results": results,
+                    },
+                    f,
+                    indent=2,
+                )
+            self.stdout.write(f"\nbaseline written to {options['output']}")
+        if baseline is not None:
+            self.check_regressions(results, baseline, options)
+
+    def get_user(self, username):
+        users = get_user_model().objects.filter(is_active=True)
+        if username:
+            user = users.filter(username=username).first()
+        else:
+            user = users.filter(is_superuser=True).order_by("pk").first()
+        if user is None:
+            raise CommandError(
+                "No such user; pass --user or create a superuser with createsuperuser"
+            )
+        return user
+
+    def request(self, client, path):
+        """Make one request and read its whole body; returns the response"""
+        if isinstance(client, AsyncClient):
+            return asyncio.run(self.arequest(client, path))
+        response = client.get(path)
+        if response.streaming:
+            b"".join(response.streaming_content)
+        return response
+
+    async def arequest(self, client, path):
+        response = await client.get(path)
+        if response.streaming:
+            content = response.streaming_content
+            if hasattr(content, "__aiter__"):
+                async for _ in content:
+                    pass
+            else:
+                # A sync iterator may query the database, so not on the loop
+                await sync_to_async(b"".join)(content)
+        return response
+
+    def measure(self, client, path, options):
+        for _ in range(options["warmup"]):
+            self.request(client, path)
+
+        latencies, queries = [], []
+        for _ in range(options["requests"]):
+            started = time.perf_counter()
+            response = self.request(client, path)
+            latencies.append((time.perf_counter() - started) * 1000)
+            request = getattr(response, "wsgi_request", None) or response.asgi_request
+            queries.append(request.query_collector.count)
+
+        # Tracing slows requests down, so allocations get runs of their own;
+        # the smallest peak leaves out one-off work such as cache refills
+        allocated = []
+        tracemalloc.start()
+        try:
+            for _ in range(ALLOCATION_RUNS):
+                gc.collect()
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                self.request(client, path)
+                allocated.append(tracemalloc.get_traced_memory()[1] - before)
+        finally:
+            tracemalloc.stop()
+
+        latencies.sort()
+        return {
+            "status": response.status_code,
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+            "queries": round(statistics.median(queries)),
+            "alloc_kib": round(min(allocated) / 1024, 1),
+        }
+
+    def format_row(self, name, result, baseline, dataset):
+        row = (
+            f"{name[:57]:<58}{result['status']:>7}{result['p50_ms']:>9.2f}"
+            f"{result['p95_ms']:>9.2f}{result['p99_ms']:>9.2f}"
+            f"{result['queries']:>9}{result['alloc_kib']:>11.1f}"
+        )
+        previous = (baseline or {}).get(dataset, {}).get(name)
+        if previous and previous["p95_ms"]:
+            row += f"  {result['p95_ms'] / previous['p95_ms'] - 1:+.0%} p95"
+        return row
+
+    def check_regressions(self, results, baseline, options):
+        threshold = options["threshold"]
+        regressions = []
+        for dataset, cases in results.items():
+            for name, result in cases.items():
+                previous = baseline.get(dataset, {}).get(name)
+                if previous is None:
+                    continue
+                case = f"{dataset} {name}"
+                if result["status"] != previous["status"]:
+                    regressions.append(
+                        f"{case}: status {previous['status']} -> {result['status']}"
+                    )
+                if result["queries"] > previous["queries"]:
+                    regressions.append(
+                        f"{case}: {previous['queries']} -> {result['queries']} queries"
+                    )
+                if (
+                    result["p95_ms"] > previous["p95_ms"] * (1 + threshold)
+                    and result["p95_ms"] - previous["p95_ms"] >= options["min_delta_ms"]
+                ):
+                    regressions.append(
+                        f"{case}: p95 {previous['p95_ms']:.2f} -> "
+                        f"{result['p95_ms']:.2f} ms"
+                    )
+                if result["alloc_kib"] > previous["alloc_kib"] * (1 + threshold):
+                    regressions.append(
+                        f"{case}: allocated {previous['alloc_kib']:.1f} -> "
+                        f"{result['alloc_kib']:.1f} KiB"
+                    )
+        if regressions:
+            self.stderr.write("\nregressions:\n" + "\n".join(regressions))
+            raise CommandError(
+                f"{len(regressions)} regressions against {options['compare']}"
+            )
+        self.stdout.write(f"\nno regressions against {options['compare']}")
@@ -0,0 +1,92 @@
+import io
+import itertools
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from hms import jsoncodec
+from hms.models import Schedule, Vaccination
+from hms.parsers import FastJSONParser
+from hms.renderers import FastJSONRenderer
+from hms.serializers import ScheduleSerializer, VaccinationSerializer
+
+PAYLOADS = {
+    "vaccinations": (Vaccination, VaccinationSerializer),
+    "schedules": (Schedule, ScheduleSerializer),
+}
+
+
+def _best_cpu_time(function, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.process_time()
+        function()
+        elapsed = time.process_time() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DRF's JSON renderer and parser with the orjson-backed ones on "
+        "list pages of vaccinations and schedules, and check that both "
+        "render the same bytes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=1000,
+            help="Records per payload; stored rows are repeated to fill it "
+            "(default: 1000)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Runs per measurement; the fastest is kept (default: 20)",
+        )
+
+    def handle(self, *args, **options):
+        if not jsoncodec.HAS_ORJSON:
+            raise CommandError("orjson is not installed; nothing to compare")
+        rows, repeat = options["rows"], options["repeat"]
+        renderers = (JSONRenderer(), FastJSONRenderer())
+        parsers = (JSONParser(), FastJSONParser())
+
+        self.stdout.write(
+            f"{'payload':<14}{'KiB':>7}{'render ms':>12}{'orjson ms':>12}"
+            f"{'parse ms':>11}{'orjson ms':>12}"
+        )
+        for name, (model, serializer_class) in PAYLOADS.items():
+            stored = serializer_class(model.objects.all()[:rows], many=True).data
+            if not stored:
+                self.stdout.write(f"{name:<14}  (no rows)")
+                continue
+            data = {
+                "count": rows,
+                "next": None,
+                "previous": None,
+                "results": list(itertools.islice(itertools.cycle(stored), rows)),
+            }
+            outputs = [renderer.render(data) for renderer in renderers]
+            if outputs[0] != outputs[1]:
+                raise CommandError(f"{name}: the renderers produce different JSON")
+            body = outputs[0]
+
+            render_times = [
+                _best_cpu_time(lambda: renderer.render(data), repeat) * 1000
+                for renderer in renderers
+            ]
+            parse_times = [
+                _best_cpu_time(lambda: parser.parse(io.BytesIO(body)), repeat) * 1000
+                for parser in parsers
+            ]
+            self.stdout.write(
+                f"{name:<14}{len(body) / 1024:>7.0f}"
+                f"{render_times[0]:>12.2f}{render_times[1]:>12.2f}"
+                f"{parse_times[0]:>11.2f}{parse_times[1]:>12.2f}"
+            )
@@ -0,0 +1,73 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from hms.fastpath import ValuesRowSerializer
+from hms.views import FacilityListCreateView, PersonListCreateView
+
+VIEWS = {
+    "persons": PersonListCreateView,
+    "facilities": FacilityListCreateView,
+}
+
+
+def _best_cpu_time(function, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.process_time()
+        function()
+        elapsed = time.process_time() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the CPU time per row of rendering a list page with the "
+        "ModelSerializer and with the .values() fast path, and check that "
+        "both produce the same JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", type=int, default=100, help="Rows per page (default: 100)"
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Runs per measurement; the fastest is kept (default: 20)",
+        )
+
+    def handle(self, *args, **options):
+        rows, repeat = options["rows"], options["repeat"]
+        renderer = JSONRenderer()
+        self.stdout.write(
+            f"{'list':<12}{'rows':>6}{'serializer µs/row':>20}"
+            f"{'values µs/row':>16}{'saving':>9}"
+        )
+        for name, view_class in VIEWS.items():
+            queryset = view_class.queryset.order_by(*view_class.ordering)[:rows]
+            serializer_class = view_class.serializer_class
+            fast = ValuesRowSerializer.for_serializer(serializer_class())
+
+            def regular():
+                return serializer_class(queryset.all(), many=True).data
+
+            def values():
+                return fast.render(fast.values(queryset.all()))
+
+            if renderer.render(regular()) != renderer.render(values()):
+                raise CommandError(f"{name}: the two paths render different JSON")
+            count = queryset.count()
+            if not count:
+                self.stdout.write(f"{name:<12}{0:>6}  (no rows)")
+                continue
+
+            regular_time = _best_cpu_time(regular, repeat) / count * 1e6
+            values_time = _best_cpu_time(values, repeat) / count * 1e6
+            self.stdout.write(
+                f"{name:<12}{count:>6}{regular_time:>20.1f}{values_time:>16.1f}"
+                f"{1 - values_time / regular_time:>9.0%}"
+            )
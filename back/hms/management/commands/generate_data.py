@@ -0,0 +1,410 @@
+import os
+import random
+import signal
+import time
+from datetime import date
+from datetime import time as clock
+from datetime import timedelta
+from multiprocessing import Pool
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from hms.bulk import record_bulk_write
+from hms.models import (
+    Employee,
+    Employment,
+    Facility,
+    Infection,
+    InfectionType,
+    Person,
+    Schedule,
+    Vaccination,
+    VaccineType,
+)
+from hms.schema import create_tables, missing_tables
+
+# Generated keys start here; the numbers encode the row index, so they are
+# unique by construction
+SSN_BASE = 100_000_000
+PERSON_PHONE_BASE = 2_000_000_000
+FACILITY_PHONE_BASE = 1_000_000_000
+
+# Fixed reference date, so the same seed always gives the same rows
+EPOCH = date(2024, 1, 1)
+
+FIRST_NAMES = [
+    "Alice", "Amir", "Ana", "Benoit", "Camille", "Chloe", "David", "Emma",
+    "Fatima", "Felix", "Gabriel", "Hana", "Isaac", "Jade", "Julien", "Karim",
+    "Laura", "Leo", "Lina", "Louis", "Maya", "Mohamed", "Nathan", "Noah",
+    "Olivia", "Omar", "Priya", "Raphael", "Rosalie", "Samuel", "Sofia", "Thomas",
+    "Victoria", "William", "Yasmine", "Zoe",
+]  # fmt: skip
+LAST_NAMES = [
+    "Abbott", "Bouchard", "Chen", "Cote", "Diallo", "Dubois", "Fortin", "Gagnon",
+    "Garcia", "Girard", "Haddad", "Kim", "Lavoie", "Leblanc", "Lee", "Martin",
+    "Morin", "Nguyen", "Ouellet", "Patel", "Pelletier", "Roy", "Singh", "Smith",
+    "Tremblay", "Wong",
+]  # fmt: skip
+CITIZENSHIPS = ["Canadian", "Canadian", "Canadian", "French", "American", "Indian"]
+OCCUPATIONS = [
+    "Engineer", "Teacher", "Nurse", "Student", "Accountant", "Retired",
+    "Cashier", "Developer", "Electrician", "Lawyer", None,
+]  # fmt: skip
+CITIES = [
+    ("Montreal", "QC", "H"),
+    ("Laval", "QC", "H"),
+    ("Quebec", "QC", "G"),
+    ("Sherbrooke", "QC", "J"),
+    ("Toronto", "ON", "M"),
+    ("Ottawa", "ON", "K"),
+    ("Vancouver", "BC", "V"),
+    ("Calgary", "AB", "T"),
+]
+ROLES = [role for role, _ in Employee.ROLE_CHOICES]
+FACILITY_TYPES = [facility_type for facility_type, _ in Facility.TYPE_CHOICES]
+INFECTION_TYPES = ["COVID-19", "Influenza", "RSV", "Measles", "Strep throat"]
+VACCINE_TYPES = ["Pfizer", "Moderna", "AstraZeneca", "Novavax", "Influenza"]
+SHIFTS = [(clock(7), clock(15)), (clock(15), clock(23)), (clock(9), clock(17))]
+
+
+def _rng(plan, table, index):
+    """Random source of one generated entity, independent of chunking"""
+    return random.Random(f"{plan['seed']}:{table}:{index}")
+
+
+def employee_facility(plan, index):
+    """FID where employee ``index`` currently works; managers run their own"""
+    if index < plan["facilities"]:
+        return index + 1
+    return _rng(plan, "employee-facility", index).randrange(plan["facilities"]) + 1
+
+
+def person_rows(plan, start, stop):
+    for index in range(start, stop):
+        rng = _rng(plan, "persons", index)
+        first_name = rng.choice(FIRST_NAMES)
+        last_name = rng.choice(LAST_NAMES)
+        yield Person(
+            ssn=SSN_BASE + index,
+            medicare=f"GEN{index:09d}",
+            first_name=first_name,
+            last_name=last_name,
+            dob=EPOCH - timedelta(days=rng.randrange(365 * 95)),
+            telephone=str(PERSON_PHONE_BASE + index),
+            citizenship=rng.choice(CITIZENSHIPS),
+            email=f"{first_name}.{last_name}{index}@example.com".lower(),
+            occupation=rng.choice(OCCUPATIONS),
+        )
+
+
+def employee_rows(plan, start, stop):
+    for index in range(start, stop):
+        if index < plan["facilities"]:
+            role = "administrative personnel"
+        else:
+            role = _rng(plan, "employees", index).choice(ROLES)
+        yield Employee(ssn=SSN_BASE + index, role=role)
+
+
+def facility_rows(plan, start, stop):
+    for index in range(start, stop):
+        rng = _rng(plan, "facilities", index)
+        city, province, postal_prefix = rng.choice(CITIES)
+        facility_type = rng.choice(FACILITY_TYPES)
+        yield Facility(
+            fid=index + 1,
+            name=f"{city} {facility_type} {index + 1}",
+            address=f"{rng.randrange(1, 9999)} {rng.choice(LAST_NAMES)} Street",
+            city=city,
+            province=province,
+            postal_code=f"{postal_prefix}{rng.randrange(10)}"
+            f"{rng.choice('ABCEGHJKLMNPRSTVXY')}{rng.randrange(10)}"
+            f"{rng.choice('ABCEGHJKLMNPRSTVWXYZ')}{rng.randrange(10)}",
+            phone_number=str(FACILITY_PHONE_BASE + index),
+            web_address=f"https://facility{index + 1}.example.com",
+            type=facility_type,
+            capacity=rng.choice([None, rng.randrange(20, 2000)]),
+            # The first employees manage one facility each
+            gmssn=SSN_BASE + index,
+        )
+
+
+def employment_rows(plan, start, stop):
+    for index in range(start, stop):
+        rng = _rng(plan, "employments", index)
+        essn = SSN_BASE + index
+        started = EPOCH - timedelta(days=rng.randrange(30, 365 * 15))
+        if rng.random() < 0.3:
+            # An earlier, ended employment
+            previous_start = started - timedelta(days=rng.randrange(180, 365 * 5))
+            yield Employment(
+                essn=essn,
+                fid=rng.randrange(plan["facilities"]) + 1,
+                start_date=previous_start,
+                end_date=started - timedelta(days=1),
+            )
+        yield Employment(
+            essn=essn,
+            fid=employee_facility(plan, index),
+            start_date=started,
+            end_date=None,
+        )
+
+
+def schedule_rows(plan, start, stop):
+    for index in range(start, stop):
+        rng = _rng(plan, "schedules", index)
+        fid = employee_facility(plan, index)
+        for day in range(plan["schedule_days"]):
+            # About five shifts a week, at most one a day
+            if rng.random() < 2 / 7:
+                continue
+            start_time, end_time = rng.choice(SHIFTS)
+            yield Schedule(
+                essn=SSN_BASE + index,
+                fid=fid,
+                date=EPOCH + timedelta(days=day),
+                start_time=start_time,
+                end_time=end_time,
+            )
+
+
+def vaccination_rows(plan, start, stop):
+    type_ids = plan["vaccine_type_ids"]
+    for index in range(start, stop):
+        rng = _rng(plan, "vaccinations", index)
+        type_id = rng.choice(type_ids)
+        day = EPOCH - timedelta(days=rng.randrange(365 * 3))
+        for dose in range(1, rng.choice([0, 1, 2, 2, 3]) + 1):
+            yield Vaccination(
+                ssn=SSN_BASE + index,
+                type_id=type_id,
+                date=day,
+                no_of_dose=dose,
+                fid=rng.choice([None, rng.randrange(plan["facilities"]) + 1]),
+            )
+            day += timedelta(days=rng.randrange(21, 180))
+
+
+def infection_rows(plan, start, stop):
+    type_ids = plan["infection_type_ids"]
+    for index in range(start, stop):
+        rng = _rng(plan, "infections", index)
+        if rng.random() >= 0.2:
+            continue
+        day = EPOCH - timedelta(days=rng.randrange(365 * 4))
+        for _ in range(rng.choice([1, 1, 2])):
+            yield Infection(
+                ssn=SSN_BASE + index, date=day, type_id=rng.choice(type_ids)
+            )
+            day += timedelta(days=rng.randrange(30, 365))
+
+
+# (model, row generator, entity count the chunks run over), in the order the
+# tables reference each other
+TABLES = [
+    (Person, person_rows, "persons"),
+    (Employee, employee_rows, "employees"),
+    (Facility, facility_rows, "facilities"),
+    (Employment, employment_rows, "employees"),
+    (Schedule, schedule_rows, "employees"),
+    (Vaccination, vaccination_rows, "persons"),
+    (Infection, infection_rows, "persons"),
+]
+GENERATORS = {model._meta.db_table: generate for model, generate, _ in TABLES}
+MODELS = {model._meta.db_table: model for model, _, _ in TABLES}
+
+
+def _init_worker(alias):
+    # Ctrl-C is handled by the parent, which terminates the pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Workers started with "spawn" (macOS, Windows) begin unconfigured
+    django.setup()
+    if connections[alias].vendor == "sqlite":
+        # SQLite has one writer at a time; wait for it instead of failing
+        connections[alias].settings_dict["OPTIONS"]["timeout"] = 300
+
+
+def write_chunk(table, plan, start, stop):
+    """Generate and insert the rows of entities ``start..stop`` in one transaction"""
+    model = MODELS[table]
+    rows = list(GENERATORS[table](plan, start, stop))
+    alias = plan["database"]
+    with transaction.atomic(using=alias):
+        model.objects.using(alias).bulk_create(rows, batch_size=plan["batch_size"])
+    return len(rows)
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with deterministic synthetic persons, employees, "
+        "facilities, employments, schedules, vaccinations and infections, "
+        "inserted in parallel chunks. On SQLite the tables are created first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--persons",
+            type=int,
+            default=10000,
+            help="Persons to generate (default: 10000)",
+        )
+        parser.add_argument(
+            "--employees",
+            type=int,
+            help="Persons who are employees (default: a tenth of --persons, "
+            "at least 1)",
+        )
+        parser.add_argument(
+            "--facilities",
+            type=int,
+            help="Facilities, each managed by one employee "
+            "(default: one per 50 employees)",
+        )
+        parser.add_argument(
+            "--schedule-days",
+            type=int,
+            default=14,
+            help="Days of shifts per employee, from 2024-01-01 (default: 14)",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Random seed (default: 0)"
+        )
+        parser.add_argument(
+            "--database",
+            default="default",
+            help="Database alias to fill (default: default)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.BULK_BATCH_SIZE,
+            help=f"Rows per INSERT (default: {settings.BULK_BATCH_SIZE})",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=20000,
+            help="Persons or employees generated per transaction (default: 20000)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Processes generating and inserting chunks; 0 works in this "
+            "process (default: CPU count)",
+        )
+        parser.add_argument(
+            "--flush",
+            action="store_true",
+            help="Delete every existing row of the generated tables first",
+        )
+
+    def handle(self, *args, **options):
+        persons = options["persons"]
+        if persons < 1:
+            raise CommandError("--persons must be at least 1")
+        employees = options["employees"]
+        if employees is None:
+            # At least one employee to manage the facility
+            employees = max(persons // 10, 1)
+        facilities = options["facilities"]
+        if facilities is None:
+            facilities = max(employees // 50, 1)
+        if not 1 <= facilities <= employees <= persons:
+            raise CommandError(
+                "Need 1 <= facilities <= employees <= persons, since every "
+                "employee is a person and every facility has a manager"
+            )
+        if persons > PERSON_PHONE_BASE - FACILITY_PHONE_BASE:
+            raise CommandError("Too many persons for unique telephone numbers")
+        if options["batch_size"] < 1 or options["chunk_size"] < 1:
+            raise CommandError("--batch-size and --chunk-size must be positive")
+
+        alias = options["database"]
+        self.prepare_tables(alias, options["flush"])
+        plan = {
+            "seed": options["seed"],
+            "database": alias,
+            "batch_size": options["batch_size"],
+            "persons": persons,
+            "employees": employees,
+            "facilities": facilities,
+            "schedule_days": options["schedule_days"],
+            "infection_type_ids": self.reference_ids(
+                alias, InfectionType, INFECTION_TYPES
+            ),
+            "vaccine_type_ids": self.reference_ids(alias, VaccineType, VACCINE_TYPES),
+        }
+
+        started = time.monotonic()
+        total = 0
+        workers = options["workers"]
+        if workers < 1:
+            for model, _, count in TABLES:
+                total += self.fill(model, plan, count, options["chunk_size"], None)
+        else:
+            # Forked workers must not share this process's database sockets
+            connections.close_all()
+            with Pool(workers, initializer=_init_worker, initargs=(alias,)) as pool:
+                for model, _, count in TABLES:
+                    total += self.fill(model, plan, count, options["chunk_size"], pool)
+        elapsed = max(time.monotonic() - started, 1e-9)
+        self.stdout.write(
+            f"done: {total} rows in {elapsed:.1f}s ({total / elapsed:.0f} rows/sec)"
+        )
+
+    def prepare_tables(self, alias, flush):
+        connection = connections[alias]
+        missing = missing_tables(connection)
+        if missing and connection.vendor != "sqlite":
+            raise CommandError(
+                f"Table {missing[0]._meta.db_table} does not exist; create the "
+                "schema in docs/DATABASE_SCHEMA.md first"
+            )
+        created = create_tables(connection)
+        with connection.cursor() as cursor:
+            for model in MODELS.values():
+                if model in created:
+                    continue
+                if flush:
+                    table = connection.ops.quote_name(model._meta.db_table)
+                    cursor.execute(f"DELETE FROM {table}")
+                elif model.objects.using(alias).exists():
+                    raise CommandError(
+                        f"Table {model._meta.db_table} already has rows; generate "
+                        "into an empty database or pass --flush"
+                    )
+
+    def reference_ids(self, alias, model, names):
+        """IDs of the named type rows, created when missing"""
+        for name in names:
+            model.objects.using(alias).get_or_create(type_name=name)
+        return sorted(
+            model.objects.using(alias)
+            .filter(type_name__in=names)
+            .values_list("type_id", flat=True)
+        )
+
+    def fill(self, model, plan, count, chunk_size, pool):
+        table = model._meta.db_table
+        chunks = [
+            (table, plan, start, min(start + chunk_size, plan[count]))
+            for start in range(0, plan[count], chunk_size)
+        ]
+        started = time.monotonic()
+        if pool is None:
+            written = sum(write_chunk(*chunk) for chunk in chunks)
+        else:
+            # A table is complete before the tables referencing it start
+            written = sum(pool.starmap(write_chunk, chunks, chunksize=1))
+        record_bulk_write(model)
+        elapsed = max(time.monotonic() - started, 1e-9)
+        self.stdout.write(
+            f"{table}: {written} rows in {elapsed:.1f}s "
+            f"({written / elapsed:.0f} rows/sec)"
+        )
+        return written
@@ -0,0 +1,352 @@
+import csv
+import json
+import os
+import signal
+import time
+from collections import deque
+from functools import partial
+from multiprocessing import Pool
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connections, transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+
+from hms import jsoncodec
+from hms.bulk import (
+    CREATE,
+    UPSERT,
+    bulk_serializer_class,
+    existing_keys,
+    record_bulk_write,
+    row_key,
+    unique_errors,
+    write_rows,
+)
+from hms.scheduling import overlap_errors
+from hms.serializers import (
+    EmployeeSerializer,
+    EmploymentSerializer,
+    InfectionSerializer,
+    PersonSerializer,
+    ScheduleSerializer,
+    VaccinationSerializer,
+)
+
+RESOURCES = {
+    "persons": PersonSerializer,
+    "employees": EmployeeSerializer,
+    "infections": InfectionSerializer,
+    "vaccinations": VaccinationSerializer,
+    "employments": EmploymentSerializer,
+    "schedules": ScheduleSerializer,
+}
+
+# Checks of a whole batch against itself and stored rows, as
+# ``function(rows, using, labels)`` returning errors by position
+ROW_CHECKS = {"schedules": overlap_errors}
+
+_serializers = {}
+
+
+def _init_worker():
+    # Ctrl-C is handled by the parent, which terminates the pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Workers started with "spawn" (macOS, Windows) begin unconfigured
+    django.setup()
+
+
+def validate_records(resource, records):
+    """
+    Validate ``[(record_number, record), ...]`` with the resource's serializer.
+
+    Runs in the worker processes, so it only returns picklable values:
+    ``(valid, rejected)`` with ``valid`` as ``[(record_number, values)]``
+    and ``rejected`` as ``[(record_number, record, errors)]``.
+    """
+    serializer = _serializers.get(resource)
+    if serializer is None:
+        serializer = _serializers[resource] = bulk_serializer_class(
+            RESOURCES[resource]
+        )()
+    valid, rejected = [], []
+    for number, record in records:
+        if isinstance(record, str):
+            rejected.append((number, record, {"non_field_errors": ["Invalid JSON"]}))
+            continue
+        try:
+            valid.append((number, serializer.run_validation(record)))
+        except ValidationError as exc:
+            errors = json.loads(json.dumps(as_serializer_error(exc)))
+            rejected.append((number, record, errors))
+    return valid, rejected
+
+
+def read_records(path, file_format):
+    """Yield ``(record_number, record)`` from a CSV or NDJSON file, one line at a time"""
+    with open(path, newline="", encoding="utf-8") as source:
+        if file_format == "csv":
+            # CSV has no null: empty cells are missing values
+            for number, row in enumerate(csv.DictReader(source), start=1):
+                yield number, {
+                    key: (value if value != "" else None) for key, value in row.items()
+                }
+            return
+        number = 0
+        for line in source:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                yield number, jsoncodec.loads(line)
+            except ValueError:
+                # Rejected during validation, with the line as its data
+                yield number, line.rstrip("\n")
+
+
+def chunked(records, size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a CSV or NDJSON file into one table, validating records with "
+        "the API serializers in parallel and writing them in batches. An "
+        "interrupted import resumes from its checkpoint file when re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("resource", choices=sorted(RESOURCES))
+        parser.add_argument("path", help="CSV (with a header row) or NDJSON file")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "ndjson"],
+            help="File format (default: from the file extension)",
+        )
+        parser.add_argument(
+            "--mode",
+            choices=[UPSERT, CREATE],
+            default=UPSERT,
+            help="upsert: update records whose natural key exists (default); "
+            "create: reject them",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Records written per transaction (default: 1000)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Validation processes; 0 validates in this process "
+            "(default: CPU count)",
+        )
+        parser.add_argument(
+            "--rejects",
+            help="NDJSON file receiving rejected records and their errors "
+            "(default: <path>.rejects.ndjson)",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore the checkpoint of a previous run and start over",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not os.path.isfile(path):
+            raise CommandError(f"No such file: {path}")
+        file_format = options["format"] or (
+            "csv" if path.lower().endswith(".csv") else "ndjson"
+        )
+        resource = options["resource"]
+        self.model = RESOURCES[resource].Meta.model
+        # Rows taking another record's SSN, telephone, ... are rejected
+        # rather than left for the upsert to overwrite that record with
+        self.row_checks = [partial(unique_errors, self.model)]
+        if resource in ROW_CHECKS:
+            self.row_checks.append(ROW_CHECKS[resource])
+        self.mode = options["mode"]
+        self.batch_size = options["batch_size"]
+        if self.batch_size < 1:
+            raise CommandError("--batch-size must be positive")
+
+        self.checkpoint_path = f"{path}.checkpoint.json"
+        source = {
+            "resource": resource,
+            "size": os.path.getsize(path),
+            "mtime": os.path.getmtime(path),
+        }
+        done = 0 if options["restart"] else self.load_checkpoint(source)
+        if done:
+            self.stdout.write(f"Resuming after record {done}")
+
+        rejects_path = options["rejects"] or f"{path}.rejects.ndjson"
+        self.counts = {"created": 0, "updated": 0, "rejected": 0}
+        started = time.monotonic()
+        records = (
+            (number, record)
+            for number, record in read_records(path, file_format)
+            if number > done
+        )
+        with open(rejects_path, "a" if done else "w", encoding="utf-8") as rejects:
+            self.rejects = rejects
+            for last, valid, rejected in self.validated_batches(
+                resource, chunked(records, self.batch_size), options["workers"]
+            ):
+                for number, record, errors in rejected:
+                    self.reject(number, record, errors)
+                self.write_batch(valid)
+                record_bulk_write(self.model)
+                self.save_checkpoint(source, last)
+                if options["verbosity"] >= 2:
+                    self.report(started, f"through record {last}")
+
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        self.report(started, "done")
+        if self.counts["rejected"]:
+            self.stdout.write(f"Rejected records written to {rejects_path}")
+
+    def validated_batches(self, resource, chunks, workers):
+        """
+        Yield ``(last_record_number, valid, rejected)`` per chunk, in file order.
+
+        With workers, chunks are validated ahead of the writer but at most
+        ``2 * workers`` at a time, so memory stays bounded on any file size.
+        """
+        if workers < 1:
+            for chunk in chunks:
+                yield (chunk[-1][0], *validate_records(resource, chunk))
+            return
+
+        # Forked workers must not share this process's database sockets
+        connections.close_all()
+        with Pool(workers, initializer=_init_worker) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(
+                    (
+                        chunk[-1][0],
+                        pool.apply_async(validate_records, (resource, chunk)),
+                    )
+                )
+                if len(pending) >= 2 * workers:
+                    last, result = pending.popleft()
+                    yield (last, *result.get())
+            while pending:
+                last, result = pending.popleft()
+                yield (last, *result.get())
+
+    def write_batch(self, valid):
+        model = self.model
+        rows = {}
+        for number, values in valid:
+            key = row_key(model, values)
+            if key in rows and self.mode == CREATE:
+                self.reject(number, values, {"non_field_errors": ["Duplicate record"]})
+                continue
+            # A later record for the same key supersedes an earlier one
+            rows.pop(key, None)
+            rows[key] = (number, values)
+        if not rows:
+            return
+
+        using = model.objects.db
+        existing = existing_keys(model, rows, using=using)
+        if self.mode == CREATE:
+            for key in existing:
+                number, values = rows.pop(key)
+                self.reject(
+                    number, values, {"non_field_errors": ["Record already exists"]}
+                )
+        for check in self.row_checks:
+            keys = list(rows)
+            errors = check(
+                [rows[key][1] for key in keys],
+                using,
+                [f"record {rows[key][0]}" for key in keys],
+            )
+            for position, error in errors.items():
+                number, values = rows.pop(keys[position])
+                existing.discard(keys[position])
+                self.reject(number, values, error)
+        if not rows:
+            return
+
+        try:
+            with transaction.atomic(using=using):
+                write_rows(
+                    model,
+                    [model(**values) for _, values in rows.values()],
+                    self.mode,
+                    using,
+                    self.batch_size,
+                )
+        except DatabaseError:
+            # Another unique key or a bad value; find the offending rows
+            self.write_rows_one_by_one(rows, existing, using)
+            return
+        updated = len(existing) if self.mode == UPSERT else 0
+        self.counts["updated"] += updated
+        self.counts["created"] += len(rows) - updated
+
+    def write_rows_one_by_one(self, rows, existing, using):
+        model = self.model
+        for key, (number, values) in rows.items():
+            try:
+                with transaction.atomic(using=using):
+                    write_rows(model, [model(**values)], self.mode, using)
+            except DatabaseError as exc:
+                self.reject(number, values, {"non_field_errors": [str(exc)]})
+                continue
+            self.counts["updated" if key in existing else "created"] += 1
+
+    def reject(self, number, record, errors):
+        self.counts["rejected"] += 1
+        line = {"record": number, "data": record, "errors": errors}
+        self.rejects.write(json.dumps(line, default=str) + "\n")
+
+    def load_checkpoint(self, source):
+        """Number of records a previous run committed, or 0"""
+        try:
+            with open(self.checkpoint_path, encoding="utf-8") as checkpoint:
+                state = json.load(checkpoint)
+        except FileNotFoundError:
+            return 0
+        except ValueError:
+            raise CommandError(
+                f"Unreadable checkpoint {self.checkpoint_path}; use --restart"
+            )
+        if state.get("source") != source:
+            raise CommandError(
+                "The file changed since the interrupted import; use --restart "
+                "to import it from the beginning"
+            )
+        return state["records"]
+
+    def save_checkpoint(self, source, records):
+        # Replace atomically so an interruption never leaves a partial file
+        temporary = f"{self.checkpoint_path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as checkpoint:
+            json.dump({"source": source, "records": records}, checkpoint)
+        os.replace(temporary, self.checkpoint_path)
+
+    def report(self, started, label):
+        elapsed = max(time.monotonic() - started, 1e-9)
+        written = self.counts["created"] + self.counts["updated"]
+        self.stdout.write(
+            f"{label}: {self.counts['created']} created, "
+            f"{self.counts['updated']} updated, {self.counts['rejected']} rejected "
+            f"in {elapsed:.1f}s ({written / elapsed:.0f} rows/sec)"
+        )
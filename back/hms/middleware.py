@@ -0,0 +1,221 @@
+"""
+Per-request SQL instrumentation.
+
+Every query a request runs, including those of the async views' query
+threads, is timed and grouped by shape (its SQL with literals and IN lists
+collapsed). A shape repeated ``QUERY_N_PLUS_ONE_THRESHOLD`` times is the
+N+1 signature: it is logged with the view and the code that ran it, e.g. a
+serializer method. Responses carry a ``Server-Timing`` header with the db,
+serialize and render phases, and each endpoint's query count is checked
+against its budget in ``QUERY_BUDGETS``.
+"""
+
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+_collector = ContextVar("hms_query_collector", default=None)
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+_IGNORED_FILES = (os.path.abspath(__file__),)
+_IGNORED_DIRS = (os.path.join(_PACKAGE_DIR, "db") + os.sep,)
+
+_IN_LIST_RE = re.compile(r"\((?:%s|\?)(?:\s*,\s*(?:%s|\?))*\)")
+_NUMBER_RE = re.compile(r"\b\d+\b")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_shape(sql):
+    """The query with literal values and parameter lists collapsed"""
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    return _IN_LIST_RE.sub("(...)", sql)
+
+
+def _query_origin():
+    """``file:line in Class.method`` of the innermost project frame running a query"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if (
+            filename.startswith(_PACKAGE_DIR)
+            and filename not in _IGNORED_FILES
+            and not filename.startswith(_IGNORED_DIRS)
+        ):
+            name = frame.f_code.co_name
+            owner = frame.f_locals.get("self")
+            if owner is not None:
+                name = f"{type(owner).__name__}.{name}"
+            relative = os.path.relpath(filename, os.path.dirname(_PACKAGE_DIR[:-1]))
+            return f"{relative}:{frame.f_lineno} in {name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+class QueryCollector:
+    """Queries, DB time and repeated shapes of one request"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+        # shape -> where it was first repeated
+        self.origins = {}
+
+    def record(self, sql, duration):
+        shape = query_shape(sql)
+        with self._lock:
+            self.count += 1
+            self.duration += duration
+            self.shapes[shape] += 1
+            repeated = self.shapes[shape] == 2
+        if repeated:
+            origin = _query_origin()
+            with self._lock:
+                self.origins[shape] = origin
+
+    def repeated_shapes(self, threshold):
+        with self._lock:
+            return [
+                (shape, count, self.origins.get(shape, "unknown"))
+                for shape, count in self.shapes.most_common()
+                if count >= threshold
+            ]
+
+
+def _instrument(execute, sql, params, many, context):
+    collector = _collector.get()
+    if collector is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        collector.record(sql, time.perf_counter() - started)
+
+
+def _install(connection):
+    if _instrument not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_instrument)
+
+
+def _install_on_connect(sender, connection, **kwargs):
+    _install(connection)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Count each request's queries and DB time, add a ``Server-Timing`` header
+    (with DEBUG on, or for staff users) and report N+1 query patterns and
+    exceeded query budgets.
+
+    Place it last in ``MIDDLEWARE`` so the phases cover only the view and
+    its rendering.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        connection_created.connect(_install_on_connect)
+
+    def __call__(self, request):
+        if not settings.QUERY_INSTRUMENTATION:
+            return self.get_response(request)
+        for connection in connections.all(initialized_only=True):
+            _install(connection)
+
+        # Also read by the endpoint benchmarks (bench_endpoints)
+        request.query_collector = collector = QueryCollector()
+        token = _collector.set(collector)
+        request._query_timing = {}
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _collector.reset(token)
+        finished = time.perf_counter()
+
+        timing = request._query_timing
+        view_started = timing.get("view_started", started)
+        view_finished = timing.get("view_finished", finished)
+        db = timing.get("view_db", collector.duration)
+        if self.shows_timing(request):
+            response["Server-Timing"] = ", ".join(
+                [
+                    f'db;dur={db * 1000:.1f};desc="{collector.count} queries"',
+                    f"serialize;dur={max(view_finished - view_started - db, 0) * 1000:.1f}",
+                    f"render;dur={(finished - view_finished) * 1000:.1f}",
+                    f"total;dur={(finished - started) * 1000:.1f}",
+                ]
+            )
+        self.report(request, collector)
+        return response
+
+    @staticmethod
+    def shows_timing(request):
+        """Timings reveal how the data is stored, so only to staff in production"""
+        if settings.DEBUG:
+            return True
+        # REST framework sets the user it authenticated on the request too
+        user = getattr(request, "user", None)
+        return bool(user is not None and user.is_staff)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timing = getattr(request, "_query_timing", None)
+        if timing is not None:
+            view = getattr(view_func, "view_class", view_func)
+            timing["view"] = f"{view.__module__}.{view.__qualname__}"
+            timing["view_started"] = time.perf_counter()
+        return None
+
+    def process_template_response(self, request, response):
+        # Called after the view and before its response is rendered
+        timing = getattr(request, "_query_timing", None)
+        collector = _collector.get()
+        if timing is not None and collector is not None:
+            timing["view_finished"] = time.perf_counter()
+            timing["view_db"] = collector.duration
+        return response
+
+    def report(self, request, collector):
+        match = request.resolver_match
+        endpoint = match.view_name if match else request.path
+        view = request._query_timing.get("view", endpoint)
+        for shape, count, origin in collector.repeated_shapes(
+            settings.QUERY_N_PLUS_ONE_THRESHOLD
+        ):
+            logger.warning(
+                "Possible N+1 queries in %s %s (%s): %d x %s, from %s",
+                request.method,
+                request.path,
+                view,
+                count,
+                shape,
+                origin,
+            )
+
+        budget = settings.QUERY_BUDGETS.get(endpoint, settings.QUERY_BUDGET_DEFAULT)
+        if budget is None or collector.count <= budget:
+            return
+        message = (
+            f"{request.method} {request.path} ({view}) ran {collector.count} "
+            f"queries, over the {endpoint} budget of {budget}"
+        )
+        if settings.QUERY_BUDGET_ACTION == "raise":
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -0,0 +1,157 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework.exceptions import ValidationError
+
+from .caching import table_versions, versions_shared
+from .loaders import column_relations
+from .routers import use_primary_if_changed
+
+
+def request_etag(request, *versions):
+    """
+    Entity tag of a response derived from data at ``versions``; the body also
+    depends on the URL and the negotiated renderer
+    """
+    key = "|".join(
+        [request.get_full_path(), request.META.get("HTTP_ACCEPT", "")]
+        + [str(version) for version in versions]
+    )
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+class ConditionalGetMixin:
+    """
+    Answer ``If-None-Match`` / ``If-Modified-Since`` before running a GET.
+
+    The validators come from the change versions of every table the
+    response reads: the view's model plus the relations and reference
+    tables its serializer declares. Checking them is a single cache
+    lookup, so an unchanged resource returns 304 without touching the
+    database or the serializer.
+
+    Safe requests may read from a replica (see ``routers``), except right
+    after a write to one of those tables, when a replica could still return
+    data older than the version in the ETag. No validators are sent while
+    the versions are not shared between workers (``versions_shared``).
+    """
+
+    replica_reads = True
+
+    def get_validator_models(self):
+        model = self.queryset.model
+        serializer_class = self.get_serializer_class()
+        models = {model, *getattr(serializer_class, "reference_models", ())}
+        for path in getattr(serializer_class, "batched_relations", ()):
+            related = model
+            for name in path.split("__"):
+                related = related._meta.get_field(name).related_model
+                models.add(related)
+        return sorted(models, key=lambda m: m._meta.db_table)
+
+    def get(self, request, *args, **kwargs):
+        versions = table_versions(*self.get_validator_models())
+        use_primary_if_changed(versions)
+        if not versions_shared():
+            # Another worker's write would not change this process's ETag
+            response = super().get(request, *args, **kwargs)
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        etag = quote_etag(request_etag(request, *versions))
+        last_modified = max(versions) // 1_000_000
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code == 200:
+                response["ETag"] = etag
+                response["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class SparseFieldsMixin:
+    """
+    Let GET requests pick response fields with ``?fields=a,b`` or ``?omit=c``.
+
+    Dropped method fields are never computed. The queryset is narrowed with
+    ``.only()`` to the columns the remaining fields read (including those
+    listed in the serializer's ``method_field_columns``), and relations no
+    remaining field reads are no longer joined.
+    """
+
+    fields_query_param = "fields"
+    omit_query_param = "omit"
+
+    def get_sparse_fields(self):
+        """Names of the fields to render, or None to render them all"""
+        if not hasattr(self, "_sparse_fields"):
+            self._sparse_fields = self._parse_sparse_fields()
+        return self._sparse_fields
+
+    def _parse_sparse_fields(self):
+        if self.request.method not in ("GET", "HEAD"):
+            return None
+        params = self.request.query_params
+        fields = _split_names(params.get(self.fields_query_param))
+        omit = _split_names(params.get(self.omit_query_param))
+        if not fields and not omit:
+            return None
+
+        available = list(self.get_serializer_class()().fields)
+        unknown = [name for name in fields + omit if name not in available]
+        if unknown:
+            raise ValidationError({"fields": [f"Unknown field: {unknown[0]}"]})
+        return [
+            name
+            for name in available
+            if (not fields or name in fields) and name not in omit
+        ]
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        names = self.get_sparse_fields()
+        if names is not None:
+            target = getattr(serializer, "child", serializer)
+            for name in list(target.fields):
+                if name not in names:
+                    del target.fields[name]
+        return serializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        names = self.get_sparse_fields()
+        if names is None:
+            return queryset
+
+        model = queryset.model
+        model_fields = {field.name for field in model._meta.concrete_fields}
+        method_columns = getattr(
+            self.get_serializer_class(), "method_field_columns", {}
+        )
+        # Keyset pagination and exports read the cursor columns of each row
+        columns = {model._meta.pk.name}
+        columns.update(
+            name.lstrip("-") for name in getattr(self, "cursor_ordering", ())
+        )
+        for name in names:
+            if name in model_fields:
+                columns.add(name)
+            elif name in method_columns:
+                columns.update(method_columns[name])
+            else:
+                # A field reading columns we don't know about
+                return queryset
+
+        queryset = queryset.select_related(None)
+        relations = column_relations(columns)
+        if relations:
+            queryset = queryset.select_related(*relations)
+        return queryset.only(*columns)
+
+
+def _split_names(value):
+    return [name.strip() for name in value.split(",") if name.strip()] if value else []
@@ -1,7 +1,47 @@
 from django.db import models
 
 
-class Person(models.Model):
+def soft_relation(to, from_field, to_field, related_name):
+    """
+    Many-to-one relation over an existing integer column.
+
+    The legacy tables link rows through plain SSN/FID/TypeID columns with no
+    usable foreign keys, so the relation is declared as a ``ForeignObject``
+    reusing that column: it adds no column or constraint, keeps the raw key
+    in the API output, and lets the ORM join, filter and order across it.
+    A dangling key resolves to ``None``.
+    """
+    return models.ForeignObject(
+        to,
+        on_delete=models.DO_NOTHING,
+        from_fields=[from_field],
+        to_fields=[to_field],
+        related_name=related_name,
+        null=True,
+        serialize=False,
+    )
+
+
+class TrackedColumnsMixin:
+    """
+    Remember the values of ``tracked_columns`` an instance was loaded with,
+    so a save can tell which of them actually changed.
+    """
+
+    tracked_columns = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value
+            for name, value in zip(field_names, values)
+            if name in cls.tracked_columns
+        }
+        return instance
+
+
+class Person(TrackedColumnsMixin, models.Model):
     # SSN as IntegerField to match MySQL INT type (unique but not primary key)
     ssn = models.IntegerField(unique=True, null=True, blank=True, db_column="SSN")
 
@@ -29,6 +69,9 @@ class Person(models.Model):
         max_length=30, null=True, blank=True, db_column="Occupation"
     )
 
+    # Filter option columns, see hms.views.person_filter_options
+    tracked_columns = ("citizenship", "occupation")
+
     class Meta:
         db_table = "Persons"  # Use existing MySQL table name
         managed = False  # Don't let Django manage this table (since it exists)
@@ -37,7 +80,7 @@ class Person(models.Model):
         return f"{self.first_name} {self.last_name}"
 
 
-class Employee(models.Model):
+class Employee(TrackedColumnsMixin, models.Model):
     ROLE_CHOICES = [
         ("nurse", "Nurse"),
         ("doctor", "Doctor"),
@@ -53,6 +96,11 @@ class Employee(models.Model):
     ssn = models.IntegerField(primary_key=True, db_column="SSN")
     role = models.CharField(max_length=50, choices=ROLE_CHOICES, db_column="Role")
 
+    person = soft_relation(Person, "ssn", "ssn", related_name="employees")
+
+    # Filter option columns, see hms.views.employee_filter_options
+    tracked_columns = ("role",)
+
     class Meta:
         db_table = "Employees"
         managed = False
@@ -60,14 +108,6 @@ class Employee(models.Model):
     def __str__(self):
         return f"Employee {self.ssn} - {self.role}"
 
-    @property
-    def person(self):
-        """Get the related person data"""
-        try:
-            return Person.objects.get(ssn=self.ssn)
-        except Person.DoesNotExist:
-            return None
-
 
 class Facility(models.Model):
     TYPE_CHOICES = [
@@ -90,6 +130,10 @@ class Facility(models.Model):
     capacity = models.IntegerField(null=True, blank=True, db_column="Capacity")
     gmssn = models.IntegerField(unique=True, db_column="GMSSN")  # General Manager SSN
 
+    general_manager = soft_relation(
+        Person, "gmssn", "ssn", related_name="managed_facilities"
+    )
+
     class Meta:
         db_table = "Facilities"
         managed = False
@@ -97,14 +141,6 @@ class Facility(models.Model):
     def __str__(self):
         return f"{self.name} ({self.type})"
 
-    @property
-    def general_manager(self):
-        """Get the general manager person data"""
-        try:
-            return Person.objects.get(ssn=self.gmssn)
-        except Person.DoesNotExist:
-            return None
-
 
 class Residence(models.Model):
     TYPE_CHOICES = [
@@ -149,6 +185,11 @@ class Infection(models.Model):
     date = models.DateField(db_column="Date")
     type_id = models.IntegerField(db_column="TypeID")
 
+    person = soft_relation(Person, "ssn", "ssn", related_name="infections")
+    infection_type = soft_relation(
+        InfectionType, "type_id", "type_id", related_name="infections"
+    )
+
     class Meta:
         db_table = "Infections"
         managed = False
@@ -157,22 +198,6 @@ class Infection(models.Model):
     def __str__(self):
         return f"Infection {self.type_id} - {self.date}"
 
-    @property
-    def person(self):
-        """Get the related person data"""
-        try:
-            return Person.objects.get(ssn=self.ssn)
-        except Person.DoesNotExist:
-            return None
-
-    @property
-    def infection_type(self):
-        """Get the infection type"""
-        try:
-            return InfectionType.objects.get(type_id=self.type_id)
-        except InfectionType.DoesNotExist:
-            return None
-
 
 class VaccineType(models.Model):
     type_id = models.AutoField(primary_key=True, db_column="TypeID")
@@ -193,6 +218,13 @@ class Vaccination(models.Model):
     no_of_dose = models.IntegerField(null=True, blank=True, db_column="NoOfDose")
     fid = models.IntegerField(null=True, blank=True, db_column="FID")
 
+    person = soft_relation(Person, "ssn", "ssn", related_name="vaccinations")
+    vaccine_type = soft_relation(
+        VaccineType, "type_id", "type_id", related_name="vaccinations"
+    )
+    # Facility where the vaccination was administered
+    facility = soft_relation(Facility, "fid", "fid", related_name="vaccinations")
+
     class Meta:
         db_table = "Vaccinations"
         managed = False
@@ -201,30 +233,6 @@ class Vaccination(models.Model):
     def __str__(self):
         return f"Vaccination {self.type_id} - {self.date}"
 
-    @property
-    def person(self):
-        """Get the related person data"""
-        try:
-            return Person.objects.get(ssn=self.ssn)
-        except Person.DoesNotExist:
-            return None
-
-    @property
-    def vaccine_type(self):
-        """Get the vaccine type"""
-        try:
-            return VaccineType.objects.get(type_id=self.type_id)
-        except VaccineType.DoesNotExist:
-            return None
-
-    @property
-    def facility(self):
-        """Get the facility where vaccination was administered"""
-        try:
-            return Facility.objects.get(fid=self.fid)
-        except Facility.DoesNotExist:
-            return None
-
 
 class Employment(models.Model):
     essn = models.IntegerField(db_column="ESSN", primary_key=True)
@@ -232,6 +240,9 @@ class Employment(models.Model):
     start_date = models.DateField(db_column="StartDate")
     end_date = models.DateField(null=True, blank=True, db_column="EndDate")
 
+    employee = soft_relation(Employee, "essn", "ssn", related_name="employments")
+    facility = soft_relation(Facility, "fid", "fid", related_name="employments")
+
     class Meta:
         db_table = "Employments"
         managed = False
@@ -240,22 +251,6 @@ class Employment(models.Model):
     def __str__(self):
         return f"Employment {self.essn} at {self.fid}"
 
-    @property
-    def employee(self):
-        """Get the employee data"""
-        try:
-            return Employee.objects.get(ssn=self.essn)
-        except Employee.DoesNotExist:
-            return None
-
-    @property
-    def facility(self):
-        """Get the facility data"""
-        try:
-            return Facility.objects.get(fid=self.fid)
-        except Facility.DoesNotExist:
-            return None
-
 
 class Schedule(models.Model):
     essn = models.IntegerField(db_column="ESSN", primary_key=True)
@@ -264,6 +259,9 @@ class Schedule(models.Model):
     start_time = models.TimeField(db_column="StartTime")
     end_time = models.TimeField(null=True, blank=True, db_column="EndTime")
 
+    employee = soft_relation(Employee, "essn", "ssn", related_name="schedules")
+    facility = soft_relation(Facility, "fid", "fid", related_name="schedules")
+
     class Meta:
         db_table = "Schedules"
         managed = False
@@ -271,19 +269,3 @@ class Schedule(models.Model):
 
     def __str__(self):
         return f"Schedule {self.essn} - {self.date}"
-
-    @property
-    def employee(self):
-        """Get the employee data"""
-        try:
-            return Employee.objects.get(ssn=self.essn)
-        except Employee.DoesNotExist:
-            return None
-
-    @property
-    def facility(self):
-        """Get the facility data"""
-        try:
-            return Facility.objects.get(fid=self.fid)
-        except Facility.DoesNotExist:
-            return None
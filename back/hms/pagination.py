@@ -1,7 +1,291 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+import sys
+from collections import OrderedDict
+from types import SimpleNamespace
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def seek_filter(ordering, position, nullable=()):
+    """
+    Rows after ``position`` in ``ordering``, i.e. the row-value comparison
+    ``(a, b, c) > (x, y, z)`` written as a Q
+
+    Names in ``nullable`` may hold NULL, which MySQL and SQLite sort before
+    every value ascending and after every value descending.
+    """
+    condition = Q()
+    equal = Q()
+    for name, value in zip(ordering, position):
+        field = name.lstrip("-")
+        descending = name.startswith("-")
+        if value is None:
+            if not descending:
+                condition |= equal & Q(**{f"{field}__isnull": False})
+            equal &= Q(**{f"{field}__isnull": True})
+            continue
+        after = Q(**{f"{field}__{'lt' if descending else 'gt'}": value})
+        if descending and field in nullable:
+            after |= Q(**{f"{field}__isnull": True})
+        condition |= equal & after
+        equal &= Q(**{field: value})
+    return condition
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over a view's ``cursor_ordering``.
+
+    ``cursor_ordering`` must end in a unique key so every row has a distinct
+    position. Pages are fetched with ``WHERE (key) > (last key) LIMIT n``
+    instead of an OFFSET, and no COUNT(*) is run, so the last page costs
+    the same as the first. Cursors are opaque base64 tokens.
+    """
+
+    cursor_query_param = "cursor"
+    page_size = 20
+    page_size_query_param = "page_size"
+    # Deep pages are cheap here, so bulk sync clients may fetch more per call
+    max_page_size = 1000
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = list(view.cursor_ordering)
+        self.fields = [
+            queryset.model._meta.get_field(name.lstrip("-")) for name in self.ordering
+        ]
+        page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [self._flip(name) for name in ordering]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(seek_filter(ordering, position))
+
+        rows = list(queryset[: page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = position is not None, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+
+        self.next_position = self._position(rows[-1]) if rows and has_next else None
+        self.previous_position = (
+            self._position(rows[0]) if rows and has_previous else None
+        )
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def encode_cursor(self, position, reverse):
+        payload = {"p": position}
+        if reverse:
+            payload["r"] = 1
+        token = base64.urlsafe_b64encode(
+            json.dumps(payload, separators=(",", ":")).encode()
+        ).decode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        """Return ``(position, reverse)``; an empty cursor is the first page"""
+        token = request.query_params.get(self.cursor_query_param, "")
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+            raw = payload["p"]
+            if len(raw) != len(self.fields):
+                raise ValueError
+            position = [
+                field.to_python(value) for field, value in zip(self.fields, raw)
+            ]
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, bool(payload.get("r"))
+
+    def _position(self, row):
+        if isinstance(row, dict):
+            # A .values() row, see hms.fastpath
+            row = SimpleNamespace(**row)
+        return [field.value_to_string(row) for field in self.fields]
+
+    @staticmethod
+    def _flip(name):
+        return name[1:] if name.startswith("-") else f"-{name}"
 
 
 class CustomPageNumberPagination(PageNumberPagination):
     page_size = 20  # Default page size
     page_size_query_param = "page_size"  # Allow client to set page size
     max_page_size = 100  # Maximum allowed page size
+
+    # Views declaring ``cursor_ordering`` also accept ``?cursor=`` (empty for
+    # the first page) to switch to keyset pagination
+    cursor_query_param = KeysetPagination.cursor_query_param
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.cursor_query_param in request.query_params and getattr(
+            view, "cursor_ordering", None
+        ):
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+def estimated_table_rows(queryset):
+    """
+    Row estimate for the queryset's table from the database statistics, or
+    None when the backend keeps no such estimate.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "mysql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return row[0] if row and row[0] is not None else None
+
+
+class EstimatedCountPage(Page):
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that avoids an exact COUNT(*) over large tables.
+
+    Unfiltered querysets take the row estimate from the table statistics
+    once it reaches ``exact_count_threshold``; filtered ones count at most
+    ``count_cap`` rows. Small results are still counted exactly, and
+    ``count_exact`` tells which case applied.
+    """
+
+    exact_count_threshold = 10000
+    count_cap = 10000
+
+    @cached_property
+    def _count(self):
+        """``(count, exact)``"""
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_table_rows(queryset)
+            if estimate is not None and estimate >= self.exact_count_threshold:
+                return estimate, False
+            return queryset.count(), True
+        count = queryset[: self.count_cap + 1].count()
+        if count > self.count_cap:
+            return self.count_cap, False
+        return count, True
+
+    @property
+    def count(self):
+        return self._count[0]
+
+    @property
+    def count_exact(self):
+        return self._count[1]
+
+    @cached_property
+    def num_pages(self):
+        if self.count_exact:
+            return super().num_pages
+        # An inexact count cannot bound the page number, page() finds the end
+        return sys.maxsize
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if self.count_exact:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom : bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(_("That page contains no results"))
+        has_next = len(rows) > self.per_page
+        return EstimatedCountPage(rows[: self.per_page], number, self, has_next)
+
+
+class EstimatedCountPagination(CustomPageNumberPagination):
+    """Page-number pagination for huge tables, see ``EstimatedCountPaginator``"""
+
+    django_paginator_class = EstimatedCountPaginator
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.keyset is None:
+            response.data["count_exact"] = self.page.paginator.count_exact
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count_exact"] = {"type": "boolean"}
+        return response_schema
@@ -0,0 +1,56 @@
+import codecs
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+from . import jsoncodec
+
+
+def _is_utf8(encoding):
+    try:
+        return codecs.lookup(encoding).name == "utf-8"
+    except LookupError:
+        return False
+
+
+class FastJSONParser(JSONParser):
+    """``JSONParser`` decoding with orjson when it is installed"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if not jsoncodec.HAS_ORJSON or not _is_utf8(encoding):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return jsoncodec.loads(stream.read())
+        except ValueError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parse a newline-delimited JSON body into a list with one item per line.
+
+    Blank lines are skipped. The body is read line by line, so large
+    uploads are never held in memory as a single string.
+    """
+
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        utf8 = _is_utf8(encoding)
+        items = []
+        for number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                if not utf8:
+                    line = line.decode(encoding).encode()
+                items.append(jsoncodec.loads(line))
+            except ValueError as exc:
+                raise ParseError(f"NDJSON parse error on line {number} - {exc}")
+        return items
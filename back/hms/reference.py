@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from .caching import table_versions
+from .models import Facility, InfectionType, VaccineType
+
+_MISSING = object()
+
+
+class ReferenceCache:
+    """
+    Process-wide ``key -> value`` map for one small, rarely changing table.
+
+    The whole table is loaded in one query and served from memory. Every
+    ``check_interval`` seconds a lookup compares the table version with the
+    one it loaded (a cache read, no SQL) and reloads on a change; writes in
+    this process invalidate it immediately through ``invalidate()``.
+
+    Memory is bounded by ``max_entries``: a larger table keeps the most
+    recently used entries and loads the others one key at a time.
+    """
+
+    def __init__(self, model, value_field, max_entries=None, check_interval=1.0):
+        self.model = model
+        self.value_field = value_field
+        self.max_entries = max_entries or settings.REFERENCE_CACHE_MAX_ENTRIES
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._values = OrderedDict()
+        self._complete = False
+        self._version = None
+        self._checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        if key is None:
+            return default
+        self._refresh_if_stale()
+        with self._lock:
+            value = self._values.get(key, _MISSING)
+            if value is not _MISSING or self._complete:
+                self.hits += 1
+                if value is _MISSING:
+                    return default
+                self._values.move_to_end(key)
+                return default if value is None else value
+            self.misses += 1
+
+        # Only reached when the table outgrew max_entries
+        value = (
+            self.model.objects.using(DEFAULT_DB_ALIAS)
+            .filter(pk=key)
+            .values_list(self.value_field, flat=True)
+            .first()
+        )
+        with self._lock:
+            self._store(key, value)
+        return default if value is None else value
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "table": self.model._meta.db_table,
+                "entries": len(self._values),
+                "max_entries": self.max_entries,
+                "complete": self._complete,
+                "hits": self.hits,
+                "misses": self.misses,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
+
+    def _refresh_if_stale(self):
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.check_interval:
+            return
+        (version,) = table_versions(self.model)
+        self._checked_at = now
+        if version == self._version:
+            return
+        pk_name = self.model._meta.pk.name
+        # Read from the primary: a lagging replica would store stale names
+        # under the new version
+        rows = self.model.objects.using(DEFAULT_DB_ALIAS).order_by(pk_name)
+        rows = list(rows.values_list(pk_name, self.value_field)[: self.max_entries + 1])
+        with self._lock:
+            self._complete = len(rows) <= self.max_entries
+            self._values = OrderedDict(rows[: self.max_entries])
+            self._version = version
+            self.loads += 1
+
+    def _store(self, key, value):
+        self._values[key] = value
+        self._values.move_to_end(key)
+        while len(self._values) > self.max_entries:
+            self._values.popitem(last=False)
+            self.evictions += 1
+
+
+infection_type_names = ReferenceCache(InfectionType, "type_name")
+vaccine_type_names = ReferenceCache(VaccineType, "type_name")
+facility_names = ReferenceCache(Facility, "name")
+
+REFERENCE_CACHES = {
+    InfectionType: infection_type_names,
+    VaccineType: vaccine_type_names,
+    Facility: facility_names,
+}
+
+
+def invalidate_reference_cache(sender, **kwargs):
+    REFERENCE_CACHES[sender].invalidate()
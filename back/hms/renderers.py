@@ -0,0 +1,19 @@
+from rest_framework.renderers import JSONRenderer
+
+from . import jsoncodec
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    ``JSONRenderer`` encoding with orjson when it is installed.
+
+    The output is byte-for-byte the same; requests for indented output
+    (``Accept: application/json; indent=4``) use the stdlib encoder.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return jsoncodec.dumps(data)
@@ -0,0 +1,171 @@
+"""
+Read-replica routing.
+
+Safe requests to views marked with ``replica_reads`` read from one of the
+``DATABASE_REPLICAS`` aliases; everything else, and every write, uses the
+primary (``default``). A replica may lag behind the primary by up to
+``REPLICA_MAX_LAG`` seconds, so reads that could observe that lag go to the
+primary instead:
+
+* a client that wrote within that window (tracked by a short-lived cookie),
+  so it always reads its own writes;
+* responses cached or validated against table versions written within that
+  window (see ``use_primary_if_changed``), so stale data is never cached
+  under a fresh version.
+
+A replica that fails to connect, or fails a query while a view runs, is
+skipped for ``REPLICA_RETRY_AFTER`` seconds and its reads fall back to
+another replica or the primary; a view that failed on a replica is run
+again. A streaming response that fails after its first bytes were sent
+cannot be retried.
+"""
+
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, OperationalError, connections
+
+logger = logging.getLogger(__name__)
+
+STICKY_COOKIE = "hms_primary"
+
+# Where the current request's reads go: None for the primary, ANY_REPLICA
+# until the first read picks one, then that replica's alias
+_read_alias = ContextVar("hms_read_alias", default=None)
+ANY_REPLICA = object()
+
+_failed_until = {}
+_failed_lock = threading.Lock()
+
+
+def use_primary():
+    """Send the current request's remaining reads to the primary"""
+    _read_alias.set(None)
+
+
+def use_primary_if_changed(versions):
+    """
+    Send the current request's reads to the primary when a table version
+    (microseconds, see ``caching.table_versions``) is recent enough that a
+    replica may not have that write yet
+    """
+    if _read_alias.get() is None:
+        return
+    horizon = (time.time() - settings.REPLICA_MAX_LAG) * 1_000_000
+    if any(version > horizon for version in versions):
+        use_primary()
+
+
+def replica_reads(view):
+    """Mark a view whose safe requests may read from a replica"""
+    view.replica_reads = True
+    return view
+
+
+def mark_replica_failed(alias):
+    with _failed_lock:
+        _failed_until[alias] = time.monotonic() + settings.REPLICA_RETRY_AFTER
+    logger.warning(
+        "Database replica %s is unavailable; reading from the primary or another "
+        "replica for %ss",
+        alias,
+        settings.REPLICA_RETRY_AFTER,
+    )
+
+
+def available_replicas():
+    now = time.monotonic()
+    with _failed_lock:
+        return [
+            alias
+            for alias in settings.DATABASE_REPLICAS
+            if _failed_until.get(alias, 0) <= now
+        ]
+
+
+def choose_replica():
+    """A connected replica alias, or None when none is reachable"""
+    replicas = available_replicas()
+    random.shuffle(replicas)
+    for alias in replicas:
+        try:
+            connections[alias].ensure_connection()
+        except DatabaseError:
+            mark_replica_failed(alias)
+        else:
+            return alias
+    return None
+
+
+class ReplicaRouter:
+    """Route reads to the current request's replica and writes to the primary"""
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is ANY_REPLICA:
+            alias = choose_replica()
+            _read_alias.set(alias)
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Choose the database for each request's reads and keep clients that
+    write on the primary for ``REPLICA_MAX_LAG`` seconds.
+    """
+
+    safe_methods = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        use_primary()
+        response = self.get_response(request)
+        if request.method not in self.safe_methods and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                STICKY_COOKIE,
+                "1",
+                max_age=settings.REPLICA_MAX_LAG,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, "view_class", view_func)
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method in self.safe_methods
+            and getattr(view, "replica_reads", False)
+            and STICKY_COOKIE not in request.COOKIES
+        ):
+            _read_alias.set(ANY_REPLICA)
+        return None
+
+    def process_exception(self, request, exception):
+        alias = _read_alias.get()
+        if alias not in settings.DATABASE_REPLICAS or not isinstance(
+            exception, OperationalError
+        ):
+            return None
+        mark_replica_failed(alias)
+        # Only safe requests read from replicas, so running the view again
+        # repeats nothing; it reads from another replica or the primary
+        return self.get_response(request)
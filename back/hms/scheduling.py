@@ -0,0 +1,227 @@
+"""
+Shift overlap detection.
+
+A shift runs from ``StartTime`` on its ``Date`` to ``EndTime``: on the next
+day when ``EndTime`` is not after ``StartTime`` (a night shift), and until
+midnight when there is no ``EndTime``. No shift is longer than a day, so
+only shifts starting less than a day before a shift can overlap it. Stored
+shifts are read with one range per employee on the (ESSN, Date, StartTime)
+index (see docs/DATABASE_SCHEMA.md) and each shift is checked by bisecting
+its employee's shifts sorted by start.
+
+Writes are checked before they run, so two concurrent requests can still
+book the same employee twice; ``find_conflicts`` lists such cases.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, namedtuple
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.exceptions import ValidationError
+
+from .models import Schedule
+from .reference import facility_names
+
+DAY = timedelta(days=1)
+
+# Longest date range find_conflicts accepts
+MAX_CONFLICT_RANGE = timedelta(days=366)
+
+SHIFT_FIELDS = ("essn", "fid", "date", "start_time", "end_time")
+
+
+class Shift(namedtuple("Shift", SHIFT_FIELDS + ("item",))):
+    """A schedule row; ``item`` is its position in a batch, None when stored"""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_values(cls, values, item=None):
+        return cls(*(values.get(name) for name in SHIFT_FIELDS), item)
+
+    @property
+    def key(self):
+        return (self.essn, self.fid, self.date, self.start_time)
+
+    @property
+    def begin(self):
+        return datetime.combine(self.date, self.start_time)
+
+    @property
+    def end(self):
+        if self.end_time is None:
+            return datetime.combine(self.date + DAY, time())
+        end = datetime.combine(self.date, self.end_time)
+        return end if self.end_time > self.start_time else end + DAY
+
+    def overlaps(self, other):
+        return self.begin < other.end and other.begin < self.end
+
+    def describe(self):
+        end = self.end_time.strftime("%H:%M") if self.end_time else "midnight"
+        return (
+            f"{facility_names.get(self.fid, f'facility {self.fid}')} on "
+            f"{self.date.isoformat()}, {self.start_time.strftime('%H:%M')}-{end}"
+        )
+
+    def as_dict(self):
+        return {
+            "fid": self.fid,
+            "facility_name": facility_names.get(self.fid, "Unknown"),
+            "date": self.date.isoformat(),
+            "start_time": self.start_time.isoformat(),
+            "end_time": self.end_time.isoformat() if self.end_time else None,
+        }
+
+
+class ShiftIndex:
+    """Shifts per employee, sorted by start, for O(log n) overlap lookups"""
+
+    def __init__(self, shifts=()):
+        self._begins = defaultdict(list)
+        self._shifts = defaultdict(list)
+        for shift in shifts:
+            self.add(shift)
+
+    def add(self, shift):
+        begins, shifts = self._begins[shift.essn], self._shifts[shift.essn]
+        position = bisect_right(begins, shift.begin)
+        begins.insert(position, shift.begin)
+        shifts.insert(position, shift)
+
+    def overlapping(self, shift):
+        """Indexed shifts of the same employee overlapping ``shift``"""
+        begins = self._begins.get(shift.essn)
+        if not begins:
+            return []
+        # Only shifts starting less than a day earlier can still be running
+        first = bisect_right(begins, shift.begin - DAY)
+        last = bisect_left(begins, shift.end)
+        return [
+            other
+            for other in self._shifts[shift.essn][first:last]
+            if other.key != shift.key and other.overlaps(shift)
+        ]
+
+
+def stored_shifts(essns, first_date, last_date, using=DEFAULT_DB_ALIAS):
+    """
+    Stored shifts of ``essns`` that could overlap shifts on ``first_date``
+    through ``last_date``, in one query per ``BULK_BATCH_SIZE`` employees
+    """
+    essns = sorted(set(essns))
+    for start in range(0, len(essns), settings.BULK_BATCH_SIZE):
+        rows = (
+            Schedule.objects.using(using)
+            .filter(
+                essn__in=essns[start : start + settings.BULK_BATCH_SIZE],
+                date__range=(first_date - DAY, last_date + DAY),
+            )
+            .values_list(*SHIFT_FIELDS)
+        )
+        for row in rows:
+            yield Shift(*row, None)
+
+
+def find_overlaps(rows, replacing=(), using=DEFAULT_DB_ALIAS):
+    """
+    For each of ``rows`` (schedule field values; None for rows to skip), the
+    stored shifts and earlier rows it overlaps.
+
+    A stored shift with the key of a row, or a key in ``replacing``, is the
+    row being overwritten and is not a conflict.
+    """
+    shifts = [
+        None if values is None else Shift.from_values(values, item)
+        for item, values in enumerate(rows)
+    ]
+    batch = [shift for shift in shifts if shift is not None]
+    if not batch:
+        return [[] for _ in shifts]
+    replaced = {shift.key for shift in batch}.union(replacing)
+    index = ShiftIndex(
+        shift
+        for shift in stored_shifts(
+            [shift.essn for shift in batch],
+            min(shift.date for shift in batch),
+            max(shift.date for shift in batch),
+            using,
+        )
+        if shift.key not in replaced
+    )
+    overlaps = []
+    for shift in shifts:
+        if shift is None:
+            overlaps.append([])
+            continue
+        overlaps.append(index.overlapping(shift))
+        index.add(shift)
+    return overlaps
+
+
+def overlap_errors(rows, using=DEFAULT_DB_ALIAS, labels=None):
+    """
+    Serializer-style errors of ``rows`` overlapping other shifts, by
+    position; ``labels`` name the rows in messages (default: "item <n>")
+    """
+    errors = {}
+    for item, conflicts in enumerate(find_overlaps(rows, using=using)):
+        if conflicts:
+            message = overlap_message(conflicts[0], labels)
+            errors[item] = {"non_field_errors": [message]}
+    return errors
+
+
+def overlap_message(conflict, labels=None):
+    if conflict.item is not None:
+        label = labels[conflict.item] if labels else f"item {conflict.item}"
+        return f"Overlaps the shift of {label}"
+    return f"Overlaps the employee's shift at {conflict.describe()}"
+
+
+class ShiftOverlapValidator:
+    """Reject a shift overlapping another shift of the same employee"""
+
+    requires_context = True
+
+    def __call__(self, attrs, serializer):
+        instance = serializer.instance
+        values = {
+            name: attrs[name] if name in attrs else getattr(instance, name, None)
+            for name in SHIFT_FIELDS
+        }
+        replacing = [Shift.from_values(vars(instance)).key] if instance else []
+        conflicts = find_overlaps([values], replacing)[0]
+        if conflicts:
+            raise ValidationError(overlap_message(conflicts[0]), code="overlap")
+
+
+def find_conflicts(first_date, last_date, using=None):
+    """
+    ``(earlier, later)`` pairs of overlapping shifts of the same employee
+    whose later shift is on ``first_date`` through ``last_date``.
+
+    One sweep over the shifts ordered by employee and start, keeping the
+    shifts still running at each start.
+    """
+    rows = (
+        Schedule.objects.using(using)
+        .filter(date__range=(first_date - DAY, last_date))
+        .order_by("essn", "date", "start_time")
+        .values_list(*SHIFT_FIELDS)
+        .iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    )
+    conflicts = []
+    essn, running = None, []
+    for row in rows:
+        shift = Shift(*row, None)
+        if shift.essn != essn:
+            essn, running = shift.essn, []
+        begin = shift.begin
+        running = [other for other in running if other.end > begin]
+        if shift.date >= first_date:
+            conflicts.extend((other, shift) for other in running)
+        running.append(shift)
+    return conflicts
@@ -0,0 +1,138 @@
+"""
+DDL of the unmanaged tables, as in docs/DATABASE_SCHEMA.md.
+
+Migrations leave these tables out, so ``create_tables`` builds them where
+nothing else does: the test databases and SQLite databases filled by
+``generate_data``. ``{auto_id}`` is the vendor's auto-increment key.
+"""
+
+from .models import (
+    Employee,
+    Employment,
+    Facility,
+    Infection,
+    InfectionType,
+    Person,
+    Residence,
+    Schedule,
+    Vaccination,
+    VaccineType,
+)
+
+AUTO_ID = {
+    "sqlite": "INTEGER PRIMARY KEY AUTOINCREMENT",
+    "mysql": "INT AUTO_INCREMENT PRIMARY KEY",
+}
+
+TABLES = {
+    Person: """
+        CREATE TABLE Persons (
+            SSN INT UNIQUE,
+            Medicare CHAR(12) PRIMARY KEY,
+            FirstName VARCHAR(30) NOT NULL,
+            LastName VARCHAR(30) NOT NULL,
+            DOB DATE NOT NULL,
+            Telephone CHAR(10) UNIQUE,
+            Citizenship VARCHAR(30),
+            Email VARCHAR(320),
+            Occupation VARCHAR(30)
+        )""",
+    Employee: """
+        CREATE TABLE Employees (
+            SSN INT PRIMARY KEY,
+            Role VARCHAR(50) NOT NULL
+        )""",
+    Facility: """
+        CREATE TABLE Facilities (
+            FID {auto_id},
+            Name VARCHAR(50) UNIQUE NOT NULL,
+            Address VARCHAR(100) NOT NULL,
+            City VARCHAR(50) NOT NULL,
+            Province VARCHAR(25) NOT NULL,
+            PostalCode CHAR(6) NOT NULL,
+            PhoneNumber CHAR(10) UNIQUE NOT NULL,
+            WebAddress VARCHAR(255) NOT NULL,
+            Type VARCHAR(30) NOT NULL,
+            Capacity INT,
+            GMSSN INT UNIQUE NOT NULL
+        )""",
+    Residence: """
+        CREATE TABLE Residences (
+            ResID {auto_id},
+            Address VARCHAR(100) NOT NULL,
+            City VARCHAR(50) NOT NULL,
+            Province VARCHAR(25) NOT NULL,
+            PostalCode CHAR(6) NOT NULL,
+            NoOfBedrooms INT,
+            Type VARCHAR(30) NOT NULL
+        )""",
+    InfectionType: """
+        CREATE TABLE InfectionTypes (
+            TypeID {auto_id},
+            TypeName VARCHAR(50) UNIQUE NOT NULL
+        )""",
+    VaccineType: """
+        CREATE TABLE VaccineTypes (
+            TypeID {auto_id},
+            TypeName VARCHAR(50) UNIQUE NOT NULL
+        )""",
+    Employment: """
+        CREATE TABLE Employments (
+            ESSN INT NOT NULL,
+            FID INT NOT NULL,
+            StartDate DATE NOT NULL,
+            EndDate DATE,
+            PRIMARY KEY (ESSN, FID, StartDate)
+        )""",
+    Schedule: """
+        CREATE TABLE Schedules (
+            ESSN INT NOT NULL,
+            FID INT NOT NULL,
+            Date DATE NOT NULL,
+            StartTime TIME NOT NULL,
+            EndTime TIME,
+            PRIMARY KEY (ESSN, FID, Date, StartTime)
+        )""",
+    Infection: """
+        CREATE TABLE Infections (
+            SSN INT NOT NULL,
+            Date DATE NOT NULL,
+            TypeID INT NOT NULL,
+            PRIMARY KEY (SSN, Date, TypeID)
+        )""",
+    Vaccination: """
+        CREATE TABLE Vaccinations (
+            SSN INT NOT NULL,
+            TypeID INT NOT NULL,
+            Date DATE NOT NULL,
+            NoOfDose INT,
+            FID INT,
+            PRIMARY KEY (SSN, TypeID, Date)
+        )""",
+}
+
+# Secondary indexes the API relies on
+INDEXES = {
+    Schedule: [
+        "CREATE INDEX idx_schedules_shifts "
+        "ON Schedules (ESSN, Date, StartTime, EndTime, FID)",
+    ],
+}
+
+
+def missing_tables(connection):
+    """The unmanaged models whose table does not exist on ``connection``"""
+    existing = set(connection.introspection.table_names())
+    return [model for model in TABLES if model._meta.db_table not in existing]
+
+
+def create_tables(connection):
+    """Create the missing unmanaged tables and their indexes; returns their models"""
+    models = missing_tables(connection)
+    auto_id = AUTO_ID[connection.vendor]
+    with connection.cursor() as cursor:
+        for model in models:
+            cursor.execute(TABLES[model].format(auto_id=auto_id))
+            for ddl in INDEXES.get(model, ()):
+                cursor.execute(ddl)
+    return models
@@ -0,0 +1,355 @@
+import logging
+import re
+import threading
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import SearchFilter
+
+from .caching import table_versions
+from .models import Person
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"\w+")
+
+# Relevance weight of a term matching each searchable Person field
+FIELD_WEIGHTS = {
+    "first_name": 3.0,
+    "last_name": 3.0,
+    "email": 2.0,
+    "occupation": 1.0,
+    "citizenship": 1.0,
+}
+
+FULLTEXT_COLUMNS = "FirstName, LastName, Email, Occupation, Citizenship"
+FULLTEXT_INDEX = "ft_persons_search"
+
+# InnoDB ignores shorter words (innodb_ft_min_token_size)
+FULLTEXT_MIN_TERM = 3
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+def prefix_filter(word):
+    """Rows with a searchable field starting with ``word``"""
+    condition = Q()
+    for field in FIELD_WEIGHTS:
+        condition |= Q(**{f"{field}__istartswith": word})
+    return condition
+
+
+# A Medicare number (prefix): up to four letters, then digits (LOPA12345678)
+MEDICARE_RE = re.compile(r"[a-z]{1,4}\d{4,}")
+
+
+def is_identifier(term):
+    """Whether a search term is an SSN or Medicare number rather than words"""
+    if term.isdigit():
+        return True
+    max_length = Person._meta.get_field("medicare").max_length
+    return len(term) <= max_length and MEDICARE_RE.fullmatch(term) is not None
+
+
+def short_term_filter(term):
+    """
+    Name prefix match for terms shorter than ``FULLTEXT_MIN_TERM``, served
+    by the name indexes; such terms match too many words to expand
+    """
+    return Q(first_name__istartswith=term) | Q(last_name__istartswith=term)
+
+
+def identifier_filter(term):
+    """Exact SSN or Medicare prefix match, both served by unique indexes"""
+    condition = Q(medicare__istartswith=term)
+    if term.isdigit():
+        condition |= Q(ssn=int(term))
+    return condition
+
+
+class FullTextSearchBackend:
+    """
+    MySQL ``MATCH ... AGAINST`` over the ``ft_persons_search`` FULLTEXT index.
+
+    Each term must match as a word prefix; the rows are ranked by MySQL's
+    relevance score. Terms too short for the index, and SSN or Medicare
+    numbers, fall back to prefix matches on indexed columns.
+    """
+
+    name = "fulltext"
+
+    def search(self, queryset, terms):
+        words = []
+        for term in terms:
+            if is_identifier(term):
+                queryset = queryset.filter(identifier_filter(term))
+            elif len(term) < FULLTEXT_MIN_TERM:
+                queryset = queryset.filter(short_term_filter(term))
+            else:
+                words.extend(tokenize(term))
+        if not words:
+            return queryset.annotate(search_rank=Value(1.0, FloatField()))
+
+        query = " ".join(f"+{word}*" for word in words)
+        match = f"MATCH({FULLTEXT_COLUMNS}) AGAINST (%s IN BOOLEAN MODE)"
+        return queryset.annotate(
+            search_rank=RawSQL(match, [query], output_field=FloatField())
+        ).filter(search_rank__gt=0)
+
+
+class PersonTokenIndex:
+    """
+    In-process inverted index over the searchable Person fields.
+
+    Tokens are kept sorted so a prefix lookup is a binary search plus a scan
+    of the matching range. Writes made by this process are patched in place
+    from the save and delete signals and adopt the version they bumped when
+    the index was current before them.
+    When the Persons table version moves otherwise (another process wrote,
+    or the version expired) the index is rebuilt in a background thread,
+    and the previous index keeps serving searches until it is ready.
+    """
+
+    rebuild_in_background = True
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._tokens = []  # sorted distinct tokens
+        self._postings = {}  # token -> {medicare: weight}
+        self._documents = {}  # medicare -> [token, ...]
+        self._rebuilding = False
+        self.version = None
+
+    def search(self, terms, limit):
+        """
+        Return ``{medicare: score}`` for rows matching every term, or None
+        when the index is not built yet or more than ``limit`` rows match
+        """
+        if not self._ensure_current():
+            return None
+        scores = None
+        with self._lock:
+            for term in terms:
+                term_scores = {}
+                tokens = self._tokens
+                for position in range(bisect_left(tokens, term), len(tokens)):
+                    token = tokens[position]
+                    if not token.startswith(term):
+                        break
+                    exact = 2.0 if token == term else 1.0
+                    for key, weight in self._postings[token].items():
+                        score = weight * exact
+                        if score > term_scores.get(key, 0):
+                            term_scores[key] = score
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {
+                        key: score + term_scores[key]
+                        for key, score in scores.items()
+                        if key in term_scores
+                    }
+                if not scores:
+                    return {}
+        return scores if len(scores) <= limit else None
+
+    def record_write(self, person, previous_version, deleted=False):
+        """
+        Apply a saved or deleted person after its table version was bumped.
+
+        ``previous_version`` is the version read before the write: the index
+        only adopts the new version if it was current then, so writes it
+        never saw (bulk writes, other processes) still force a rebuild.
+        """
+        with self._lock:
+            if self.version is None:
+                return
+            self._remove(person.medicare)
+            if not deleted:
+                values = {field: getattr(person, field) for field in FIELD_WEIGHTS}
+                self._add(person.medicare, values)
+            if previous_version == self.version:
+                (self.version,) = table_versions(Person)
+
+    def rebuild(self, version=None):
+        """Load every person into a new index and swap it in"""
+        if version is None:
+            (version,) = table_versions(Person)
+        index = PersonTokenIndex()
+        # From the primary, so a lagging replica is never indexed under
+        # the new version
+        rows = Person.objects.using(DEFAULT_DB_ALIAS)
+        rows = rows.values_list("medicare", *FIELD_WEIGHTS)
+        for medicare, *values in rows.iterator(chunk_size=5000):
+            index._add(medicare, dict(zip(FIELD_WEIGHTS, values)))
+        with self._lock:
+            self._tokens, self._postings = index._tokens, index._postings
+            self._documents = index._documents
+            # Writes recorded meanwhile moved the version on, so they are
+            # picked up by the next rebuild
+            self.version = version
+
+    def _ensure_current(self):
+        """Start a rebuild if the table changed; whether there is an index"""
+        (version,) = table_versions(Person)
+        if version == self.version:
+            return True
+        if not self.rebuild_in_background:
+            self.rebuild(version)
+            return True
+        with self._lock:
+            if not self._rebuilding:
+                self._rebuilding = True
+                threading.Thread(
+                    target=self._rebuild_in_thread, args=(version,), daemon=True
+                ).start()
+            return self.version is not None
+
+    def _rebuild_in_thread(self, version):
+        try:
+            self.rebuild(version)
+        except Exception:
+            logger.exception("Rebuilding the person search index failed")
+        finally:
+            self._rebuilding = False
+            connections.close_all()
+
+    def _add(self, medicare, values):
+        weights = {}
+        for field, text in values.items():
+            for token in tokenize(text):
+                weights[token] = max(weights.get(token, 0), FIELD_WEIGHTS[field])
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                insort(self._tokens, token)
+            postings[medicare] = weight
+        self._documents[medicare] = list(weights)
+
+    def _remove(self, medicare):
+        for token in self._documents.pop(medicare, ()):
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(medicare, None)
+
+
+class TokenIndexSearchBackend:
+    """
+    Search through the process-wide ``PersonTokenIndex``.
+
+    Terms shorter than ``FULLTEXT_MIN_TERM`` are name prefix matches in
+    SQL, as with FULLTEXT. Until the index is built, and for words matching
+    more than ``max_results`` rows, it falls back to unranked prefix matches
+    in SQL too.
+    """
+
+    name = "memory"
+    max_results = 10000
+
+    def __init__(self, index):
+        self.index = index
+
+    def search(self, queryset, terms):
+        words = []
+        for term in terms:
+            if is_identifier(term):
+                queryset = queryset.filter(identifier_filter(term))
+            elif len(term) < FULLTEXT_MIN_TERM:
+                # A type-ahead letter or two would expand to most tokens
+                queryset = queryset.filter(short_term_filter(term))
+            else:
+                words.extend(tokenize(term))
+        if not words:
+            return queryset.annotate(search_rank=Value(1.0, FloatField()))
+
+        scores = self.index.search(words, self.max_results)
+        if scores is None:
+            for word in words:
+                queryset = queryset.filter(prefix_filter(word))
+            return queryset.annotate(search_rank=Value(1.0, FloatField()))
+
+        by_score = {}
+        for key, score in scores.items():
+            by_score.setdefault(score, []).append(key)
+        # One WHEN per distinct score keeps the CASE small
+        rank = Case(
+            *(When(pk__in=keys, then=Value(score)) for score, keys in by_score.items()),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+        return queryset.filter(pk__in=list(scores)).annotate(search_rank=rank)
+
+
+person_index = PersonTokenIndex()
+
+
+def note_person_version(sender, instance, **kwargs):
+    """Remember the Persons version a write starts from, see ``record_write``"""
+    (instance._person_version,) = table_versions(Person)
+
+
+def sync_person_index(sender, instance, **kwargs):
+    person_index.record_write(
+        instance,
+        getattr(instance, "_person_version", None),
+        deleted="created" not in kwargs,
+    )
+
+
+_fulltext_available = {}
+
+
+def fulltext_index_exists(using):
+    """Whether the Persons FULLTEXT index exists, checked once per process"""
+    if using not in _fulltext_available:
+        connection = connections[using]
+        exists = False
+        if connection.vendor == "mysql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM information_schema.STATISTICS "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s "
+                    "AND INDEX_NAME = %s LIMIT 1",
+                    [Person._meta.db_table, FULLTEXT_INDEX],
+                )
+                exists = cursor.fetchone() is not None
+        _fulltext_available[using] = exists
+    return _fulltext_available[using]
+
+
+def get_person_search_backend(queryset):
+    """
+    Backend chosen by ``PERSON_SEARCH_BACKEND``: ``fulltext``, ``memory``, or
+    ``auto`` (FULLTEXT when the index exists, the token index otherwise)
+    """
+    choice = settings.PERSON_SEARCH_BACKEND
+    if choice == "fulltext" or (
+        choice == "auto" and fulltext_index_exists(queryset.db)
+    ):
+        return FullTextSearchBackend()
+    return TokenIndexSearchBackend(person_index)
+
+
+class PersonSearchFilter(SearchFilter):
+    """
+    Indexed, relevance-ranked search for persons.
+
+    Place it after ``OrderingFilter``: without an explicit ``ordering``
+    parameter the results are re-ordered by relevance, keeping the view's
+    default ordering as a tie-breaker.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = [term.lower() for term in self.get_search_terms(request)]
+        if not terms:
+            return queryset
+        queryset = get_person_search_backend(queryset).search(queryset, terms)
+        if request.query_params.get("ordering"):
+            return queryset
+        return queryset.order_by("-search_rank", *queryset.query.order_by)
@@ -1,5 +1,7 @@
 from rest_framework import serializers
+from rest_framework.validators import UniqueTogetherValidator
 
+from .loaders import BatchedListSerializer, BatchedRelationsMixin
 from .models import (
     Employee,
     Employment,
@@ -12,6 +14,8 @@ from .models import (
     Vaccination,
     VaccineType,
 )
+from .reference import facility_names, infection_type_names, vaccine_type_names
+from .scheduling import ShiftOverlapValidator
 
 
 class PersonSerializer(serializers.ModelSerializer):
@@ -20,15 +24,23 @@ class PersonSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
-class EmployeeSerializer(serializers.ModelSerializer):
+class EmployeeSerializer(BatchedRelationsMixin, serializers.ModelSerializer):
     # Include person details in the response
     person_name = serializers.SerializerMethodField()
     person_email = serializers.SerializerMethodField()
     person_phone = serializers.SerializerMethodField()
 
+    batched_relations = ("person",)
+    method_field_columns = {
+        "person_name": ("ssn", "person__first_name", "person__last_name"),
+        "person_email": ("ssn", "person__email"),
+        "person_phone": ("ssn", "person__telephone"),
+    }
+
     class Meta:
         model = Employee
         fields = "__all__"
+        list_serializer_class = BatchedListSerializer
 
     def get_person_name(self, obj):
         person = obj.person
@@ -43,18 +55,37 @@ class EmployeeSerializer(serializers.ModelSerializer):
         return person.telephone if person else None
 
 
-class FacilitySerializer(serializers.ModelSerializer):
+class FacilitySerializer(BatchedRelationsMixin, serializers.ModelSerializer):
     # Include general manager details
     general_manager_name = serializers.SerializerMethodField()
 
+    batched_relations = ("general_manager",)
+    method_field_columns = {
+        "general_manager_name": (
+            "gmssn",
+            "general_manager__medicare",
+            "general_manager__first_name",
+            "general_manager__last_name",
+        ),
+    }
+
     class Meta:
         model = Facility
         fields = "__all__"
+        list_serializer_class = BatchedListSerializer
 
     def get_general_manager_name(self, obj):
         gm = obj.general_manager
         return f"{gm.first_name} {gm.last_name}" if gm else "Unknown"
 
+    @staticmethod
+    def values_general_manager_name(row):
+        if row["general_manager__medicare"] is None:
+            return "Unknown"
+        return (
+            f"{row['general_manager__first_name']} {row['general_manager__last_name']}"
+        )
+
 
 class ResidenceSerializer(serializers.ModelSerializer):
     class Meta:
@@ -68,21 +99,28 @@ class InfectionTypeSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
-class InfectionSerializer(serializers.ModelSerializer):
+class InfectionSerializer(BatchedRelationsMixin, serializers.ModelSerializer):
     person_name = serializers.SerializerMethodField()
     infection_type_name = serializers.SerializerMethodField()
 
+    batched_relations = ("person",)
+    reference_models = (InfectionType,)
+    method_field_columns = {
+        "person_name": ("ssn", "person__first_name", "person__last_name"),
+        "infection_type_name": ("type_id",),
+    }
+
     class Meta:
         model = Infection
         fields = "__all__"
+        list_serializer_class = BatchedListSerializer
 
     def get_person_name(self, obj):
         person = obj.person
         return f"{person.first_name} {person.last_name}" if person else "Unknown"
 
     def get_infection_type_name(self, obj):
-        infection_type = obj.infection_type
-        return infection_type.type_name if infection_type else "Unknown"
+        return infection_type_names.get(obj.type_id, "Unknown")
 
 
 class VaccineTypeSerializer(serializers.ModelSerializer):
@@ -91,72 +129,112 @@ class VaccineTypeSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
-class VaccinationSerializer(serializers.ModelSerializer):
+class VaccinationSerializer(BatchedRelationsMixin, serializers.ModelSerializer):
     person_name = serializers.SerializerMethodField()
     vaccine_type_name = serializers.SerializerMethodField()
     facility_name = serializers.SerializerMethodField()
 
+    batched_relations = ("person",)
+    reference_models = (VaccineType, Facility)
+    method_field_columns = {
+        "person_name": ("ssn", "person__first_name", "person__last_name"),
+        "vaccine_type_name": ("type_id",),
+        "facility_name": ("fid",),
+    }
+
     class Meta:
         model = Vaccination
         fields = "__all__"
+        list_serializer_class = BatchedListSerializer
 
     def get_person_name(self, obj):
         person = obj.person
         return f"{person.first_name} {person.last_name}" if person else "Unknown"
 
     def get_vaccine_type_name(self, obj):
-        vaccine_type = obj.vaccine_type
-        return vaccine_type.type_name if vaccine_type else "Unknown"
+        return vaccine_type_names.get(obj.type_id, "Unknown")
 
     def get_facility_name(self, obj):
-        facility = obj.facility
-        return facility.name if facility else "Unknown"
+        return facility_names.get(obj.fid, "Unknown")
 
 
-class EmploymentSerializer(serializers.ModelSerializer):
+class EmploymentSerializer(BatchedRelationsMixin, serializers.ModelSerializer):
     employee_name = serializers.SerializerMethodField()
     facility_name = serializers.SerializerMethodField()
     employee_role = serializers.SerializerMethodField()
 
+    batched_relations = ("employee__person",)
+    reference_models = (Facility,)
+    method_field_columns = {
+        "employee_name": (
+            "essn",
+            "employee__person__first_name",
+            "employee__person__last_name",
+        ),
+        "facility_name": ("fid",),
+        "employee_role": ("essn", "employee__role"),
+    }
+
     class Meta:
         model = Employment
         fields = "__all__"
+        list_serializer_class = BatchedListSerializer
 
     def get_employee_name(self, obj):
         employee = obj.employee
-        if employee and employee.person:
-            person = employee.person
+        person = employee.person if employee else None
+        if person:
             return f"{person.first_name} {person.last_name}"
         return "Unknown"
 
     def get_facility_name(self, obj):
-        facility = obj.facility
-        return facility.name if facility else "Unknown"
+        return facility_names.get(obj.fid, "Unknown")
 
     def get_employee_role(self, obj):
         employee = obj.employee
         return employee.role if employee else "Unknown"
 
 
-class ScheduleSerializer(serializers.ModelSerializer):
+class ScheduleSerializer(BatchedRelationsMixin, serializers.ModelSerializer):
     employee_name = serializers.SerializerMethodField()
     facility_name = serializers.SerializerMethodField()
     employee_role = serializers.SerializerMethodField()
 
+    batched_relations = ("employee__person",)
+    reference_models = (Facility,)
+    method_field_columns = {
+        "employee_name": (
+            "essn",
+            "employee__person__first_name",
+            "employee__person__last_name",
+        ),
+        "facility_name": ("fid",),
+        "employee_role": ("essn", "employee__role"),
+    }
+
     class Meta:
         model = Schedule
         fields = "__all__"
+        list_serializer_class = BatchedListSerializer
+        # ESSN is only part of the composite key, so not unique on its own
+        extra_kwargs = {"essn": {"validators": []}}
+        validators = [
+            UniqueTogetherValidator(
+                queryset=Schedule.objects.all(),
+                fields=("essn", "fid", "date", "start_time"),
+            ),
+            ShiftOverlapValidator(),
+        ]
 
     def get_employee_name(self, obj):
         employee = obj.employee
-        if employee and employee.person:
-            person = employee.person
+        person = employee.person if employee else None
+        if person:
             return f"{person.first_name} {person.last_name}"
         return "Unknown"
 
     def get_facility_name(self, obj):
-        facility = obj.facility
-        return facility.name if facility else "Unknown"
+        return facility_names.get(obj.fid, "Unknown")
 
     def get_employee_role(self, obj):
         employee = obj.employee
@@ -59,6 +59,8 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "hms.routers.ReplicaRoutingMiddleware",
+    "hms.middleware.QueryInstrumentationMiddleware",
 ]
 
 ROOT_URLCONF = "hms.urls"
@@ -84,14 +86,6 @@ WSGI_APPLICATION = "hms.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-# SQLite configuration (backup)
-# DATABASES = {
-#     "default": {
-#         "ENGINE": "django.db.backends.sqlite3",
-#         "NAME": BASE_DIR / "db.sqlite3",
-#     }
-# }
-
 # MySQL configuration (active)
 DATABASES = {
     "default": {
@@ -107,6 +101,123 @@ DATABASES = {
     }
 }
 
+# Pooled connections: DB_POOL=True reuses open MySQL connections across
+# requests instead of connecting (and running init_command) for each one.
+# Keep CONN_MAX_AGE at 0 so connections return to the pool after a request.
+if os.getenv("DB_POOL", "False") == "True":
+    DATABASES["default"]["ENGINE"] = "hms.db.backends.mysql_pool"
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        # Open connections per process, and seconds to wait when all are busy
+        "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+        "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        # Idle connections are closed after max_idle seconds and every
+        # connection is replaced after max_lifetime seconds
+        "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+        "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", "3600")),
+        # Ping connections idle at least this many seconds before reuse
+        "check_after": float(os.getenv("DB_POOL_CHECK_AFTER", "0")),
+    }
+
+# SQLite configuration (development): USE_SQLITE=True
+if os.getenv("USE_SQLITE") == "True":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db.sqlite3",
+        }
+    }
+
+# Read replicas: DB_REPLICAS lists replica hosts (MySQL) or database files
+# (SQLite), each with the primary's other settings. Safe GETs of the list,
+# detail and analytics endpoints read from them (see hms/routers.py).
+DATABASE_REPLICAS = []
+for number, location in enumerate(
+    filter(None, os.getenv("DB_REPLICAS", "").split(",")), start=1
+):
+    alias = f"replica_{number}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "OPTIONS": dict(DATABASES["default"].get("OPTIONS", {})),
+        "TEST": {"MIRROR": "default"},
+    }
+    if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+        DATABASES[alias]["NAME"] = location.strip()
+    else:
+        DATABASES[alias]["HOST"] = location.strip()
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["hms.routers.ReplicaRouter"]
+
+# Seconds a replica may lag behind the primary: for this long after a write,
+# the writing client and responses derived from the written tables read
+# from the primary
+REPLICA_MAX_LAG = int(os.getenv("REPLICA_MAX_LAG", "5"))
+
+# Seconds a replica that failed to connect is skipped
+REPLICA_RETRY_AFTER = int(os.getenv("REPLICA_RETRY_AFTER", "30"))
+
+
+# Cache configuration
+# Local memory by default; set REDIS_URL in production to share cached data
+# and table versions between workers. Without it each process only sees its
+# own writes, so ETags are not sent unless DEBUG is on (hms.W001).
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "hms",
+        }
+    }
+
+# Seconds a table version lives (hms/caching.py). Writes that bump none, such
+# as raw SQL or QuerySet.update(), show in ETags and cached data within this.
+TABLE_VERSION_TTL = int(os.getenv("TABLE_VERSION_TTL", "300"))
+
+# Seconds the analytics dashboard overview stays cached (writes to Persons,
+# Employees or Facilities invalidate it sooner)
+DASHBOARD_CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", "300"))
+
+# Largest number of rows each in-process reference table cache (infection
+# types, vaccine types, facility names) keeps in memory
+REFERENCE_CACHE_MAX_ENTRIES = int(os.getenv("REFERENCE_CACHE_MAX_ENTRIES", "5000"))
+
+# Bulk write endpoints: largest accepted payload and rows per INSERT statement
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "10000"))
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "1000"))
+
+# Rows fetched per query by the streaming export endpoints
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "2000"))
+
+# Threads (and so at most this many database connections) per process that
+# run the async analytics endpoints' queries concurrently
+ASYNC_QUERY_WORKERS = int(os.getenv("ASYNC_QUERY_WORKERS", "4"))
+
+# Person search backend: "fulltext" (MySQL FULLTEXT index ft_persons_search),
+# "memory" (in-process token index) or "auto" to use FULLTEXT when it exists
+PERSON_SEARCH_BACKEND = os.getenv("PERSON_SEARCH_BACKEND", "auto")
+
+# Per-request SQL instrumentation (hms/middleware.py), on with DEBUG by
+# default: Server-Timing headers (with DEBUG on, or to staff users), N+1
+# warnings when one query shape repeats QUERY_N_PLUS_ONE_THRESHOLD times,
+# and query budgets per URL name ("log" a warning or "raise", e.g. in tests)
+QUERY_INSTRUMENTATION = os.getenv("QUERY_INSTRUMENTATION", str(DEBUG)) == "True"
+QUERY_N_PLUS_ONE_THRESHOLD = int(os.getenv("QUERY_N_PLUS_ONE_THRESHOLD", "5"))
+QUERY_BUDGET_ACTION = os.getenv("QUERY_BUDGET_ACTION", "log")
+QUERY_BUDGET_DEFAULT = 10
+QUERY_BUDGETS = {
+    # Bulk writes look up and insert in batches, so they scale with the payload
+    "infection-bulk": None,
+    "vaccination-bulk": None,
+    "schedule-bulk": None,
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -149,6 +260,9 @@ STATIC_URL = "static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# The test databases also get the unmanaged tables (hms/schema.py)
+TEST_RUNNER = "hms.test_runner.UnmanagedTablesTestRunner"
+
 # Django REST Framework settings
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
@@ -158,6 +272,16 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
     ],
+    # JSON is encoded and decoded with orjson when it is installed
+    "DEFAULT_RENDERER_CLASSES": [
+        "hms.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "hms.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
     "DEFAULT_PAGINATION_CLASS": "hms.pagination.CustomPageNumberPagination",
     "PAGE_SIZE": 20,
 }
@@ -0,0 +1,53 @@
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+
+from .caching import bump_column_version, bump_table_version
+from .models import Person
+from .reference import REFERENCE_CACHES, invalidate_reference_cache
+from .search import note_person_version, sync_person_index
+
+
+def record_table_write(sender, **kwargs):
+    bump_table_version(sender)
+
+
+def record_column_changes(sender, instance, created, **kwargs):
+    """Bump the versions of the tracked columns this save changed"""
+    loaded = getattr(instance, "_loaded_values", None)
+    if created or loaded is None:
+        changed = sender.tracked_columns
+    else:
+        changed = [
+            column
+            for column in sender.tracked_columns
+            if loaded.get(column) != getattr(instance, column)
+        ]
+    if changed:
+        bump_column_version(sender, *changed)
+    instance._loaded_values = {
+        column: getattr(instance, column) for column in sender.tracked_columns
+    }
+
+
+def record_column_deletes(sender, **kwargs):
+    bump_column_version(sender, *sender.tracked_columns)
+
+
+def connect_signals():
+    """Bump table (and tracked column) versions whenever an HMS model is written"""
+    for model in apps.get_app_config("hms").get_models():
+        post_save.connect(record_table_write, sender=model)
+        post_delete.connect(record_table_write, sender=model)
+        if getattr(model, "tracked_columns", None):
+            post_save.connect(record_column_changes, sender=model)
+            post_delete.connect(record_column_deletes, sender=model)
+
+    for model in REFERENCE_CACHES:
+        post_save.connect(invalidate_reference_cache, sender=model)
+        post_delete.connect(invalidate_reference_cache, sender=model)
+
+    # Connected after the version bump so the index adopts the new version
+    pre_save.connect(note_person_version, sender=Person)
+    pre_delete.connect(note_person_version, sender=Person)
+    post_save.connect(sync_person_index, sender=Person)
+    post_delete.connect(sync_person_index, sender=Person)
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+from .reference import REFERENCE_CACHES
+from .schema import create_tables
+from .search import person_index
+
+# A second alias on the test database for the replica routing tests, set up
+# like the DB_REPLICAS aliases: a mirror of the primary
+TEST_REPLICA = "replica_test"
+
+
+class UnmanagedTablesTestRunner(DiscoverRunner):
+    """Test runner that also creates the unmanaged tables migrations leave out"""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        # Other threads cannot see a test's transaction
+        person_index.rebuild_in_background = False
+        # Rolled back rows fire no signals; each test clears the versions, so
+        # compare them on every lookup
+        for reference_cache in REFERENCE_CACHES.values():
+            reference_cache.check_interval = 0
+        primary = connections.settings[DEFAULT_DB_ALIAS]
+        connections.settings[TEST_REPLICA] = {
+            **primary,
+            "TEST": {**primary["TEST"], "MIRROR": DEFAULT_DB_ALIAS},
+        }
+
+    def setup_databases(self, **kwargs):
+        old_config = super().setup_databases(**kwargs)
+        for alias in connections:
+            # Mirrors share their test database with the primary
+            if not connections[alias].settings_dict["TEST"].get("MIRROR"):
+                create_tables(connections[alias])
+        return old_config
+
+    def run_checks(self, databases):
+        # Tests run in one process, which sees all of its own writes
+        silenced = [*settings.SILENCED_SYSTEM_CHECKS, "hms.W001"]
+        with override_settings(SILENCED_SYSTEM_CHECKS=silenced):
+            super().run_checks(databases)
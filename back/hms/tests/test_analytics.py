@@ -0,0 +1,333 @@
+import threading
+from datetime import date, timedelta
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.utils import timezone
+
+from hms import async_views, jsoncodec
+from hms.analytics import (
+    DASHBOARD_QUERIES,
+    DEFAULT_AGE_BOUNDS,
+    MAX_AGE_GROUPS,
+    _years_before,
+    age_buckets,
+    age_group_counts,
+    dashboard_stats_from,
+    facility_analytics_from,
+    facility_staff_rows,
+    occupation_counts,
+    parse_age_bounds,
+    person_demographics_from,
+)
+from hms.models import Employee, Employment, Facility, Person
+
+
+def make_person(number, **fields):
+    fields = {
+        "medicare": f"MED{number:09d}",
+        "ssn": number,
+        "first_name": "Ana",
+        "last_name": "Lopez",
+        "dob": date(1980, 1, 1),
+        "citizenship": "Canadian",
+        **fields,
+    }
+    return Person.objects.create(**fields)
+
+
+def make_facility(number, **fields):
+    fields = {
+        "name": f"Clinic {number}",
+        "address": "1 Main St",
+        "city": "Montreal",
+        "province": "QC",
+        "postal_code": "H1H1H1",
+        "phone_number": f"514000{number:04d}",
+        "web_address": "https://example.com",
+        "type": "Clinic",
+        "capacity": 10,
+        "gmssn": number,
+        **fields,
+    }
+    return Facility.objects.create(**fields)
+
+
+class AnalyticsTestCase(TransactionTestCase):
+    """
+    The analytics queries run on the query pool's threads, whose connections
+    only see committed rows
+    """
+
+    def setUp(self):
+        cache.clear()
+        # Flushing leaves out the unmanaged tables
+        for model in (Person, Employee, Facility, Employment):
+            self.addCleanup(model.objects.all().delete)
+
+
+class DashboardStatsTests(AnalyticsTestCase):
+    def setUp(self):
+        super().setUp()
+        make_person(1)
+        make_person(2, citizenship="French")
+        make_person(3)
+        Employee.objects.create(ssn=1, role="nurse")
+        Employee.objects.create(ssn=2, role="nurse")
+        Employee.objects.create(ssn=3, role="doctor")
+        make_facility(1, capacity=40)
+        make_facility(2, type="Hospital", province="ON", capacity=None)
+        make_facility(3, type="Hospital", capacity=100)
+
+    def get_stats(self):
+        response = self.client.get("/api/analytics/dashboard/")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_totals(self):
+        stats = self.get_stats()
+
+        self.assertEqual(
+            stats["overview"],
+            {
+                "total_persons": 3,
+                "total_employees": 3,
+                "total_facilities": 3,
+                "total_capacity": 140,
+            },
+        )
+        self.assertEqual(
+            stats["employee_roles"],
+            [{"role": "nurse", "count": 2}, {"role": "doctor", "count": 1}],
+        )
+        self.assertEqual(
+            stats["facility_types"],
+            [{"type": "Hospital", "count": 2}, {"type": "Clinic", "count": 1}],
+        )
+        self.assertEqual(
+            stats["province_distribution"],
+            [{"province": "QC", "count": 2}, {"province": "ON", "count": 1}],
+        )
+        self.assertEqual(
+            stats["citizenship_distribution"],
+            [
+                {"citizenship": "Canadian", "count": 2},
+                {"citizenship": "French", "count": 1},
+            ],
+        )
+
+    def test_second_hit_is_served_from_the_cache(self):
+        first = self.get_stats()
+
+        with mock.patch.object(
+            async_views, "gather_queries", wraps=async_views.gather_queries
+        ) as gather_queries, self.assertNumQueries(0):
+            second = self.get_stats()
+
+        gather_queries.assert_not_called()
+        self.assertEqual(second, first)
+
+    def test_writes_to_each_table_change_the_result(self):
+        self.get_stats()
+
+        make_person(4)
+        self.assertEqual(self.get_stats()["overview"]["total_persons"], 4)
+
+        Employee.objects.create(ssn=4, role="cashier")
+        self.assertEqual(self.get_stats()["overview"]["total_employees"], 4)
+
+        facility = Facility.objects.get(name="Clinic 1")
+        facility.capacity = 50
+        facility.save()
+        self.assertEqual(self.get_stats()["overview"]["total_capacity"], 150)
+
+
+class FacilityAnalyticsTests(AnalyticsTestCase):
+    def test_counts_distinct_active_employees_per_facility(self):
+        today = timezone.localdate()
+        day = timedelta(days=1)
+        busy = make_facility(1, capacity=4)
+        quiet = make_facility(2, capacity=None)
+        for essn, start, end in [
+            (1, today - 100 * day, None),
+            # Ended yesterday
+            (2, today - 100 * day, today - day),
+            # Two current employments of one employee
+            (3, today - 100 * day, today + 100 * day),
+            (3, today - 10 * day, None),
+            # Ends today, so still current
+            (4, today - 10 * day, today),
+            # Starts tomorrow
+            (5, today + day, None),
+        ]:
+            Employment.objects.create(
+                essn=essn, fid=busy.fid, start_date=start, end_date=end
+            )
+        Employment.objects.create(essn=2, fid=quiet.fid, start_date=today - day)
+
+        response = self.client.get("/api/analytics/facilities/")
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(
+            [
+                (
+                    facility["name"],
+                    facility["employee_count"],
+                    facility["occupancy_rate"],
+                )
+                for facility in data["facilities"]
+            ],
+            [("Clinic 1", 3, 75.0), ("Clinic 2", 1, 0)],
+        )
+        self.assertEqual(data["total_capacity"], 4)
+
+
+class ParseAgeBoundsTests(SimpleTestCase):
+    def test_default_and_custom_bounds(self):
+        self.assertEqual(parse_age_bounds(None), DEFAULT_AGE_BOUNDS)
+        self.assertEqual(parse_age_bounds(""), DEFAULT_AGE_BOUNDS)
+        self.assertEqual(parse_age_bounds("0,12,65"), [0, 12, 65])
+
+    def test_invalid_bounds(self):
+        too_many = ",".join(str(age) for age in range(MAX_AGE_GROUPS + 1))
+        for value in ["18,adult", "18,,30", "-1,18", "30,18", "18,18", too_many]:
+            with self.assertRaises(ValueError, msg=value):
+                parse_age_bounds(value)
+
+
+class AgeBucketTests(TestCase):
+    def count(self, bounds, today, *dobs):
+        for number, dob in enumerate(dobs, start=1):
+            make_person(number, dob=dob)
+        buckets = age_buckets(bounds, today)
+        counts = age_group_counts(buckets)
+        return {
+            label: counts[f"bucket_{index}"] for index, (label, _) in enumerate(buckets)
+        }
+
+    def test_bucket_edges(self):
+        counts = self.count(
+            [18, 30],
+            date(2024, 6, 15),
+            # 18 until tomorrow
+            date(2005, 6, 16),
+            # 19 today
+            date(2005, 6, 15),
+            # 30 until tomorrow, 31 today
+            date(1993, 6, 16),
+            date(1993, 6, 15),
+            # Born today
+            date(2024, 6, 15),
+        )
+
+        self.assertEqual(counts, {"0-18": 2, "19-30": 2, "30+": 1})
+
+    def test_cut_off_on_february_29th(self):
+        counts = self.count(
+            [17],
+            date(2024, 2, 29),
+            # Turned 18 yesterday
+            date(2006, 2, 28),
+            date(2006, 3, 1),
+        )
+
+        self.assertEqual(counts, {"0-17": 1, "17+": 1})
+
+
+class PersonDemographicsTests(AnalyticsTestCase):
+    def test_custom_age_groups(self):
+        today = timezone.localdate()
+        for number, age in enumerate([5, 10, 11, 40], start=1):
+            # The day before their next birthday
+            make_person(number, dob=_years_before(today, age + 1) + timedelta(days=1))
+
+        response = self.client.get("/api/analytics/demographics/?age_groups=4,10")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["age_distribution"], {"0-4": 0, "5-10": 2, "10+": 2}
+        )
+
+    def test_malformed_or_overlapping_age_groups_are_rejected(self):
+        for value in ["4,ten", "10,4", "4,4"]:
+            response = self.client.get(
+                f"/api/analytics/demographics/?age_groups={value}"
+            )
+            self.assertEqual(response.status_code, 400, value)
+            self.assertIn("age_groups", response.json()["error"])
+
+
+class AsyncViewsTests(AnalyticsTestCase):
+    def setUp(self):
+        super().setUp()
+        today = timezone.localdate()
+        for number, occupation in enumerate(["Nurse", "Teacher", "Nurse", ""], start=1):
+            make_person(
+                number,
+                dob=_years_before(today, number * 15),
+                occupation=occupation,
+                citizenship="French" if number % 2 else "Canadian",
+            )
+            Employee.objects.create(
+                ssn=number, role="nurse" if number < 3 else "doctor"
+            )
+            facility = make_facility(
+                number, capacity=number * 10 if number < 4 else None
+            )
+            Employment.objects.create(essn=number, fid=facility.fid, start_date=today)
+
+    async def assert_same_payload(self, path, compute):
+        response = await self.async_client.get(path)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(
+            response.content, jsoncodec.dumps(await sync_to_async(compute)())
+        )
+
+    async def test_dashboard_matches_the_sync_computation(self):
+        await self.assert_same_payload(
+            "/api/analytics/dashboard/",
+            lambda: dashboard_stats_from(*(query() for query in DASHBOARD_QUERIES)),
+        )
+
+    async def test_facility_analytics_match_the_sync_computation(self):
+        await self.assert_same_payload(
+            "/api/analytics/facilities/",
+            lambda: facility_analytics_from(facility_staff_rows()),
+        )
+
+    async def test_demographics_match_the_sync_computation(self):
+        def compute():
+            buckets = age_buckets([20, 40], timezone.localdate())
+            return person_demographics_from(
+                buckets, age_group_counts(buckets), occupation_counts()
+            )
+
+        await self.assert_same_payload(
+            "/api/analytics/demographics/?age_groups=20,40", compute
+        )
+
+    async def test_only_get_and_head_are_allowed(self):
+        response = await self.async_client.post("/api/analytics/dashboard/")
+
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response["Allow"], "GET, HEAD")
+
+    async def test_gather_queries_runs_on_the_query_pool_in_order(self):
+        def thread_name(label):
+            return label, threading.current_thread().name
+
+        results = await async_views.gather_queries(
+            (thread_name, "first"),
+            (thread_name, "second"),
+            (age_group_counts, age_buckets([30], timezone.localdate())),
+        )
+
+        self.assertEqual([result[0] for result in results[:2]], ["first", "second"])
+        for _, name in results[:2]:
+            self.assertTrue(name.startswith("hms-query"), name)
+        self.assertEqual(results[2], {"total": 4, "bucket_0": 2, "bucket_1": 2})
@@ -0,0 +1,127 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from hms.bulk import bulk_serializer_class, unique_errors
+from hms.models import Infection, Person
+from hms.serializers import PersonSerializer
+
+
+def person(medicare, ssn=None, telephone=None):
+    return {
+        "medicare": medicare,
+        "ssn": ssn,
+        "telephone": telephone,
+        "first_name": "Ana",
+        "last_name": "Lopez",
+        "dob": date(1980, 1, 1),
+    }
+
+
+class BulkWriteViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("writer", password="secret")
+        )
+
+    def test_batch_is_written_in_one_request(self):
+        Infection.objects.create(ssn=1, date=date(2024, 1, 1), type_id=1)
+        response = self.client.post(
+            "/api/infections/bulk/?mode=upsert",
+            [
+                {"ssn": 1, "date": "2024-01-01", "type_id": 1},
+                {"ssn": 2, "date": "2024-01-01", "type_id": 1},
+            ],
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual(response.data["updated"], 1)
+        self.assertEqual(Infection.objects.count(), 2)
+
+    def test_rejected_batch_reports_valid_items_as_not_written(self):
+        response = self.client.post(
+            "/api/infections/bulk/",
+            [
+                {"ssn": 1, "date": "2024-01-01", "type_id": 1},
+                {"ssn": 2, "date": "not a date", "type_id": 1},
+                {"ssn": 1, "date": "2024-01-01", "type_id": 1},
+            ],
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]],
+            ["not_written", "error", "error"],
+        )
+        self.assertIn("date", response.data["results"][1]["errors"])
+        self.assertEqual(response.data["created"], 0)
+        self.assertEqual(response.data["not_written"], 1)
+        self.assertEqual(response.data["error"], 2)
+        self.assertFalse(Infection.objects.exists())
+
+    def test_existing_record_is_rejected_in_create_mode(self):
+        Infection.objects.create(ssn=1, date=date(2024, 1, 1), type_id=1)
+        response = self.client.post(
+            "/api/infections/bulk/",
+            [{"ssn": 1, "date": "2024-01-01", "type_id": 1}],
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data["results"][0]["errors"],
+            {"non_field_errors": ["Record already exists"]},
+        )
+
+    def test_anonymous_writes_are_refused(self):
+        response = APIClient().post(
+            "/api/infections/bulk/",
+            [{"ssn": 1, "date": "2024-01-01", "type_id": 1}],
+            format="json",
+        )
+        self.assertIn(response.status_code, (401, 403))
+
+
+class UniqueErrorsTests(TestCase):
+    def setUp(self):
+        Person.objects.create(**person("MED000000001", ssn=111, telephone="5550001"))
+
+    def test_value_of_another_stored_record_is_rejected(self):
+        errors = unique_errors(Person, [person("MED000000002", ssn=111)])
+
+        self.assertEqual(list(errors), [0])
+        self.assertIn("ssn", errors[0])
+
+    def test_record_keeps_its_own_values(self):
+        rows = [person("MED000000001", ssn=111, telephone="5550001")]
+        self.assertEqual(unique_errors(Person, rows), {})
+
+    def test_value_repeated_within_the_batch_is_rejected(self):
+        rows = [
+            person("MED000000002", telephone="5550002"),
+            None,
+            person("MED000000003", telephone="5550002"),
+        ]
+        errors = unique_errors(Person, rows, labels=["a", "b", "c"])
+
+        self.assertEqual(errors, {2: {"telephone": ["Same telephone as a"]}})
+
+    def test_bulk_serializer_only_skips_uniqueness_checks(self):
+        serializer = bulk_serializer_class(PersonSerializer)(
+            data=person("MED000000002", ssn=111, telephone="5550001")
+        )
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+        serializer = bulk_serializer_class(PersonSerializer)(
+            data=person("MED000000002", telephone="55500010000")
+        )
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("telephone", serializer.errors)
@@ -0,0 +1,156 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from hms.caching import check_versions_shared
+from hms.models import Person
+
+
+@override_settings(DEBUG=True)
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.person = Person.objects.create(
+            medicare="MED000000001",
+            first_name="Ana",
+            last_name="Lopez",
+            dob=date(1980, 1, 1),
+        )
+
+    def test_unchanged_resource_is_not_modified(self):
+        first = self.client.get("/api/persons/")
+        again = self.client.get("/api/persons/", HTTP_IF_NONE_MATCH=first["ETag"])
+
+        self.assertEqual(again.status_code, 304)
+
+    def test_write_turns_not_modified_into_a_new_response(self):
+        etag = self.client.get("/api/persons/MED000000001/")["ETag"]
+        self.person.first_name = "Anna"
+        self.person.save()
+
+        response = self.client.get(
+            "/api/persons/MED000000001/", HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["first_name"], "Anna")
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_api_write_changes_the_list_etag(self):
+        etag = self.client.get("/api/persons/")["ETag"]
+        writer = APIClient()
+        writer.force_authenticate(get_user_model().objects.create_user("writer"))
+        writer.post(
+            "/api/persons/",
+            {
+                "medicare": "MED000000002",
+                "first_name": "Bo",
+                "last_name": "Li",
+                "dob": "1990-01-01",
+            },
+            format="json",
+        )
+
+        response = self.client.get("/api/persons/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 2)
+
+    @override_settings(DEBUG=False)
+    def test_no_etag_without_a_shared_cache(self):
+        response = self.client.get("/api/persons/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("ETag"))
+        self.assertEqual(
+            [error.id for error in check_versions_shared(None)], ["hms.W001"]
+        )
+
+
+@override_settings(DEBUG=True)
+class FilterOptionsTests(TestCase):
+    path = "/api/persons/filter-options/"
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        for number, (citizenship, occupation) in enumerate(
+            [
+                ("Canadian", "Nurse"),
+                ("French", ""),
+                ("Canadian", None),
+                (None, "Nurse"),
+            ],
+            start=1,
+        ):
+            Person.objects.create(
+                medicare=f"MED00000000{number}",
+                first_name="Ana",
+                last_name="Lopez",
+                dob=date(1980, 1, 1),
+                citizenship=citizenship,
+                occupation=occupation,
+            )
+
+    def test_facet_counts(self):
+        data = self.client.get(self.path).json()
+
+        self.assertEqual(data["citizenships"], ["Canadian", "French"])
+        self.assertEqual(data["occupations"], ["Nurse"])
+        self.assertEqual(
+            data["facets"],
+            {
+                "citizenship": [
+                    {"value": "Canadian", "count": 2},
+                    {"value": "French", "count": 1},
+                ],
+                "occupation": [{"value": "Nurse", "count": 2}],
+            },
+        )
+
+    def test_revalidation_is_not_modified(self):
+        etag = self.client.get(self.path)["ETag"]
+
+        response = self.client.get(self.path, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_depends_on_the_media_type(self):
+        etag = self.client.get(self.path, HTTP_ACCEPT="application/json")["ETag"]
+
+        response = self.client.get(
+            self.path, HTTP_ACCEPT="text/html", HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertNotIn("hms:", etag)
+
+    def test_write_to_an_untracked_column_keeps_the_etag(self):
+        etag = self.client.get(self.path)["ETag"]
+        person = Person.objects.get(medicare="MED000000001")
+        person.first_name = "Anna"
+        person.save()
+
+        response = self.client.get(self.path, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_write_to_a_tracked_column_changes_the_etag(self):
+        etag = self.client.get(self.path)["ETag"]
+        person = Person.objects.get(medicare="MED000000002")
+        person.citizenship = "Canadian"
+        person.save()
+
+        response = self.client.get(self.path, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(
+            response.json()["facets"]["citizenship"],
+            [{"value": "Canadian", "count": 3}],
+        )
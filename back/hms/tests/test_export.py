@@ -0,0 +1,134 @@
+import csv
+import io
+import json
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from hms.models import Facility, Person
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user("reader"))
+        Person.objects.bulk_create(
+            Person(
+                medicare=f"MED00000000{number}",
+                first_name=name,
+                last_name="Lopez",
+                dob=date(1980, 1, 1),
+                citizenship="Canadian",
+            )
+            for number, name in enumerate(["Ana", "Ben", "Cy"], start=1)
+        )
+
+    def read(self, response):
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def test_anonymous_exports_are_refused(self):
+        for path in ("/api/persons/export/", "/api/infections/export/"):
+            response = APIClient().get(path)
+            self.assertIn(response.status_code, (401, 403), path)
+
+    def test_csv_export_has_every_row_in_list_order(self):
+        rows = list(
+            csv.DictReader(
+                io.StringIO(self.read(self.client.get("/api/persons/export/")))
+            )
+        )
+
+        self.assertEqual([row["first_name"] for row in rows], ["Ana", "Ben", "Cy"])
+
+    def test_ndjson_export_applies_filters_and_fields(self):
+        content = self.read(
+            self.client.get(
+                "/api/persons/export/?output=ndjson&search=ben&fields=medicare"
+            )
+        )
+
+        self.assertEqual(
+            [json.loads(line) for line in content.splitlines()],
+            [{"medicare": "MED000000002"}],
+        )
+
+    def rows(self, path):
+        return list(csv.DictReader(io.StringIO(self.read(self.client.get(path)))))
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_requested_ordering_is_exported_by_keyset_across_chunks(self):
+        Person.objects.create(
+            medicare="MED000000004",
+            first_name="Ben",
+            last_name="Abel",
+            dob=date(1990, 1, 1),
+            citizenship="Canadian",
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            rows = self.rows("/api/persons/export/?ordering=-first_name")
+
+        self.assertEqual(
+            [row["medicare"] for row in rows],
+            ["MED000000003", "MED000000004", "MED000000002", "MED000000001"],
+        )
+        # Two full chunks and the empty one ending the seek, none of them an OFFSET
+        selects = [
+            query["sql"] for query in queries if 'FROM "Persons"' in query["sql"]
+        ]
+        self.assertEqual(len(selects), 3, selects)
+        self.assertTrue(
+            all("LIMIT 2" in sql and "OFFSET" not in sql for sql in selects)
+        )
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_search_is_exported_by_keyset_in_rank_order(self):
+        rows = self.rows("/api/persons/export/?search=lopez")
+
+        self.assertEqual(
+            [row["medicare"] for row in rows],
+            ["MED000000001", "MED000000002", "MED000000003"],
+        )
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_nullable_ordering_columns_keep_every_row(self):
+        for number, (capacity, gmssn) in enumerate(
+            [(None, 1), (10, 2), (None, 3), (5, 999)], start=1
+        ):
+            Facility.objects.create(
+                name=f"Clinic {number}",
+                address="1 Main St",
+                city="Montreal",
+                province="QC",
+                postal_code="H1H1H1",
+                phone_number=f"514000000{number}",
+                web_address="https://example.com",
+                type="Clinic",
+                capacity=capacity,
+                gmssn=gmssn,
+            )
+        Person.objects.filter(medicare="MED000000001").update(ssn=1, last_name="Zed")
+        Person.objects.filter(medicare="MED000000002").update(ssn=2)
+        Person.objects.filter(medicare="MED000000003").update(ssn=3, last_name="Able")
+
+        for ordering, expected in [
+            ("capacity", ["Clinic 1", "Clinic 3", "Clinic 4", "Clinic 2"]),
+            ("-capacity", ["Clinic 2", "Clinic 4", "Clinic 1", "Clinic 3"]),
+            (
+                "general_manager__last_name",
+                ["Clinic 4", "Clinic 3", "Clinic 2", "Clinic 1"],
+            ),
+            (
+                "-general_manager__last_name",
+                ["Clinic 1", "Clinic 2", "Clinic 3", "Clinic 4"],
+            ),
+        ]:
+            rows = self.rows(f"/api/facilities/export/?ordering={ordering}")
+            self.assertEqual([row["name"] for row in rows], expected, ordering)
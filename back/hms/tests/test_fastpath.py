@@ -0,0 +1,118 @@
+from datetime import date
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from hms.fastpath import ValuesRowSerializer
+from hms.models import Facility, Person
+from hms.serializers import FacilitySerializer, PersonSerializer
+
+
+class ValuesListTests(TestCase):
+    """The ``.values()`` fast path renders exactly what the serializer renders"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        people = [
+            ("Ana", "Lopez", date(1980, 1, 1), "Canadian", "Nurse", "ana@example.com"),
+            ("Zoë", "Núñez", date(1999, 12, 31), "Français", None, None),
+            ("Ana", "Lopez", date(1970, 6, 15), None, "", "ana2@example.com"),
+            ("Bo", "Li", date(2001, 2, 28), "Canadian", "Teacher", None),
+            (
+                "Émile",
+                "Zola",
+                date(1940, 4, 2),
+                "French",
+                "Writer",
+                "émile@example.com",
+            ),
+        ]
+        for number, (first, last, dob, citizenship, occupation, email) in enumerate(
+            people, start=1
+        ):
+            Person.objects.create(
+                medicare=f"MED00000000{number}",
+                ssn=number if number != 2 else None,
+                first_name=first,
+                last_name=last,
+                dob=dob,
+                telephone=f"514000000{number}" if number % 2 else None,
+                citizenship=citizenship,
+                occupation=occupation,
+                email=email,
+            )
+        for number, (name, capacity, gmssn) in enumerate(
+            [("Clinique Ste-Thérèse", 40, 1), ("General", None, 3), ("Orphan", 5, 999)],
+            start=1,
+        ):
+            Facility.objects.create(
+                name=name,
+                address=f"{number} Rue Principale",
+                city="Montréal",
+                province="QC",
+                postal_code="H1H1H1",
+                phone_number=f"514111000{number}",
+                web_address="https://example.com",
+                type="Clinic",
+                capacity=capacity,
+                gmssn=gmssn,
+            )
+
+    def get_both(self, path):
+        fast = self.client.get(path)
+        with mock.patch.object(
+            ValuesRowSerializer,
+            "for_serializer",
+            return_value=SimpleNamespace(supported=False),
+        ):
+            slow = self.client.get(path)
+        self.assertEqual(fast.status_code, 200, path)
+        self.assertEqual(slow.status_code, 200, path)
+        return fast, slow
+
+    def assert_identical(self, *paths):
+        for path in paths:
+            fast, slow = self.get_both(path)
+            self.assertEqual(fast.content, slow.content, path)
+
+    def test_fast_path_applies(self):
+        for serializer in (PersonSerializer(), FacilitySerializer()):
+            self.assertTrue(ValuesRowSerializer.for_serializer(serializer).supported)
+
+    def test_person_lists_are_identical(self):
+        self.assert_identical(
+            "/api/persons/",
+            "/api/persons/?search=ana",
+            "/api/persons/?search=MED000000003",
+            "/api/persons/?fields=medicare,dob,email",
+            "/api/persons/?omit=ssn,telephone",
+            "/api/persons/?ordering=-dob",
+            "/api/persons/?ordering=last_name&citizenship=Canadian",
+            "/api/persons/?page=2&page_size=2",
+        )
+
+    def test_person_cursor_pages_are_identical(self):
+        path = "/api/persons/?cursor=&page_size=2&fields=medicare,first_name"
+        pages = 0
+        while path:
+            fast, slow = self.get_both(path)
+            self.assertEqual(fast.content, slow.content, path)
+            path = fast.json()["next"]
+            pages += 1
+
+        self.assertEqual(pages, 3)
+
+    def test_facility_lists_are_identical(self):
+        self.assert_identical(
+            "/api/facilities/",
+            "/api/facilities/?search=rue",
+            "/api/facilities/?fields=name,capacity,general_manager_name",
+            "/api/facilities/?omit=general_manager_name",
+            "/api/facilities/?ordering=-capacity",
+            "/api/facilities/?ordering=general_manager__last_name",
+            "/api/facilities/?page=2&page_size=2",
+        )
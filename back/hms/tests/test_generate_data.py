@@ -0,0 +1,46 @@
+import io
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from hms.management.commands.generate_data import MODELS
+from hms.models import Employee, Facility, Person
+
+
+class GenerateDataTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def generate(self, *args):
+        call_command("generate_data", "--workers", "0", *args, stdout=io.StringIO())
+
+    def rows(self):
+        rows = {}
+        for table, model in MODELS.items():
+            columns = [field.attname for field in model._meta.concrete_fields]
+            rows[table] = list(model.objects.order_by(*columns).values_list(*columns))
+        return rows
+
+    def test_same_seed_gives_the_same_rows(self):
+        self.generate("--persons", "40", "--seed", "3")
+        first = self.rows()
+        self.generate("--persons", "40", "--seed", "3", "--flush")
+
+        self.assertEqual(self.rows(), first)
+        self.assertEqual(len(first["Persons"]), 40)
+        self.generate("--persons", "40", "--seed", "4", "--flush")
+        self.assertNotEqual(self.rows()["Persons"], first["Persons"])
+
+    def test_small_counts_keep_one_employee_and_facility(self):
+        self.generate("--persons", "3")
+
+        self.assertEqual(Person.objects.count(), 3)
+        self.assertEqual(Employee.objects.count(), 1)
+        self.assertEqual(Facility.objects.get().gmssn, Employee.objects.get().ssn)
+
+    def test_invalid_counts_are_rejected(self):
+        with self.assertRaisesMessage(CommandError, "--persons must be at least 1"):
+            self.generate("--persons", "0")
+        with self.assertRaisesMessage(CommandError, "facilities <= employees"):
+            self.generate("--persons", "5", "--employees", "6")
@@ -0,0 +1,90 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import date
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from hms.models import Person
+
+
+def record(medicare, ssn, telephone, first_name="Ana"):
+    return {
+        "medicare": medicare,
+        "ssn": ssn,
+        "telephone": telephone,
+        "first_name": first_name,
+        "last_name": "Lopez",
+        "dob": "1980-01-01",
+    }
+
+
+class ImportDataTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, "persons.ndjson")
+        Person.objects.create(
+            medicare="MED000000001",
+            ssn=111,
+            telephone="5550001",
+            first_name="Bea",
+            last_name="Martin",
+            dob=date(1970, 1, 1),
+        )
+
+    def run_import(self, records, *args):
+        with open(self.path, "w") as source:
+            source.writelines(json.dumps(record) + "\n" for record in records)
+        stdout = io.StringIO()
+        call_command(
+            "import_data", "persons", self.path, "--workers=0", *args, stdout=stdout
+        )
+        with open(f"{self.path}.rejects.ndjson") as rejects:
+            return stdout.getvalue(), [json.loads(line) for line in rejects]
+
+    def test_upsert_creates_and_updates(self):
+        output, rejects = self.run_import(
+            [
+                record("MED000000001", 111, "5550001", first_name="Beatrice"),
+                record("MED000000002", 222, "5550002"),
+            ]
+        )
+
+        self.assertIn("1 created, 1 updated, 0 rejected", output)
+        self.assertEqual(rejects, [])
+        self.assertEqual(Person.objects.get(ssn=111).first_name, "Beatrice")
+
+    def test_ssn_of_another_person_is_rejected(self):
+        output, rejects = self.run_import(
+            [
+                record("MED000000002", 111, "5550002"),
+                record("MED000000003", 333, "5550003"),
+            ]
+        )
+
+        self.assertIn("1 created, 0 updated, 1 rejected", output)
+        self.assertEqual([reject["record"] for reject in rejects], [1])
+        self.assertIn("ssn", rejects[0]["errors"])
+        owner = Person.objects.get(ssn=111)
+        self.assertEqual((owner.medicare, owner.first_name), ("MED000000001", "Bea"))
+        self.assertFalse(Person.objects.filter(medicare="MED000000002").exists())
+
+    def test_telephone_repeated_in_the_file_is_rejected(self):
+        output, rejects = self.run_import(
+            [
+                record("MED000000002", 222, "5550009"),
+                record("MED000000003", 333, "5550009"),
+            ],
+            "--mode=create",
+        )
+
+        self.assertIn("1 created, 0 updated, 1 rejected", output)
+        self.assertEqual(
+            rejects[0]["errors"], {"telephone": ["Same telephone as record 1"]}
+        )
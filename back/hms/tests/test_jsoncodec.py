@@ -0,0 +1,98 @@
+import io
+import uuid
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from hms import jsoncodec
+from hms.parsers import FastJSONParser, NDJSONParser
+from hms.renderers import FastJSONRenderer
+
+SAMPLE = {
+    "decimal": Decimal("1.10"),
+    "date": date(2024, 2, 29),
+    "datetime": datetime(2024, 1, 2, 3, 4, 5, 678901),
+    "aware": datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc),
+    "time": time(7, 30, 0, 250000),
+    "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "name": "Zoë Núñez – 東京",
+    "separators": "line paragraph end",
+    "none": None,
+    "nested": [{"count": 1, "ratio": 0.5, "ok": True}, [], {}],
+}
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def assert_same_as_drf(self, data, accepted_media_type=None):
+        self.assertEqual(
+            FastJSONRenderer().render(data, accepted_media_type),
+            JSONRenderer().render(data, accepted_media_type),
+        )
+
+    def test_matches_drf(self):
+        self.assert_same_as_drf(SAMPLE)
+        self.assert_same_as_drf([SAMPLE, None, "plain"])
+        self.assert_same_as_drf(None)
+
+    def test_matches_drf_without_orjson(self):
+        with mock.patch.object(jsoncodec, "HAS_ORJSON", False):
+            self.assert_same_as_drf(SAMPLE)
+
+    def test_indented_output_matches_drf(self):
+        self.assert_same_as_drf(SAMPLE, "application/json; indent=4")
+
+
+class FastJSONParserTests(SimpleTestCase):
+    def parse(self, content, encoding="utf-8"):
+        return FastJSONParser().parse(io.BytesIO(content), None, {"encoding": encoding})
+
+    def test_parses_utf8_and_other_encodings(self):
+        self.assertEqual(self.parse('{"name": "Zoë"}'.encode()), {"name": "Zoë"})
+        self.assertEqual(
+            self.parse('{"name": "Zoë"}'.encode("latin-1"), "latin-1"), {"name": "Zoë"}
+        )
+
+    def test_invalid_json_is_a_parse_error(self):
+        for content in [b'{"name": ', b"NaN", b"\xff"]:
+            with self.assertRaises(ParseError, msg=content):
+                self.parse(content)
+
+
+class NDJSONParserTests(SimpleTestCase):
+    def parse(self, content, encoding="utf-8"):
+        return NDJSONParser().parse(io.BytesIO(content), None, {"encoding": encoding})
+
+    def test_one_item_per_line_skipping_blank_lines(self):
+        content = b'{"a": 1}\n\n  \n{"a": "\xc3\xa9"}\r\n[1, 2]'
+
+        self.assertEqual(self.parse(content), [{"a": 1}, {"a": "é"}, [1, 2]])
+
+    def test_other_encodings_are_decoded(self):
+        self.assertEqual(
+            self.parse('{"a": "é"}\n'.encode("latin-1"), "latin-1"), [{"a": "é"}]
+        )
+
+    def test_error_names_the_line(self):
+        with self.assertRaisesMessage(ParseError, "NDJSON parse error on line 3"):
+            self.parse(b'{"a": 1}\n\n{"a": \n{"a": 2}\n')
+
+
+class AuthParseErrorTests(TestCase):
+    def test_invalid_json_is_a_bad_request(self):
+        client = APIClient()
+        # Registering is for staff
+        staff = get_user_model().objects.create_user("staff", is_staff=True)
+        client.force_authenticate(staff)
+        for path in ("/api/auth/login/", "/api/auth/register/"):
+            response = client.post(
+                path, b'{"username": ', content_type="application/json"
+            )
+
+            self.assertEqual(response.status_code, 400, path)
+            self.assertEqual(response.json(), {"error": "Invalid JSON data"}, path)
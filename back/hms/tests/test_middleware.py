@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from hms.middleware import QueryBudgetExceeded
+
+
+@override_settings(QUERY_INSTRUMENTATION=True, DEBUG=False)
+class QueryInstrumentationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_no_server_timing_for_other_users(self):
+        response = self.client.get("/api/persons/")
+        self.assertFalse(response.has_header("Server-Timing"))
+
+        self.client.force_authenticate(get_user_model().objects.create_user("user"))
+        response = self.client.get("/api/persons/")
+        self.assertFalse(response.has_header("Server-Timing"))
+
+    def test_server_timing_for_staff(self):
+        staff = get_user_model().objects.create_user("staff", is_staff=True)
+        self.client.force_authenticate(staff)
+
+        response = self.client.get("/api/persons/")
+
+        self.assertRegex(
+            response["Server-Timing"], r'^db;dur=[\d.]+;desc="\d+ queries"'
+        )
+
+    @override_settings(DEBUG=True)
+    def test_server_timing_with_debug(self):
+        response = self.client.get("/api/persons/")
+        self.assertIn("total;dur=", response["Server-Timing"])
+
+    @override_settings(
+        QUERY_BUDGET_ACTION="raise", QUERY_BUDGETS={"person-list-create": 0}
+    )
+    def test_exceeded_budget_raises(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get("/api/persons/")
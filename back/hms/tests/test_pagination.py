@@ -0,0 +1,135 @@
+from datetime import date
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from hms.models import Infection, Person
+from hms.pagination import EstimatedCountPaginator
+
+
+def create_persons(count):
+    return Person.objects.bulk_create(
+        Person(
+            medicare=f"MED{number:09d}",
+            first_name=["Ana", "Ben", "Chloe"][number % 3],
+            last_name=f"Last{number // 3:03d}",
+            dob=date(1980, 1, 1),
+            citizenship="Canadian" if number % 2 else "French",
+        )
+        for number in range(count)
+    )
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def walk(self, url, direction="next"):
+        """The pages from ``url`` following ``direction`` links"""
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.json())
+            url = pages[-1][direction]
+        return pages
+
+    def test_cursor_walks_every_row_once_in_order(self):
+        create_persons(25)
+        pages = self.walk("/api/persons/?cursor=&page_size=7")
+
+        self.assertEqual([len(page["results"]) for page in pages], [7, 7, 7, 4])
+        self.assertNotIn("count", pages[0])
+        medicares = [row["medicare"] for page in pages for row in page["results"]]
+        expected = list(
+            Person.objects.order_by("first_name", "last_name", "medicare").values_list(
+                "medicare", flat=True
+            )
+        )
+        self.assertEqual(medicares, expected)
+
+    def test_previous_link_returns_the_same_pages(self):
+        create_persons(25)
+        forward = self.walk("/api/persons/?cursor=&page_size=7")
+        backward = self.walk(forward[-1]["previous"], direction="previous")
+
+        self.assertEqual(
+            [page["results"] for page in reversed(backward)],
+            [page["results"] for page in forward[:-1]],
+        )
+        self.assertIsNone(backward[-1]["previous"])
+
+    def test_descending_composite_ordering(self):
+        Infection.objects.bulk_create(
+            Infection(ssn=ssn, date=date(2024, 1, day), type_id=1)
+            for ssn in (1, 2)
+            for day in (1, 2, 3)
+        )
+        pages = self.walk("/api/infections/?cursor=&page_size=4")
+
+        rows = [(row["date"], row["ssn"]) for page in pages for row in page["results"]]
+        self.assertEqual(
+            rows,
+            [
+                ("2024-01-03", 1),
+                ("2024-01-03", 2),
+                ("2024-01-02", 1),
+                ("2024-01-02", 2),
+                ("2024-01-01", 1),
+                ("2024-01-01", 2),
+            ],
+        )
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get("/api/persons/?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 404)
+
+
+class EstimatedCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        create_persons(12)
+
+    def test_small_results_are_counted_exactly(self):
+        body = self.client.get("/api/persons/?citizenship=French").json()
+
+        self.assertEqual(body["count"], 6)
+        self.assertIs(body["count_exact"], True)
+
+    def test_filtered_count_stops_at_the_cap(self):
+        with mock.patch.object(EstimatedCountPaginator, "count_cap", 4):
+            body = self.client.get(
+                "/api/persons/?citizenship=French&page_size=2"
+            ).json()
+
+        self.assertEqual(body["count"], 4)
+        self.assertIs(body["count_exact"], False)
+        self.assertIsNotNone(body["next"])
+
+    @mock.patch("hms.pagination.estimated_table_rows", return_value=50000)
+    def test_unfiltered_count_uses_the_table_estimate(self, estimated_table_rows):
+        body = self.client.get("/api/persons/?page_size=5").json()
+
+        self.assertEqual(body["count"], 50000)
+        self.assertIs(body["count_exact"], False)
+        self.assertEqual(len(body["results"]), 5)
+
+    @mock.patch("hms.pagination.estimated_table_rows", return_value=50000)
+    def test_pages_past_the_end_of_an_estimate(self, estimated_table_rows):
+        last = self.client.get("/api/persons/?page=3&page_size=5").json()
+        beyond = self.client.get("/api/persons/?page=4&page_size=5")
+
+        self.assertEqual(len(last["results"]), 2)
+        self.assertIsNone(last["next"])
+        self.assertEqual(beyond.status_code, 404)
+
+    @mock.patch("hms.pagination.estimated_table_rows", return_value=100)
+    def test_small_estimate_is_replaced_by_a_count(self, estimated_table_rows):
+        body = self.client.get("/api/persons/").json()
+
+        self.assertEqual(body["count"], 12)
+        self.assertIs(body["count_exact"], True)
@@ -0,0 +1,215 @@
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from hms.db.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.alive = True
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.opened = []
+
+    def connect(self):
+        connection = FakeConnection(len(self.opened) + 1)
+        self.opened.append(connection)
+        return connection
+
+    @staticmethod
+    def check(connection):
+        if not connection.alive:
+            raise ConnectionError("server has gone away")
+
+    def make_pool(self, **options):
+        return ConnectionPool("default", self.connect, self.check, **options)
+
+    def with_clock(self):
+        clock = FakeClock()
+        patcher = mock.patch("hms.db.pool.time.monotonic", clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return clock
+
+    def test_reuses_the_most_recently_returned_connection(self):
+        pool = self.make_pool()
+        first, reused_first = pool.checkout()
+        second, _ = pool.checkout()
+        pool.checkin(first)
+        pool.checkin(second)
+
+        connection, reused = pool.checkout()
+
+        self.assertFalse(reused_first)
+        self.assertTrue(reused)
+        self.assertIs(connection, second)
+
+    def test_checkout_times_out_at_max_size(self):
+        pool = self.make_pool(max_size=1, timeout=0.05)
+        pool.checkout()
+
+        with self.assertRaises(PoolTimeout):
+            pool.checkout()
+
+        self.assertEqual(len(self.opened), 1)
+        self.assertEqual(pool.stats()["timeouts"], 1)
+
+    def test_checkout_waits_for_a_checkin_at_max_size(self):
+        pool = self.make_pool(max_size=1, timeout=5)
+        connection, _ = pool.checkout()
+        result = []
+        waiter = threading.Thread(target=lambda: result.append(pool.checkout()))
+        waiter.start()
+        while not pool.stats()["waiting"]:
+            pass
+
+        pool.checkin(connection)
+        waiter.join(5)
+
+        self.assertEqual(result, [(connection, True)])
+        self.assertEqual(len(self.opened), 1)
+        self.assertGreater(pool.stats()["wait_time_max_ms"], 0)
+
+    def test_idle_connections_are_closed_after_max_idle(self):
+        clock = self.with_clock()
+        pool = self.make_pool(max_idle=60)
+        connection, _ = pool.checkout()
+        pool.checkin(connection)
+
+        clock.now += 60
+        replacement, reused = pool.checkout()
+
+        self.assertTrue(connection.closed)
+        self.assertFalse(reused)
+        self.assertIsNot(replacement, connection)
+        self.assertEqual(pool.stats()["evicted_idle"], 1)
+        self.assertEqual(pool.stats()["size"], 1)
+
+    def test_connections_are_replaced_after_max_lifetime(self):
+        clock = self.with_clock()
+        pool = self.make_pool(max_idle=3600, max_lifetime=600)
+        connection, _ = pool.checkout()
+        pool.checkin(connection)
+
+        # Found too old on checkout
+        clock.now += 600
+        replacement, reused = pool.checkout()
+        self.assertTrue(connection.closed)
+        self.assertFalse(reused)
+
+        # Found too old on checkin
+        clock.now += 600
+        pool.checkin(replacement)
+        self.assertTrue(replacement.closed)
+        self.assertEqual(pool.stats()["idle"], 0)
+        self.assertEqual(pool.stats()["evicted_lifetime"], 2)
+
+    def test_checkout_discards_a_dead_connection(self):
+        pool = self.make_pool()
+        connection, _ = pool.checkout()
+        pool.checkin(connection)
+        connection.alive = False
+
+        replacement, reused = pool.checkout()
+
+        self.assertTrue(connection.closed)
+        self.assertFalse(reused)
+        self.assertIsNot(replacement, connection)
+        self.assertEqual(pool.stats()["check_failures"], 1)
+
+    def test_recently_returned_connections_skip_the_check(self):
+        clock = self.with_clock()
+        pool = self.make_pool(check_after=30)
+        connection, _ = pool.checkout()
+        pool.checkin(connection)
+        connection.alive = False
+
+        clock.now += 29
+        self.assertEqual(pool.checkout(), (connection, True))
+
+    def test_unusable_connections_are_closed_on_checkin(self):
+        pool = self.make_pool(max_size=1)
+        connection, _ = pool.checkout()
+
+        pool.checkin(connection, reusable=False)
+
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()["size"], 0)
+        self.assertEqual(pool.stats()["idle"], 0)
+        # The freed slot opens a new connection
+        self.assertFalse(pool.checkout()[1])
+
+    def test_foreign_connections_are_ignored_on_checkin(self):
+        pool = self.make_pool()
+        stranger = FakeConnection(0)
+
+        pool.checkin(stranger)
+
+        self.assertFalse(stranger.closed)
+        self.assertEqual(pool.stats()["idle"], 0)
+
+    def test_stats(self):
+        pool = self.make_pool(max_size=3)
+        first, _ = pool.checkout()
+        second, _ = pool.checkout()
+        pool.checkin(first)
+        pool.checkout()
+
+        stats = pool.stats()
+
+        self.assertEqual(
+            {
+                key: stats[key]
+                for key in (
+                    "alias",
+                    "max_size",
+                    "size",
+                    "in_use",
+                    "idle",
+                    "waiting",
+                    "checkouts",
+                    "connections_created",
+                    "timeouts",
+                )
+            },
+            {
+                "alias": "default",
+                "max_size": 3,
+                "size": 2,
+                "in_use": 2,
+                "idle": 0,
+                "waiting": 0,
+                "checkouts": 3,
+                "connections_created": 2,
+                "timeouts": 0,
+            },
+        )
+
+    def test_close_closes_idle_connections(self):
+        pool = self.make_pool()
+        idle, _ = pool.checkout()
+        in_use, _ = pool.checkout()
+        pool.checkin(idle)
+
+        pool.close()
+
+        self.assertTrue(idle.closed)
+        self.assertFalse(in_use.closed)
+        self.assertEqual(pool.stats()["size"], 1)
@@ -0,0 +1,170 @@
+from datetime import date
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from hms.caching import bump_table_version
+from hms.models import (
+    Facility,
+    Infection,
+    InfectionType,
+    Person,
+    Vaccination,
+    VaccineType,
+)
+from hms.reference import ReferenceCache, infection_type_names
+
+
+class ReferenceCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.types = [
+            InfectionType.objects.create(type_name=name)
+            for name in ("Alpha", "Beta", "Gamma")
+        ]
+
+    def test_whole_table_is_loaded_once(self):
+        names = ReferenceCache(InfectionType, "type_name")
+
+        with self.assertNumQueries(1):
+            self.assertEqual(names.get(self.types[1].pk), "Beta")
+            self.assertEqual(names.get(self.types[0].pk), "Alpha")
+            self.assertEqual(names.get(0, "Unknown"), "Unknown")
+            self.assertEqual(names.get(None, "Unknown"), "Unknown")
+
+        self.assertEqual(
+            names.stats(),
+            {
+                "table": "InfectionTypes",
+                "entries": 3,
+                "max_entries": 5000,
+                "complete": True,
+                "hits": 3,
+                "misses": 0,
+                "loads": 1,
+                "evictions": 0,
+            },
+        )
+
+    @override_settings(REFERENCE_CACHE_MAX_ENTRIES=2)
+    def test_larger_tables_keep_the_most_recently_used_entries(self):
+        alpha, beta, gamma = (infection_type.pk for infection_type in self.types)
+        names = ReferenceCache(InfectionType, "type_name")
+
+        self.assertEqual(names.get(alpha), "Alpha")
+        # Gamma did not fit; loading it evicts Beta, the least recently used
+        with self.assertNumQueries(1):
+            self.assertEqual(names.get(gamma), "Gamma")
+        with self.assertNumQueries(0):
+            self.assertEqual(names.get(alpha), "Alpha")
+            self.assertEqual(names.get(gamma), "Gamma")
+        with self.assertNumQueries(1):
+            self.assertEqual(names.get(beta), "Beta")
+
+        stats = names.stats()
+        self.assertEqual(
+            {
+                key: stats[key]
+                for key in ("entries", "complete", "hits", "misses", "evictions")
+            },
+            {"entries": 2, "complete": False, "hits": 3, "misses": 2, "evictions": 2},
+        )
+
+    def test_writes_in_this_process_invalidate_immediately(self):
+        names = infection_type_names
+        alpha = self.types[0]
+        self.assertEqual(names.get(alpha.pk), "Alpha")
+
+        delta = InfectionType.objects.create(type_name="Delta")
+        self.assertEqual(names.get(delta.pk), "Delta")
+
+        alpha.type_name = "Alpha 2"
+        alpha.save()
+        self.assertEqual(names.get(alpha.pk), "Alpha 2")
+
+        alpha_pk = alpha.pk
+        alpha.delete()
+        self.assertEqual(names.get(alpha_pk, "Unknown"), "Unknown")
+
+    def test_other_writes_are_picked_up_within_the_check_interval(self):
+        names = ReferenceCache(InfectionType, "type_name")
+        alpha = self.types[0]
+        self.assertEqual(names.get(alpha.pk), "Alpha")
+        # As another process writes: no signal here, only a new table version
+        InfectionType.objects.filter(pk=alpha.pk).update(type_name="Alpha 2")
+        bump_table_version(InfectionType)
+        checked_at = names._checked_at
+
+        with mock.patch("hms.reference.time.monotonic", return_value=checked_at + 0.9):
+            with self.assertNumQueries(0):
+                self.assertEqual(names.get(alpha.pk), "Alpha")
+        with mock.patch("hms.reference.time.monotonic", return_value=checked_at + 1):
+            self.assertEqual(names.get(alpha.pk), "Alpha 2")
+        self.assertEqual(names.stats()["loads"], 2)
+
+
+class ReferenceNamesRenderingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        Person.objects.create(
+            medicare="MED000000001",
+            ssn=1,
+            first_name="Ana",
+            last_name="Lopez",
+            dob=date(1980, 1, 1),
+        )
+        facility = Facility.objects.create(
+            name="Clinic",
+            address="1 Main St",
+            city="Montreal",
+            province="QC",
+            postal_code="H1H1H1",
+            phone_number="5140000001",
+            web_address="https://example.com",
+            type="Clinic",
+            gmssn=1,
+        )
+        for number in range(1, 4):
+            infection_type = InfectionType.objects.create(
+                type_name=f"Infection {number}"
+            )
+            vaccine_type = VaccineType.objects.create(type_name=f"Vaccine {number}")
+            Infection.objects.create(
+                ssn=1, date=date(2024, 1, number), type_id=infection_type.pk
+            )
+            Vaccination.objects.create(
+                ssn=1,
+                date=date(2024, 1, number),
+                type_id=vaccine_type.pk,
+                fid=facility.fid,
+            )
+
+    def test_list_names_cost_no_queries(self):
+        for path, name_fields, tables in [
+            ("/api/infections/", ["infection_type_name"], ["InfectionTypes"]),
+            (
+                "/api/vaccinations/",
+                ["vaccine_type_name", "facility_name"],
+                ["VaccineTypes", "Facilities"],
+            ),
+        ]:
+            # The first request loads the reference tables
+            self.client.get(path)
+
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(path)
+
+            self.assertEqual(response.status_code, 200)
+            rows = response.json()["results"]
+            self.assertEqual(len(rows), 3)
+            for name in name_fields:
+                self.assertNotIn("Unknown", [row[name] for row in rows], path)
+            for table in tables:
+                self.assertFalse(
+                    [query for query in queries if f'"{table}"' in query["sql"]], path
+                )
@@ -0,0 +1,135 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError, connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from hms import routers
+from hms.models import Person
+from hms.test_runner import TEST_REPLICA as REPLICA
+
+
+def persons_queries(queries):
+    return [query for query in queries if '"Persons"' in query["sql"]]
+
+
+# A replica lagging by 0 seconds may serve tables written just now
+@override_settings(
+    DATABASE_REPLICAS=[REPLICA], REPLICA_MAX_LAG=0, REPLICA_RETRY_AFTER=30
+)
+class ReplicaRoutingTests(TransactionTestCase):
+    # The replica's connection only sees committed rows
+    databases = {"default", REPLICA}
+
+    def setUp(self):
+        cache.clear()
+        routers._failed_until.clear()
+        self.addCleanup(routers._failed_until.clear)
+        # Flushing leaves out the unmanaged tables
+        self.addCleanup(Person.objects.all().delete)
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user("reader"))
+
+    def get_persons(self, path="/api/persons/"):
+        with CaptureQueriesContext(connections["default"]) as primary:
+            with CaptureQueriesContext(connections[REPLICA]) as replica:
+                response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return persons_queries(primary), persons_queries(replica)
+
+    def test_safe_get_reads_from_the_replica(self):
+        primary, replica = self.get_persons()
+
+        self.assertEqual(primary, [])
+        self.assertTrue(replica)
+
+    def test_router_sends_writes_to_the_primary(self):
+        router = routers.ReplicaRouter()
+        token = routers._read_alias.set(REPLICA)
+        self.addCleanup(routers._read_alias.reset, token)
+
+        self.assertEqual(router.db_for_read(None), REPLICA)
+        self.assertEqual(router.db_for_write(None), "default")
+        self.assertFalse(router.allow_migrate(REPLICA, "hms"))
+        self.assertIsNone(router.allow_migrate("default", "hms"))
+
+    def test_writes_use_the_primary(self):
+        with CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = self.client.post(
+                "/api/persons/",
+                {
+                    "medicare": "MED000000001",
+                    "first_name": "Ana",
+                    "last_name": "Lopez",
+                    "dob": "1980-01-01",
+                },
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(list(replica), [])
+
+    @override_settings(REPLICA_MAX_LAG=5)
+    def test_writer_reads_from_the_primary_while_sticky(self):
+        response = self.client.delete("/api/persons/MED000000009/")
+
+        cookie = response.cookies[routers.STICKY_COOKIE]
+        self.assertEqual(cookie["max-age"], 5)
+        primary, replica = self.get_persons()
+        self.assertTrue(primary)
+        self.assertEqual(replica, [])
+
+        # Once the cookie has expired, reads return to the replica
+        del self.client.cookies[routers.STICKY_COOKIE]
+        with override_settings(REPLICA_MAX_LAG=0):
+            primary, replica = self.get_persons()
+        self.assertEqual(primary, [])
+        self.assertTrue(replica)
+
+    @override_settings(REPLICA_MAX_LAG=5)
+    def test_recently_written_tables_are_read_from_the_primary(self):
+        # Versions of tables nobody wrote start at the current time
+        primary, replica = self.get_persons()
+
+        self.assertTrue(primary)
+        self.assertEqual(replica, [])
+
+    def test_choose_replica_skips_a_failed_replica_until_retry_after(self):
+        with mock.patch.object(
+            connections[REPLICA], "ensure_connection", side_effect=OperationalError
+        ) as ensure_connection, self.assertLogs("hms.routers", "WARNING"):
+            self.assertIsNone(routers.choose_replica())
+            self.assertIsNone(routers.choose_replica())
+        self.assertEqual(ensure_connection.call_count, 1)
+
+        now = routers.time.monotonic()
+        with mock.patch.object(routers.time, "monotonic", return_value=now + 29):
+            self.assertIsNone(routers.choose_replica())
+        with mock.patch.object(routers.time, "monotonic", return_value=now + 31):
+            self.assertEqual(routers.choose_replica(), REPLICA)
+
+    def test_unreachable_replica_falls_back_to_the_primary(self):
+        with mock.patch.object(
+            connections[REPLICA], "ensure_connection", side_effect=OperationalError
+        ), self.assertLogs("hms.routers", "WARNING"):
+            with CaptureQueriesContext(connections["default"]) as primary:
+                response = self.client.get("/api/persons/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(persons_queries(primary))
+
+    def test_replica_error_mid_request_is_retried_on_the_primary(self):
+        def fail(execute, sql, params, many, context):
+            raise OperationalError("server has gone away")
+
+        with connections[REPLICA].execute_wrapper(fail), self.assertLogs(
+            "hms.routers", "WARNING"
+        ):
+            primary, replica = self.get_persons()
+
+        self.assertTrue(replica)
+        self.assertTrue(primary)
+        self.assertEqual(routers.available_replicas(), [])
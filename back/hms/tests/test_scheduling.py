@@ -0,0 +1,128 @@
+from datetime import date, time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from hms.models import Schedule
+from hms.scheduling import find_conflicts, overlap_errors
+from hms.serializers import ScheduleSerializer
+
+DAY = date(2024, 1, 2)
+
+
+def shift(start, end, essn=1, fid=1, day=DAY):
+    return {"essn": essn, "fid": fid, "date": day, "start_time": start, "end_time": end}
+
+
+class ShiftOverlapValidatorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.day_shift = Schedule.objects.create(**shift(time(7), time(15)))
+
+    def validate(self, values, instance=None, partial=False):
+        serializer = ScheduleSerializer(instance, data=values, partial=partial)
+        return serializer.is_valid(), serializer.errors
+
+    def test_overlapping_shift_at_another_facility_is_rejected(self):
+        valid, errors = self.validate(shift("14:00", "22:00", fid=2))
+
+        self.assertFalse(valid)
+        self.assertEqual(
+            errors["non_field_errors"],
+            ["Overlaps the employee's shift at facility 1 on 2024-01-02, 07:00-15:00"],
+        )
+
+    def test_adjacent_shift_and_other_employees_are_allowed(self):
+        self.assertTrue(self.validate(shift("15:00", "23:00"))[0])
+        self.assertTrue(self.validate(shift("08:00", "16:00", essn=2))[0])
+
+    def test_night_shift_runs_into_the_next_day(self):
+        Schedule.objects.create(**shift(time(22), time(6), day=date(2024, 1, 1)))
+
+        self.assertFalse(self.validate(shift("05:00", "07:00"))[0])
+        self.assertTrue(self.validate(shift("06:00", "07:00", fid=2))[0])
+
+    def test_shift_without_end_runs_until_midnight(self):
+        Schedule.objects.create(**shift(time(18), None))
+
+        self.assertFalse(self.validate(shift("23:00", "23:30", fid=2))[0])
+        self.assertTrue(self.validate(shift("00:00", "06:00", day=date(2024, 1, 3)))[0])
+
+    def test_updated_shift_does_not_conflict_with_itself(self):
+        valid, errors = self.validate(
+            {"end_time": "16:00"}, self.day_shift, partial=True
+        )
+        self.assertTrue(valid, errors)
+
+        Schedule.objects.create(**shift(time(16), time(20)))
+        self.assertFalse(
+            self.validate({"end_time": "17:00"}, self.day_shift, partial=True)[0]
+        )
+
+    def test_api_rejects_an_overlap(self):
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user("planner"))
+
+        response = client.post(
+            "/api/schedules/", shift("10:00", "12:00", fid=2), format="json"
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Schedule.objects.count(), 1)
+
+
+class BulkOverlapTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Schedule.objects.create(**shift(time(7), time(15)))
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user("planner"))
+
+    def test_batch_is_checked_against_stored_shifts_and_itself(self):
+        rows = [
+            shift(time(14), time(18), fid=2),
+            shift(time(18), time(22)),
+            shift(time(21), time(23), fid=3),
+            None,
+        ]
+        errors = overlap_errors(rows, labels=["a", "b", "c", "d"])
+
+        self.assertEqual(list(errors), [0, 2])
+        self.assertIn("07:00-15:00", errors[0]["non_field_errors"][0])
+        self.assertEqual(errors[2], {"non_field_errors": ["Overlaps the shift of b"]})
+
+    def test_upserted_shift_replaces_its_stored_version(self):
+        self.assertEqual(overlap_errors([shift(time(7), time(16))]), {})
+
+    def test_bulk_endpoint_writes_nothing_on_an_overlap(self):
+        response = self.client.post(
+            "/api/schedules/bulk/",
+            [
+                {**shift("16:00", "20:00"), "date": "2024-01-02"},
+                {**shift("19:00", "21:00", fid=2), "date": "2024-01-02"},
+            ],
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]],
+            ["not_written", "error"],
+        )
+        self.assertEqual(Schedule.objects.count(), 1)
+
+    def test_stored_conflicts_are_listed(self):
+        Schedule.objects.bulk_create([Schedule(**shift(time(14), time(18), fid=2))])
+
+        conflicts = find_conflicts(DAY, DAY)
+        response = self.client.get(
+            "/api/schedules/conflicts/?start=2024-01-02&end=2024-01-02"
+        )
+
+        self.assertEqual(
+            [(a.start_time, b.start_time) for a, b in conflicts], [(time(7), time(14))]
+        )
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(response.data["conflicts"][0]["essn"], 1)
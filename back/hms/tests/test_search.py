@@ -0,0 +1,181 @@
+from datetime import date
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from hms.bulk import record_bulk_write
+from hms.models import Employee, Person
+from hms.search import PersonTokenIndex, TokenIndexSearchBackend, is_identifier
+
+
+class PersonSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.index = PersonTokenIndex()
+        self.index.rebuild_in_background = False
+        patcher = mock.patch("hms.search.person_index", self.index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for number, (first_name, email) in enumerate(
+            [
+                ("Alice", "alice.abbott670@example.com"),
+                ("Alina", "alina@example.com"),
+                ("Bruno", "bruno@example.com"),
+            ],
+            start=1,
+        ):
+            Person.objects.create(
+                medicare=f"MED00000000{number}",
+                ssn=100 + number,
+                first_name=first_name,
+                last_name="Abbott",
+                dob=date(1980, 1, 1),
+                email=email,
+            )
+
+    def search(self, term):
+        body = self.client.get("/api/persons/", {"search": term}).json()
+        return body, [row["medicare"] for row in body["results"]]
+
+    def test_identifier_shapes(self):
+        self.assertTrue(is_identifier("123456789"))
+        self.assertTrue(is_identifier("lopa1234"))
+        self.assertFalse(is_identifier("alice.abbott670"))
+        self.assertFalse(is_identifier("abbott670"))
+
+    def test_word_with_digits_matches_email(self):
+        _, found = self.search("alice.abbott670")
+        self.assertEqual(found, ["MED000000001"])
+
+    def test_numbers_match_ssn_and_medicare(self):
+        self.assertEqual(self.search("102")[1], ["MED000000002"])
+        self.assertEqual(self.search("med000000003")[1], ["MED000000003"])
+
+    def test_results_are_ranked(self):
+        Person.objects.create(
+            medicare="MED000000004",
+            first_name="Aaron",
+            last_name="Brunoson",
+            dob=date(1980, 1, 1),
+        )
+        # The exact first name match outranks the last name prefix match,
+        # which the default (first name) ordering would put first
+        _, found = self.search("bruno")
+        self.assertEqual(found, ["MED000000003", "MED000000004"])
+
+        body = self.client.get(
+            "/api/persons/", {"search": "bruno", "ordering": "first_name"}
+        )
+        found = [row["medicare"] for row in body.json()["results"]]
+        self.assertEqual(found, ["MED000000004", "MED000000003"])
+
+    def test_short_terms_match_name_prefixes_in_sql(self):
+        with mock.patch.object(self.index, "search") as search:
+            _, found = self.search("al")
+
+        search.assert_not_called()
+        self.assertEqual(sorted(found), ["MED000000001", "MED000000002"])
+
+    def test_bulk_write_then_single_save_is_searchable(self):
+        self.index.rebuild()
+        Person.objects.bulk_create(
+            [
+                Person(
+                    medicare="MED000000009",
+                    first_name="Quokkabulk",
+                    last_name="X",
+                    dob=date(1990, 1, 1),
+                )
+            ]
+        )
+        record_bulk_write(Person)
+        Person.objects.create(
+            medicare="MED000000010",
+            first_name="Quokkasingle",
+            last_name="X",
+            dob=date(1990, 1, 1),
+        )
+
+        self.assertEqual(self.search("quokkabulk")[1], ["MED000000009"])
+        self.assertEqual(self.search("quokkasingle")[1], ["MED000000010"])
+
+    def test_too_many_matches_fall_back_to_sql(self):
+        with mock.patch.object(TokenIndexSearchBackend, "max_results", 2):
+            body, found = self.search("abbott")
+
+        self.assertEqual(body["count"], 3)
+        self.assertIs(body["count_exact"], True)
+        self.assertEqual(len(found), 3)
+
+    def test_saved_person_is_indexed_without_a_rebuild(self):
+        self.search("ali")
+        with mock.patch.object(self.index, "rebuild") as rebuild:
+            Person.objects.filter(medicare="MED000000003").get().save()
+            person = Person.objects.get(medicare="MED000000003")
+            person.first_name = "Alistair"
+            person.save()
+            _, found = self.search("alis")
+
+        rebuild.assert_not_called()
+        self.assertEqual(found, ["MED000000003"])
+
+    @mock.patch("hms.search.threading.Thread")
+    def test_rebuild_runs_outside_the_request(self, thread):
+        self.index.rebuild_in_background = True
+        _, found = self.search("ali")
+
+        thread.assert_called_once()
+        thread.return_value.start.assert_called_once()
+        # Served from SQL until the index is built
+        self.assertEqual(sorted(found), ["MED000000001", "MED000000002"])
+
+
+class EmployeeSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        for ssn, first_name, last_name, email, role in [
+            (102, "Alice", "Abbott", "alice.abbott@example.com", "nurse"),
+            (1020, "Alina", "Abbott", "102alina@example.com", "doctor"),
+            (103, "Bruno", "Costa", "bruno@example.com", "regular employee"),
+            (104, "Nuri", "Demir", None, "cashier"),
+        ]:
+            Person.objects.create(
+                medicare=f"MED000000{ssn}",
+                ssn=ssn,
+                first_name=first_name,
+                last_name=last_name,
+                dob=date(1980, 1, 1),
+                email=email,
+            )
+            Employee.objects.create(ssn=ssn, role=role)
+
+    def search(self, term):
+        response = self.client.get("/api/employees/", {"search": term})
+        self.assertEqual(response.status_code, 200, term)
+        return sorted(row["ssn"] for row in response.json()["results"])
+
+    def test_digits_are_an_exact_ssn_lookup(self):
+        self.assertEqual(self.search("102"), [102])
+        self.assertEqual(self.search(" 1020 "), [1020])
+        self.assertEqual(self.search("10"), [])
+
+    def test_every_word_prefixes_a_name_or_email(self):
+        self.assertEqual(self.search("abb"), [102, 1020])
+        self.assertEqual(self.search("ABBOTT ali"), [102, 1020])
+        self.assertEqual(self.search("alice.abbott@"), [102])
+        self.assertEqual(self.search("ali costa"), [])
+        # Prefixes only
+        self.assertEqual(self.search("bott"), [])
+
+    def test_whole_search_prefixes_the_role(self):
+        self.assertEqual(self.search("nur"), [102, 104])
+        self.assertEqual(self.search("regular emp"), [103])
+
+    def test_other_input_is_a_name_search(self):
+        for term in ["102b", "-102", "1.5", "²", "%", "_"]:
+            self.assertEqual(self.search(term), [], term)
+        self.assertEqual(self.search("102alina"), [1020])
@@ -0,0 +1,56 @@
+from datetime import date
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from hms.models import Infection, InfectionType, Person
+
+
+class SparseFieldsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        Person.objects.create(
+            medicare="MED000000001",
+            ssn=1,
+            first_name="Ana",
+            last_name="Lopez",
+            dob=date(1980, 1, 1),
+        )
+        self.covid = InfectionType.objects.create(type_name="COVID-19")
+        Infection.objects.create(ssn=1, date=date(2024, 1, 1), type_id=self.covid.pk)
+
+    def test_fields_picks_the_response_fields(self):
+        body = self.client.get("/api/persons/?fields=medicare,first_name").json()
+        self.assertEqual(
+            body["results"], [{"medicare": "MED000000001", "first_name": "Ana"}]
+        )
+
+    def test_omit_drops_fields(self):
+        row = self.client.get("/api/infections/?omit=person_name").json()["results"][0]
+
+        self.assertNotIn("person_name", row)
+        self.assertEqual(row["infection_type_name"], "COVID-19")
+
+    def test_dropped_method_fields_are_not_queried(self):
+        # Without person_name the person relation is neither joined nor loaded
+        with self.assertNumQueries(2):
+            body = self.client.get("/api/infections/?fields=ssn,date").json()
+        self.assertEqual(body["results"], [{"ssn": 1, "date": "2024-01-01"}])
+
+    def test_unknown_field_is_a_bad_request(self):
+        for query in ("fields=medicare,nope", "omit=nope"):
+            response = self.client.get(f"/api/persons/?{query}")
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {"fields": ["Unknown field: nope"]})
+
+    def test_detail_views_accept_fields(self):
+        body = self.client.get(
+            f"/api/infection-types/{self.covid.pk}/?fields=type_name"
+        ).json()
+        self.assertEqual(body, {"type_name": "COVID-19"})
+
+    def test_other_methods_ignore_fields(self):
+        response = self.client.options("/api/persons/?fields=nope")
+        self.assertEqual(response.status_code, 200)
@@ -1,11 +1,24 @@
-from django.db.models import Q
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import OrderingFilter, SearchFilter
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.permissions import IsAdminUser, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 
+from .bulk import BulkWriteView
+from .caching import column_versioned_key, versions_shared
+from .db.pool import pool_stats
+from .export import ExportMixin
+from .fastpath import ValuesListMixin
+from .mixins import ConditionalGetMixin, SparseFieldsMixin, request_etag
 from .models import (
     Employee,
     Employment,
@@ -18,6 +31,10 @@ from .models import (
     Vaccination,
     VaccineType,
 )
+from .pagination import EstimatedCountPagination
+from .reference import REFERENCE_CACHES
+from .scheduling import MAX_CONFLICT_RANGE, find_conflicts, overlap_errors
+from .search import PersonSearchFilter
 from .serializers import (
     EmployeeSerializer,
     EmploymentSerializer,
@@ -32,91 +49,113 @@ from .serializers import (
 )
 
 
-class PersonListCreateView(generics.ListCreateAPIView):
+class PersonListCreateView(
+    ConditionalGetMixin, SparseFieldsMixin, ValuesListMixin, generics.ListCreateAPIView
+):
     queryset = Person.objects.all()
     serializer_class = PersonSerializer
+    pagination_class = EstimatedCountPagination
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [SearchFilter, DjangoFilterBackend, OrderingFilter]
-    search_fields = [
-        "first_name",
-        "last_name",
-        "ssn",
-        "medicare",
-        "email",
-        "occupation",
-        "citizenship",
-    ]
+    # Indexed search ranked by relevance, see hms.search
+    filter_backends = [DjangoFilterBackend, OrderingFilter, PersonSearchFilter]
     filterset_fields = ["citizenship", "occupation"]
     ordering_fields = ["first_name", "last_name", "dob"]
     ordering = ["first_name", "last_name"]
+    cursor_ordering = ["first_name", "last_name", "medicare"]
+
 
+class PersonExportView(ExportMixin, PersonListCreateView):
+    pass
 
-class PersonDetailView(generics.RetrieveUpdateDestroyAPIView):
+
+class PersonDetailView(
+    ConditionalGetMixin, SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView
+):
     queryset = Person.objects.all()
     serializer_class = PersonSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
 
-class EmployeeListCreateView(generics.ListCreateAPIView):
-    queryset = Employee.objects.all()
+class EmployeeListCreateView(
+    ConditionalGetMixin, SparseFieldsMixin, generics.ListCreateAPIView
+):
+    queryset = Employee.objects.select_related(*EmployeeSerializer.batched_relations)
     serializer_class = EmployeeSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = ["role"]
-    ordering_fields = ["ssn", "role"]
+    ordering_fields = ["ssn", "role", "person__first_name", "person__last_name"]
     ordering = ["ssn"]
 
     def get_queryset(self):
-        queryset = Employee.objects.all()
-        search = self.request.query_params.get("search", None)
-        if search:
-            # Search in related person data
-            queryset = queryset.filter(
-                Q(ssn__icontains=search) | Q(role__icontains=search)
+        queryset = super().get_queryset()
+        search = self.request.query_params.get("search", "").strip()
+        if not search:
+            return queryset
+        if search.isdecimal():
+            # Exact SSN lookup on the primary key; isdigit() would also let
+            # through digits int() rejects, such as "²"
+            return queryset.filter(ssn=int(search))
+
+        # Every word must prefix one of the joined person's name or email
+        # columns, so the LIKE 'word%' predicates can use their indexes
+        name_match = Q()
+        for term in search.split():
+            name_match &= (
+                Q(person__first_name__istartswith=term)
+                | Q(person__last_name__istartswith=term)
+                | Q(person__email__istartswith=term)
             )
-            # Also search in related person fields
-            try:
-                person_queryset = Person.objects.filter(
-                    Q(first_name__icontains=search)
-                    | Q(last_name__icontains=search)
-                    | Q(email__icontains=search)
-                )
-                person_ssns = person_queryset.values_list("ssn", flat=True)
-                queryset = queryset.filter(
-                    Q(ssn__in=person_ssns)
-                    | Q(ssn__icontains=search)
-                    | Q(role__icontains=search)
-                )
-            except Exception:
-                pass
-        return queryset
-
-
-class EmployeeDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Employee.objects.all()
+        return queryset.filter(name_match | Q(role__istartswith=search))
+
+
+class EmployeeExportView(ExportMixin, EmployeeListCreateView):
+    pass
+
+
+class EmployeeDetailView(
+    ConditionalGetMixin, SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView
+):
+    queryset = Employee.objects.select_related(*EmployeeSerializer.batched_relations)
     serializer_class = EmployeeSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
 
-class FacilityListCreateView(generics.ListCreateAPIView):
-    queryset = Facility.objects.all()
+class FacilityListCreateView(
+    ConditionalGetMixin, SparseFieldsMixin, ValuesListMixin, generics.ListCreateAPIView
+):
+    queryset = Facility.objects.select_related(*FacilitySerializer.batched_relations)
     serializer_class = FacilitySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     filter_backends = [SearchFilter, DjangoFilterBackend, OrderingFilter]
     search_fields = ["name", "address", "city", "type", "phone_number"]
     filterset_fields = ["type", "city", "province"]
-    ordering_fields = ["name", "type", "capacity", "city"]
+    ordering_fields = [
+        "name",
+        "type",
+        "capacity",
+        "city",
+        "general_manager__last_name",
+    ]
     ordering = ["name"]
 
 
-class FacilityDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Facility.objects.all()
+class FacilityExportView(ExportMixin, FacilityListCreateView):
+    pass
+
+
+class FacilityDetailView(
+    ConditionalGetMixin, SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView
+):
+    queryset = Facility.objects.select_related(*FacilitySerializer.batched_relations)
     serializer_class = FacilitySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
 
 # Residence Views
-class ResidenceListCreateView(generics.ListCreateAPIView):
+class ResidenceListCreateView(
+    ConditionalGetMixin, SparseFieldsMixin, generics.ListCreateAPIView
+):
     queryset = Residence.objects.all()
     serializer_class = ResidenceSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
@@ -127,14 +166,22 @@ class ResidenceListCreateView(generics.ListCreateAPIView):
     ordering = ["city"]
 
 
-class ResidenceDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ResidenceExportView(ExportMixin, ResidenceListCreateView):
+    pass
+
+
+class ResidenceDetailView(
+    ConditionalGetMixin, SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView
+):
     queryset = Residence.objects.all()
     serializer_class = ResidenceSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
 
 # Infection Type Views
-class InfectionTypeListCreateView(generics.ListCreateAPIView):
+class InfectionTypeListCreateView(
+    ConditionalGetMixin, SparseFieldsMixin, generics.ListCreateAPIView
+):
     queryset = InfectionType.objects.all()
     serializer_class = InfectionTypeSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
@@ -143,31 +190,54 @@ class InfectionTypeListCreateView(generics.ListCreateAPIView):
     ordering = ["type_name"]
 
 
-class InfectionTypeDetailView(generics.RetrieveUpdateDestroyAPIView):
+class InfectionTypeExportView(ExportMixin, InfectionTypeListCreateView):
+    pass
+
+
+class InfectionTypeDetailView(
+    ConditionalGetMixin, SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView
+):
     queryset = InfectionType.objects.all()
     serializer_class = InfectionTypeSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
 
 # Infection Views
-class InfectionListCreateView(generics.ListCreateAPIView):
-    queryset = Infection.objects.all()
+class InfectionListCreateView(
+    ConditionalGetMixin, SparseFieldsMixin, generics.ListCreateAPIView
+):
+    queryset = Infection.objects.select_related(*InfectionSerializer.batched_relations)
     serializer_class = InfectionSerializer
+    pagination_class = EstimatedCountPagination
     permission_classes = [IsAuthenticatedOrReadOnly]
     filter_backends = [DjangoFilterBackend, OrderingFilter]
-    filterset_fields = ["ssn", "type_id", "date"]
-    ordering_fields = ["date", "ssn"]
+    filterset_fields = ["ssn", "type_id", "date", "infection_type__type_name"]
+    ordering_fields = ["date", "ssn", "person__last_name"]
     ordering = ["-date"]
+    cursor_ordering = ["-date", "ssn", "type_id"]
 
 
-class InfectionDetailView(generics.RetrieveUpdateDestroyAPIView):
+class InfectionBulkView(BulkWriteView):
     queryset = Infection.objects.all()
     serializer_class = InfectionSerializer
+
+
+class InfectionExportView(ExportMixin, InfectionListCreateView):
+    pass
+
+
+class InfectionDetailView(
+    ConditionalGetMixin, SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView
+):
+    queryset = Infection.objects.select_related(*InfectionSerializer.batched_relations)
+    serializer_class = InfectionSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
 
 # Vaccine Type Views
-class VaccineTypeListCreateView(generics.ListCreateAPIView):
+class VaccineTypeListCreateView(
+    ConditionalGetMixin, SparseFieldsMixin, generics.ListCreateAPIView
+):
     queryset = VaccineType.objects.all()
     serializer_class = VaccineTypeSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
@@ -176,97 +246,249 @@ class VaccineTypeListCreateView(generics.ListCreateAPIView):
     ordering = ["type_name"]
 
 
-class VaccineTypeDetailView(generics.RetrieveUpdateDestroyAPIView):
+class VaccineTypeExportView(ExportMixin, VaccineTypeListCreateView):
+    pass
+
+
+class VaccineTypeDetailView(
+    ConditionalGetMixin, SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView
+):
     queryset = VaccineType.objects.all()
     serializer_class = VaccineTypeSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
 
 # Vaccination Views
-class VaccinationListCreateView(generics.ListCreateAPIView):
-    queryset = Vaccination.objects.all()
+class VaccinationListCreateView(
+    ConditionalGetMixin, SparseFieldsMixin, generics.ListCreateAPIView
+):
+    queryset = Vaccination.objects.select_related(
+        *VaccinationSerializer.batched_relations
+    )
     serializer_class = VaccinationSerializer
+    pagination_class = EstimatedCountPagination
     permission_classes = [IsAuthenticatedOrReadOnly]
     filter_backends = [DjangoFilterBackend, OrderingFilter]
-    filterset_fields = ["ssn", "type_id", "fid", "no_of_dose"]
-    ordering_fields = ["date", "ssn"]
+    filterset_fields = [
+        "ssn",
+        "type_id",
+        "fid",
+        "no_of_dose",
+        "facility__city",
+        "facility__province",
+    ]
+    ordering_fields = ["date", "ssn", "person__last_name", "facility__name"]
     ordering = ["-date"]
+    cursor_ordering = ["-date", "ssn", "type_id"]
 
 
-class VaccinationDetailView(generics.RetrieveUpdateDestroyAPIView):
+class VaccinationBulkView(BulkWriteView):
     queryset = Vaccination.objects.all()
     serializer_class = VaccinationSerializer
+
+
+class VaccinationExportView(ExportMixin, VaccinationListCreateView):
+    pass
+
+
+class VaccinationDetailView(
+    ConditionalGetMixin, SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView
+):
+    queryset = Vaccination.objects.select_related(
+        *VaccinationSerializer.batched_relations
+    )
+    serializer_class = VaccinationSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
 
 # Employment Views
-class EmploymentListCreateView(generics.ListCreateAPIView):
-    queryset = Employment.objects.all()
+class EmploymentListCreateView(
+    ConditionalGetMixin, SparseFieldsMixin, generics.ListCreateAPIView
+):
+    queryset = Employment.objects.select_related(
+        *EmploymentSerializer.batched_relations
+    )
     serializer_class = EmploymentSerializer
+    pagination_class = EstimatedCountPagination
     permission_classes = [IsAuthenticatedOrReadOnly]
     filter_backends = [DjangoFilterBackend, OrderingFilter]
-    filterset_fields = ["essn", "fid"]
-    ordering_fields = ["start_date", "end_date"]
+    filterset_fields = ["essn", "fid", "facility__city", "employee__role"]
+    ordering_fields = ["start_date", "end_date", "employee__person__last_name"]
     ordering = ["-start_date"]
+    cursor_ordering = ["-start_date", "essn", "fid"]
+
+
+class EmploymentExportView(ExportMixin, EmploymentListCreateView):
+    pass
 
 
-class EmploymentDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Employment.objects.all()
+class EmploymentDetailView(
+    ConditionalGetMixin, SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView
+):
+    queryset = Employment.objects.select_related(
+        *EmploymentSerializer.batched_relations
+    )
     serializer_class = EmploymentSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
 
 # Schedule Views
-class ScheduleListCreateView(generics.ListCreateAPIView):
-    queryset = Schedule.objects.all()
+class ScheduleListCreateView(
+    ConditionalGetMixin, SparseFieldsMixin, generics.ListCreateAPIView
+):
+    queryset = Schedule.objects.select_related(*ScheduleSerializer.batched_relations)
     serializer_class = ScheduleSerializer
+    pagination_class = EstimatedCountPagination
     permission_classes = [IsAuthenticatedOrReadOnly]
     filter_backends = [DjangoFilterBackend, OrderingFilter]
-    filterset_fields = ["essn", "fid", "date"]
-    ordering_fields = ["date", "start_time"]
+    filterset_fields = ["essn", "fid", "date", "facility__city", "employee__role"]
+    ordering_fields = ["date", "start_time", "employee__person__last_name"]
     ordering = ["date", "start_time"]
+    cursor_ordering = ["date", "start_time", "essn", "fid"]
 
 
-class ScheduleDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ScheduleBulkView(BulkWriteView):
     queryset = Schedule.objects.all()
     serializer_class = ScheduleSerializer
+    # No employee may be booked for two shifts at once
+    check_rows = staticmethod(overlap_errors)
+
+
+class ScheduleExportView(ExportMixin, ScheduleListCreateView):
+    pass
+
+
+class ScheduleDetailView(
+    ConditionalGetMixin, SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView
+):
+    queryset = Schedule.objects.select_related(*ScheduleSerializer.batched_relations)
+    serializer_class = ScheduleSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
 
 # Filter Options Views
-@api_view(["GET"])
-def person_filter_options(request):
-    """Get unique values for person filters"""
-    citizenships = (
-        Person.objects.exclude(citizenship__isnull=True)
-        .exclude(citizenship="")
-        .values_list("citizenship", flat=True)
-        .distinct()
-        .order_by("citizenship")
-    )
+FILTER_OPTIONS_TTL = 24 * 60 * 60
 
-    occupations = (
-        Person.objects.exclude(occupation__isnull=True)
-        .exclude(occupation="")
-        .values_list("occupation", flat=True)
-        .distinct()
-        .order_by("occupation")
+
+def filter_options_key(model):
+    """Cache key for a model's filter options"""
+    return column_versioned_key(
+        f"hms:filter-options:{model._meta.db_table}", model, *model.tracked_columns
     )
 
-    return Response(
-        {"citizenships": list(citizenships), "occupations": list(occupations)}
+
+def filter_options_etag(model):
+    def etag(request, *args, **kwargs):
+        if not versions_shared():
+            return None
+        return request_etag(request, filter_options_key(model))
+
+    return etag
+
+
+def get_filter_options(model):
+    """
+    Distinct non-empty values of each tracked column with their row counts,
+    one GROUP BY per column, cached until one of the columns changes
+    """
+    key = filter_options_key(model)
+    options = cache.get(key)
+    if options is None:
+        options = {}
+        for column in model.tracked_columns:
+            rows = (
+                model.objects.exclude(**{f"{column}__isnull": True})
+                .exclude(**{column: ""})
+                .values(column)
+                .annotate(count=Count("pk"))
+                .order_by(column)
+            )
+            options[column] = [
+                {"value": row[column], "count": row["count"]} for row in rows
+            ]
+        cache.set(key, options, FILTER_OPTIONS_TTL)
+    return options
+
+
+def filter_options_response(options, names):
+    """Plain value lists under ``names`` plus the faceted counts"""
+    data = {
+        name: [option["value"] for option in options[column]]
+        for column, name in names.items()
+    }
+    data["facets"] = options
+    response = Response(data)
+    # Let browsers keep the options but revalidate them (a cheap 304) each time
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@condition(etag_func=filter_options_etag(Person))
+@api_view(["GET"])
+def person_filter_options(request):
+    """Get unique values for person filters"""
+    options = get_filter_options(Person)
+    return filter_options_response(
+        options, {"citizenship": "citizenships", "occupation": "occupations"}
     )
 
 
+@condition(etag_func=filter_options_etag(Employee))
 @api_view(["GET"])
 def employee_filter_options(request):
     """Get unique values for employee filters"""
-    roles = (
-        Employee.objects.exclude(role__isnull=True)
-        .exclude(role="")
-        .values_list("role", flat=True)
-        .distinct()
-        .order_by("role")
-    )
+    options = get_filter_options(Employee)
+    return filter_options_response(options, {"role": "roles"})
+
 
-    return Response({"roles": list(roles)})
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def reference_cache_stats(request):
+    """Get hit/miss statistics of this process's reference table caches"""
+    return Response({"caches": [cache.stats() for cache in REFERENCE_CACHES.values()]})
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def db_pool_stats(request):
+    """Get size, usage and wait time metrics of this process's connection pools"""
+    return Response({"pools": pool_stats()})
+
+
+def _query_date(request, name, default):
+    value = request.query_params.get(name)
+    if not value:
+        return default
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValidationError({name: ["Expected a date as YYYY-MM-DD"]})
+
+
+@api_view(["GET"])
+def schedule_conflicts(request):
+    """
+    List overlapping shifts of the same employee starting from ``start`` to
+    ``end`` (ISO dates; by default the next 4 weeks)
+    """
+    start = _query_date(request, "start", timezone.localdate())
+    end = _query_date(request, "end", start + timedelta(days=27))
+    if not start <= end <= start + MAX_CONFLICT_RANGE:
+        raise ValidationError(
+            {"end": [f"Must be within {MAX_CONFLICT_RANGE.days} days after start"]}
+        )
+    conflicts = [
+        {
+            "essn": earlier.essn,
+            "shifts": [earlier.as_dict(), later.as_dict()],
+        }
+        for earlier, later in find_conflicts(start, end)
+    ]
+    return Response(
+        {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "count": len(conflicts),
+            "conflicts": conflicts,
+        }
+    )